@@ -0,0 +1,408 @@
+"""
+Loop-latency and reaction-time benchmark for the robot scripts.
+
+Runs a script's simplified_run() (or async_run()) with timing wrappers around its
+sensor, ramp and maneuver functions, collects the results into fixed-memory histograms
+and prints a summary table:
+
+- distance_cm: cost of one distance_cm() call, plus how often it returned None
+- ramp_overrun: blocking ramp wall time minus the requested ramp time (async_run: awaited
+  Drive.ramp_to() calls that were not cut short)
+- loop_period: time between main-loop iterations (maneuvers, first_reading() and learn_stop()
+  excluded); async_run: between decisions, i.e. target_speed() calls
+- detect_to_stop: braking reading (inside THRESHOLD_CM, or target_speed() None) to the left motor stopped
+- avoid_maneuver: decide_turn_side() (single motor: detection; async_run: sides_async()) until
+  forward() (async_run: forward_async()) resumes
+
+On the Pico (robot script saved as main.py, stop it with Ctrl-C first):
+
+    >>> import bench
+    >>> bench.main("main", 20000)
+
+On a PC against the simulator in sim/:
+
+    python3 bench.py dual_motor_main.py --seconds 60 --world clutter --set LOOP_DELAY_MS=40
+    python3 bench.py dual_motor_main.py --entry async_run
+
+The robot drives during the run, exactly as in the entry point.
+"""
+
+import sys
+if sys.implementation.name != "micropython":
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "sim"))
+import utime
+from array import array
+
+BUCKETS = 96  # 4 per power of two from 4us: covers ~33s at <=25% resolution
+PARAMS = ("THRESHOLD_CM", "LOOP_DELAY_MS", "SENSOR_PERIOD_MS", "IRQ_RANGING", "DUAL_CORE",
+          "BACKGROUND_RAMPS", "RAMP_STEP_MS", "CRUISE_SPEED", "DECEL_RAMP_MS", "LOCAL_MAP",
+          "TTC_BRAKING", "TTC_CRUISE_SPEED", "ENCODERS", "SPEED_CONTROL")
+MANEUVERS = ("reverse", "reverse_until_safe", "ramp_both_stop", "turn_left", "turn_right",
+             "turn_with_validation", "peek", "first_reading", "learn_stop")
+ENTRIES = ("simplified_run", "async_run")
+
+
+def _bucket(v):
+    if v < 4:
+        return v if v > 0 else 0
+    e = 0
+    while v >= 8:
+        v >>= 1
+        e += 1
+    return min(BUCKETS - 1, 4 * e + v)
+
+
+def _bucket_high(i):
+    """Largest value that falls in bucket i."""
+    if i < 4:
+        return i
+    i += 1
+    return ((4 + (i - 4) % 4) << ((i - 4) // 4)) - 1
+
+
+class Histogram:
+    """Latency histogram in a preallocated array, with exact count/min/max/mean."""
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = array('I', [0] * BUCKETS)
+        self.reset()
+
+    def reset(self):
+        for i in range(BUCKETS):
+            self.counts[i] = 0
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def add(self, us):
+        if self.count == 0 or us < self.min:
+            self.min = us
+        if self.count == 0 or us > self.max:
+            self.max = us
+        self.count += 1
+        self.total += us
+        self.counts[_bucket(us)] += 1
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile, clamped to min/max."""
+        if not self.count:
+            return 0
+        need = (self.count * p + 99) // 100
+        seen = 0
+        for i in range(BUCKETS):
+            seen += self.counts[i]
+            if seen >= need:
+                return max(self.min, min(self.max, _bucket_high(i)))
+        return self.max
+
+    def row(self):
+        if not self.count:
+            return "%-15s %6d" % (self.name, 0)
+        return "%-15s %6d %9d %9d %9d %9d %9d %9d" % (
+            self.name, self.count, self.min, self.percentile(50), self.percentile(90),
+            self.percentile(99), self.max, self.total // self.count)
+
+
+class Bench:
+    """Wraps a loaded robot script module; attach() installs the probes, detach() removes them."""
+
+    def __init__(self, robot, entry="simplified_run"):
+        if entry not in ENTRIES or not hasattr(robot, entry):
+            raise ValueError("no %s() to benchmark" % entry)
+        self.robot = robot
+        self.entry = entry
+        self.distance = Histogram("distance_cm")
+        self.ramp = Histogram("ramp_overrun")
+        self.loop = Histogram("loop_period")
+        self.stop = Histogram("detect_to_stop")
+        self.avoid = Histogram("avoid_maneuver")
+        self.histograms = (self.distance, self.ramp, self.loop, self.stop, self.avoid)
+        self.timeouts = 0
+        self.elapsed_us = 0  # Length of the run, for the decision rate
+        self.params = {}  # Constants overridden for the run (shown in the report)
+        self._saved = []
+        self._depth = 0  # >0 while inside a maneuver
+        self._last_loop = None
+        self._detect = None
+        self._avoid = None
+
+    def _patch(self, obj, name, wrapper):
+        original = getattr(obj, name)
+        self._saved.append((obj, name, original))
+        setattr(obj, name, wrapper(original))
+
+    def attach(self):
+        robot = self.robot
+        self._patch(robot.sensor, "distance_cm", self._wrap_distance)
+        self._patch(robot.left, "stop", self._wrap_stop)
+        if self.entry == "async_run":
+            self._attach_async()
+            return
+        self._patch(robot, "forward", self._wrap_forward)
+        if hasattr(robot, "ramp_both"):
+            self._patch(robot, "ramp_both", self._wrap_ramp_both)
+        else:
+            self._patch(robot.left, "ramp_speed", self._wrap_ramp_speed)
+        if hasattr(robot, "decide_turn_side"):
+            self._patch(robot, "decide_turn_side", self._wrap_decide)
+        if hasattr(robot, "target_speed"):
+            self._patch(robot, "target_speed", self._wrap_target)
+        for name in MANEUVERS:
+            if hasattr(robot, name):
+                self._patch(robot, name, self._wrap_maneuver)
+
+    def _attach_async(self):
+        """
+        The asyncio runtime reads the sensor in ranging_task, so a loop iteration is a
+        decision (target_speed()), and avoid_async() is the one maneuver around the rest.
+        """
+        robot = self.robot
+        self._patch(robot, "target_speed", self._wrap_target)
+        self._patch(robot, "forward_async", self._wrap_forward_async)
+        self._patch(robot, "sides_async", self._wrap_sides_async)
+        self._patch(robot, "avoid_async", self._wrap_maneuver_async)
+        self._patch(robot.Drive, "ramp_to", self._wrap_ramp_to)
+
+    def detach(self):
+        while self._saved:
+            obj, name, original = self._saved.pop()
+            setattr(obj, name, original)
+
+    # --- probes ---
+
+    def _wrap_distance(self, fn):
+        robot = self.robot
+
+        def distance_cm():
+            t0 = utime.ticks_us()
+            dist = fn()
+            t1 = utime.ticks_us()
+            self.distance.add(utime.ticks_diff(t1, t0))
+            if dist is None:
+                self.timeouts += 1
+            if self._depth == 0 and self.entry != "async_run":
+                self._lap(t0)
+                if (dist is not None and dist < robot.THRESHOLD_CM and not hasattr(robot, "target_speed")):
+                    self._detected(t1)
+            return dist
+        return distance_cm
+
+    def _lap(self, t):
+        if self._last_loop is not None:
+            self.loop.add(utime.ticks_diff(t, self._last_loop))
+        self._last_loop = t
+
+    def _detected(self, t):
+        robot = self.robot
+        if self._detect is None and robot.left.current_duty > 0:
+            # Background readings were taken age ms before distance_cm() returned them
+            age = robot.sensor.latest()[1] if hasattr(robot.sensor, "latest") else None
+            self._detect = utime.ticks_add(t, -1000 * (age or 0))
+            if not hasattr(robot, "decide_turn_side"):
+                self._avoid = self._detect
+
+    def _wrap_target(self, fn):
+        def target_speed(dist):
+            if self._depth == 0 and self.entry == "async_run":
+                self._lap(utime.ticks_us())
+            speed = fn(dist)
+            if speed is None and self._depth == 0:
+                self._detected(utime.ticks_us())
+            return speed
+        return target_speed
+
+    def _wrap_stop(self, fn):
+        def stop():
+            fn()
+            if self._detect is not None:
+                self.stop.add(utime.ticks_diff(utime.ticks_us(), self._detect))
+                self._detect = None
+        return stop
+
+    def _wrap_forward(self, fn):
+        def forward(*args, **kwargs):
+            if self._avoid is not None:
+                self.avoid.add(utime.ticks_diff(utime.ticks_us(), self._avoid))
+                self._avoid = None
+            return fn(*args, **kwargs)
+        return forward
+
+    def _wrap_forward_async(self, fn):
+        async def forward_async(drive, speed):
+            if self._avoid is not None:
+                self.avoid.add(utime.ticks_diff(utime.ticks_us(), self._avoid))
+                self._avoid = None
+            return await fn(drive, speed)
+        return forward_async
+
+    def _wrap_ramp_both(self, fn):
+        def ramp_both(left_motor, right_motor, target_speed, ramp_time_ms, profile=None, wait=True):
+            t0 = utime.ticks_us()
+            if profile is None:
+                fn(left_motor, right_motor, target_speed, ramp_time_ms, wait=wait)
+            else:
+                fn(left_motor, right_motor, target_speed, ramp_time_ms, profile, wait)
+            if wait:
+                self.ramp.add(utime.ticks_diff(utime.ticks_us(), t0) - 1000 * ramp_time_ms)
+        return ramp_both
+
+    def _wrap_ramp_speed(self, fn):
+        def ramp_speed(target_speed, ramp_time_ms=200, wait=True, profile=None):
+            t0 = utime.ticks_us()
+            if profile is None:
+                fn(target_speed, ramp_time_ms, wait)
+            else:
+                fn(target_speed, ramp_time_ms, wait, profile)
+            if wait:
+                self.ramp.add(utime.ticks_diff(utime.ticks_us(), t0) - 1000 * ramp_time_ms)
+        return ramp_speed
+
+    def _wrap_ramp_to(self, fn):
+        async def ramp_to(drive, speed, ramp_ms, *rest):
+            t0 = utime.ticks_us()
+            done = await fn(drive, speed, ramp_ms, *rest)
+            if done:
+                self.ramp.add(utime.ticks_diff(utime.ticks_us(), t0) - 1000 * max(1, ramp_ms))
+            return done
+        return ramp_to
+
+    def _wrap_maneuver(self, fn):
+        def maneuver(*args, **kwargs):
+            self._depth += 1
+            self._last_loop = None
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._depth -= 1
+        return maneuver
+
+    def _wrap_maneuver_async(self, fn):
+        async def maneuver(*args):
+            self._depth += 1
+            self._last_loop = None
+            try:
+                return await fn(*args)
+            finally:
+                self._depth -= 1
+        return maneuver
+
+    def _wrap_sides_async(self, fn):
+        async def sides_async(drive):
+            if self._avoid is None:
+                self._avoid = utime.ticks_us()
+            return await fn(drive)
+        return sides_async
+
+    def _wrap_decide(self, fn):
+        fn = self._wrap_maneuver(fn)
+
+        def decide_turn_side(turn_alternate):
+            if self._avoid is None:
+                self._avoid = utime.ticks_us()
+            return fn(turn_alternate)
+        return decide_turn_side
+
+    # --- results ---
+
+    def report(self, title=""):
+        impl = sys.implementation
+        print("--- bench %s ---" % title)
+        print("firmware: %s %s %s" % (impl.name, ".".join(str(v) for v in impl.version[:3]),
+                                      getattr(impl, "_machine", sys.platform)))
+        shown = [(name, self.params.get(name, getattr(self.robot, name)))
+                 for name in PARAMS if hasattr(self.robot, name)]
+        shown += [(name, value) for name, value in self.params.items() if name not in PARAMS]
+        print("params: " + " ".join("%s=%s" % item for item in shown))
+        print("%-15s %6s %9s %9s %9s %9s %9s %9s" % ("metric (us)", "n", "min", "p50", "p90", "p99", "max", "mean"))
+        for h in self.histograms:
+            print(h.row())
+        if self.elapsed_us:
+            print("decisions: %.1f/s" % (self.loop.count * 1000000 / self.elapsed_us))
+        calls = self.distance.count
+        print("distance_cm None: %d/%d (%.1f%%)" % (self.timeouts, calls, 100 * self.timeouts / max(1, calls)))
+        ranger = getattr(self.robot.sensor, "ranger", None)
+        if ranger is not None:
+            print("echo timeouts: %d/%d pings" % (ranger.timeouts, ranger.pings))
+
+
+def run(robot, total_ms=20000, params=None, entry="simplified_run"):
+    """
+    Benchmark robot.simplified_run(total_ms), or the entry named (async_run). params maps
+    module constants to values set for this run only (e.g. {"LOOP_DELAY_MS": 40}).
+    Returns the Bench.
+    """
+    bench = Bench(robot, entry)
+    saved = {}
+    for name, value in (params or {}).items():
+        saved[name] = getattr(robot, name)
+        setattr(robot, name, value)
+    bench.params.update(params or {})
+    bench.attach()
+    t0 = utime.ticks_us()
+    try:
+        getattr(robot, entry)(total_ms)
+    finally:
+        bench.elapsed_us = utime.ticks_diff(utime.ticks_us(), t0)
+        bench.detach()
+        for name, value in saved.items():
+            setattr(robot, name, value)
+    return bench
+
+
+def main(script="main", total_ms=20000, params=None, entry="simplified_run"):
+    """Import the robot script by module name, benchmark it and print the table."""
+    robot = __import__(script)
+    bench = run(robot, total_ms, params, entry)
+    bench.report("%s %s" % (script, entry))
+    return bench
+
+
+def _host_main(argv=None):
+    """Benchmark a script against the simulator (see sim/run.py)."""
+    import argparse
+    import ast
+    import os
+
+    parser = argparse.ArgumentParser(description="Benchmark a robot script in the simulator.")
+    parser.add_argument("script", nargs="?", default="dual_motor_main.py")
+    parser.add_argument("--seconds", type=float, default=60, help="virtual run time")
+    parser.add_argument("--world", default="room", help="room, corridor, clutter or corner")
+    parser.add_argument("--entry", default="simplified_run", choices=ENTRIES, help="runtime to benchmark")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a script constant for this run (repeatable)")
+    parser.add_argument("--verbose", action="store_true", help="show the script's own log")
+    args = parser.parse_args(argv)
+
+    params = {}
+    for item in args.set:
+        name, _, value = item.partition("=")
+        params[name] = ast.literal_eval(value)
+
+    import run as sim
+    from world import make_world
+
+    world = make_world(args.world)
+    robot = sim.load(args.script, world, params)
+    if not hasattr(robot, args.entry):
+        parser.error("%s has no %s()" % (args.script, args.entry))
+    real_stdout = sys.stdout
+    if not args.verbose:
+        sys.stdout = open(os.devnull, "w")
+    try:
+        bench = run(robot, int(args.seconds * 1000), params, args.entry)
+    finally:
+        if sys.stdout is not real_stdout:
+            sys.stdout.close()
+        sys.stdout = real_stdout
+    bench.report("%s %s world=%s (simulated)" % (os.path.basename(args.script), args.entry, args.world))
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.implementation.name == "micropython":
+        main()
+    else:
+        sys.exit(_host_main())
@@ -0,0 +1,170 @@
+"""
+Chassis calibration profile.
+A Profile holds what calibrate_run() measured on this robot: the lowest duty that
+moves each wheel, the spin rate in place at a few speeds, and the ground speed and
+stopping distance at a few cruise speeds. It is stored as a few dozen bytes of
+packed integers, so loading it at boot is one small read and a handful of unpacks.
+Lookups interpolate linearly between the measured speeds (and extend the nearest
+segment beyond them).
+"""
+
+import struct
+
+MAGIC = b"CAL1"
+_HEAD = "<4sBBBB"  # magic, left/right dead-band duty %, turn rows, drive rows
+_TURN = "<BH"  # speed %, spin rate in tenths of deg/s
+_DRIVE = "<BHH"  # speed %, ground speed mm/s, stopping distance mm
+
+
+def _interp(rows, speed, col):
+    """rows[i][col] at speed, linear between (and beyond) the rows' speeds; None without rows."""
+    if not rows:
+        return None
+    if len(rows) == 1:
+        return rows[0][col]
+    i = 1
+    while i < len(rows) - 1 and rows[i][0] < speed:
+        i += 1
+    s0, v0 = rows[i - 1][0], rows[i - 1][col]
+    s1, v1 = rows[i][0], rows[i][col]
+    return v0 + (v1 - v0) * (speed - s0) / (s1 - s0)
+
+
+class Profile:
+    def __init__(self):
+        self.deadband = [0, 0]  # Left, right: lowest duty % that starts the wheel from rest
+        self.turn = []  # (speed %, tenths of deg/s), ascending speed
+        self.drive = []  # (speed %, mm/s, stop mm), ascending speed
+
+    def add_turn(self, speed, deg_s):
+        self.turn.append((speed, int(deg_s * 10 + 0.5)))
+        self.turn.sort()
+
+    def add_drive(self, speed, mm_s, stop_mm):
+        self.drive.append((speed, int(mm_s), int(stop_mm)))
+        self.drive.sort()
+
+    def turn_deg_s(self, speed):
+        r = _interp(self.turn, speed, 1)
+        return None if r is None else r / 10
+
+    def turn_ms(self, deg, speed, ramp_ms):
+        """
+        Full-speed time for a turn of deg at speed, given eased ramps of ramp_ms up
+        and down (together worth one ramp at full speed); None without turn data.
+        """
+        rate = self.turn_deg_s(speed)
+        if not rate or rate <= 0:
+            return None
+        return max(0, int(deg * 1000 / rate) - ramp_ms)
+
+    def drive_mm_s(self, speed):
+        return _interp(self.drive, speed, 1)
+
+    def stop_mm(self, speed):
+        return _interp(self.drive, speed, 2)
+
+    def drive_line(self):
+        """
+        (duty % where the line reaches zero speed, mm/s at full duty) for a least-squares
+        line through the drive rows, the linear model dead reckoning uses; None with
+        fewer than two rows.
+        """
+        n = len(self.drive)
+        if n < 2:
+            return None
+        sx = sy = sxx = sxy = 0
+        for speed, mm_s, _ in self.drive:
+            sx += speed
+            sy += mm_s
+            sxx += speed * speed
+            sxy += speed * mm_s
+        den = n * sxx - sx * sx
+        if den <= 0:
+            return None
+        slope = (n * sxy - sx * sy) / den
+        if slope <= 0:
+            return None
+        offset = (sy - slope * sx) / n
+        return -offset / slope, offset + slope * 100
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(struct.pack(_HEAD, MAGIC, self.deadband[0], self.deadband[1], len(self.turn), len(self.drive)))
+            for row in self.turn:
+                f.write(struct.pack(_TURN, *row))
+            for row in self.drive:
+                f.write(struct.pack(_DRIVE, *row))
+
+    def __str__(self):
+        return "deadband L/R %d/%d%%, turn %s, drive %s" % (
+            self.deadband[0], self.deadband[1],
+            " ".join("%d%%=%d.%ddeg/s" % (s, r // 10, r % 10) for s, r in self.turn),
+            " ".join("%d%%=%dmm/s,stop %dmm" % row for row in self.drive))
+
+
+def load(path):
+    """The Profile saved at path, or None if there is none (or it is not a profile)."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    head = struct.calcsize(_HEAD)
+    if len(data) < head:
+        return None
+    magic, left_db, right_db, n_turn, n_drive = struct.unpack_from(_HEAD, data)
+    if magic != MAGIC:
+        return None
+    p = Profile()
+    p.deadband = [left_db, right_db]
+    pos = head
+    turn_size = struct.calcsize(_TURN)
+    drive_size = struct.calcsize(_DRIVE)
+    if len(data) < head + n_turn * turn_size + n_drive * drive_size:
+        return None
+    for _ in range(n_turn):
+        p.turn.append(struct.unpack_from(_TURN, data, pos))
+        pos += turn_size
+    for _ in range(n_drive):
+        p.drive.append(struct.unpack_from(_DRIVE, data, pos))
+        pos += drive_size
+    return p
+
+
+def revolution_ms(times, dists, tolerance_cm=3):
+    """
+    Time for one revolution from samples taken while spinning at a steady rate
+    (times in ms from any origin, dists in cm or None): the nearest wall comes round
+    once per turn, so the readings within tolerance_cm of the overall minimum fall
+    into one cluster per revolution. Returns the mean spacing of the cluster
+    midpoints, or None with fewer than two whole clusters.
+    """
+    valid = [d for d in dists if d is not None]
+    if not valid:
+        return None
+    limit = min(valid) + tolerance_cm
+    centres = []
+    first = last = None
+    misses = 0
+    partial = True  # Already inside a cluster at the start: it is cut short, skip it
+    for i in range(len(times)):
+        d = dists[i]
+        if d is not None and d <= limit:
+            misses = 0
+            if partial:
+                continue
+            if first is None:
+                first = times[i]
+            last = times[i]
+        else:
+            partial = False
+            if first is not None:
+                misses += 1
+                if misses >= 2:  # One stray reading does not split a cluster
+                    centres.append((first + last) / 2)
+                    first = None
+    # A cluster still open at the end is cut short too
+    if len(centres) < 2:
+        return None
+    return (centres[-1] - centres[0]) / (len(centres) - 1)
@@ -4,24 +4,109 @@ Start motors; if obstacle detected, ramp stop, reverse until safe, turn (left or
 Pin and behavior constants at the top should match your hardware.
 """
 
-from machine import Pin, PWM
+from machine import Pin, Timer
 import utime
-from utime import sleep, sleep_us
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+from utime import sleep
+try:
+    from micropython import const, schedule
+except ImportError:  # CPython host: run deferred work inline
+    def const(x):
+        return x
+
+    def schedule(func, arg):
+        func(arg)
+import drivers  # pico2w-drivers/drivers
+from drivers.tof import EchoScale
+from rlog import RingLog
+try:
+    from temp_sensor import read_temperature  # pico2w_temp_sensor/temp_sensor.py
+except ImportError:
+    read_temperature = None  # Speed of sound fixed at 20 C
+try:
+    from servo import Servo  # pic2w-servo-example/servo.py, for SCANNER
+except ImportError:
+    Servo = None
+import log_events as ev
+import easing
+from ramp import RampEngine
+from ranging import EchoRanger, SonarArray
+from scanner import Scanner, NO_ECHO
+from occupancy import OccupancyGrid
+from ttc import BrakeModel, ClosingRate
+from encoder import Encoder, Odometry
+from pid import SpeedLoop, SpeedPI
+import chassis
+from filters import Median, MovingAverage, Pipeline
+from dualcore import LoopStats, SensorCore
+from prof import Profiler
+from statusled import StatusLed, BOOTING, RUNNING
+from drivers.wifi import up as wifi_up
+from telemetry import Telemetry, udp_socket, IDLE, CRUISE, SLOW, AVOID, NO_DISTANCE, STATES
+from webctl import ControlServer
 
 
 # --- MOTOR GPIO PINS ---
-STBY_PIN = 12
-LEFT_PWM = 15
-LEFT_IN1 = 14
-LEFT_IN2 = 13
+STBY_PIN = const(12)
+LEFT_PWM = const(15)
+LEFT_IN1 = const(14)
+LEFT_IN2 = const(13)
 
-RIGHT_PWM = 8 # GPIO8 (Pin 11)
-RIGHT_IN1 = 7 # GPIO7 (Pin 10)
-RIGHT_IN2 = 6 # GPIO6 (Pin 9)
+RIGHT_PWM = const(8) # GPIO8 (Pin 11)
+RIGHT_IN1 = const(7) # GPIO7 (Pin 10)
+RIGHT_IN2 = const(6) # GPIO6 (Pin 9)
 
 # HSR04
-TRIG_PIN = 16
-ECHO_PIN = 17
+TRIG_PIN = const(16)
+ECHO_PIN = const(17)
+TEMP_REFRESH_MS = 30000  # Re-read the on-chip temperature for the speed of sound this often
+IRQ_RANGING = True  # Ping in the background from a Timer instead of busy-waiting
+SENSOR_PERIOD_MS = 60  # Background ping period (must exceed the 30ms echo timeout)
+MEDIAN_WINDOW = 3  # Median stage rejects single-ping spikes (multipath, crosstalk)
+AVERAGE_WINDOW = 5  # Moving-average stage smooths what the median lets through
+DUAL_CORE = False  # Sample and filter on core 1 (_thread); overrides IRQ_RANGING
+SIDE_SENSORS = False  # Left/right HC-SR04s on a SonarArray; turn-side decisions read them instead of peeking
+LEFT_TRIG_PIN = const(18)
+LEFT_ECHO_PIN = const(19)
+RIGHT_TRIG_PIN = const(20)
+RIGHT_ECHO_PIN = const(21)
+SIDE_SENSOR_ANGLE_DEG = 45  # Side sensors point this far off the heading
+ARRAY_SLOT_MS = 40  # One sensor fires per slot; must exceed the ~38ms no-echo pulse
+SCANNER = False  # Front sensor on a servo; turn-side decisions sweep it instead of peeking
+SCAN_SERVO_PIN = const(22)
+SCAN_ANGLES = tuple(range(0, 181, 15))  # Servo angles; 90 points straight ahead, higher is left
+SCAN_RANGE_CM = 200  # No echo within this counts as free; sets the listen window per angle
+SERVO_MS_PER_DEG = 2  # Servo slew time (SG90: ~1.7ms/deg at 5V)
+SERVO_SETTLE_MS = 5  # Extra settle after each move before pinging
+LOCAL_MAP = True  # Remember nearby obstacles on an occupancy grid; skip peeks it can answer
+MAP_SIZE = 32  # Cells per side; the grid spans MAP_SIZE * MAP_CELL_CM around the robot
+MAP_CELL_CM = 10
+MAP_PERIOD_MS = 20  # Dead-reckoning and sensor-fusion Timer period
+MAP_FADE_STEP = 4  # Evidence lost per grid pass (MAP_SIZE periods); ~20s memory at 4
+MAP_SIDE_BEARING_DEG = 45  # Where a peek looks; side lookups use the same bearing
+MAP_LOOKUP_CM = 100  # A side known free this far counts as clear
+MAP_BEAM_DEG = 10  # Readings also clear rays this far either side of the beam axis
+# Dead-reckoning calibration: wheel speed at full duty, duty % below which the wheels
+# stall, wheel separation
+WHEEL_MM_S = 500
+WHEEL_DEADBAND = 15
+TRACK_MM = 140
+ENCODERS = False  # Wheel encoders (encoder.py): turns and reverses stop on angle/distance, not time
+LEFT_ENC_A = const(26)
+LEFT_ENC_B = None  # None: single-channel (slotted disc); direction comes from the motor pins
+RIGHT_ENC_A = const(27)
+RIGHT_ENC_B = None
+ENCODER_TICKS_PER_REV = 20  # Slots (or quadrature A rising edges) per wheel revolution
+WHEEL_DIAMETER_MM = 65
+ENCODER_POLL_MS = 5  # Target check interval during an encoder-timed maneuver
+SPEED_CONTROL = False  # Hold each wheel's speed with a PI loop on its encoder (pid.py); needs ENCODERS
+SPEED_PERIOD_MS = 10  # Control loop Timer period
+# Per-wheel (kp, ki): duty counts per mm/s of speed error, and per mm/s per second
+LEFT_SPEED_GAINS = (60, 800)
+RIGHT_SPEED_GAINS = (60, 800)
 
 # behavior
 THRESHOLD_CM = 50
@@ -34,14 +119,37 @@ DECEL_RAMP_MS = 150  # Faster deceleration when obstacle detected
 RESUME_RAMP_MS = 250  # Slower ramp when resuming forward
 ADAPTIVE_THRESHOLD_MULT = 1.5  # Start slowing at 1.5x threshold
 MAX_REVERSE_MS = 3000  # Maximum reverse duration as safety timeout
+MAX_REVERSE_MM = 400  # With ENCODERS: reverse_until_safe also stops after this far
+TTC_BRAKING = True  # Brake on time to collision (ttc.py) instead of at THRESHOLD_CM
+TTC_CRUISE_SPEED = 85  # Open-space cruise with TTC_BRAKING; eases to CRUISE_SPEED as TTC drops
+STOP_GAP_CM = 25  # Gap TTC braking aims to leave in front of the obstacle
+TTC_MARGIN_S = 0.15  # Brake this long before the learned stop time would close the gap
+TTC_SLOW_S = 1.5  # Start easing off below this time to collision
+CLOSING_SAMPLES = 6  # Readings in the closing-rate fit
 
 # dual-motor: turn in place
 TURN_MS = 400  # Duration of turn in place
+TURN_DEG = 90  # With ENCODERS: turn this far instead of for TURN_MS
 TURN_SPEED = 55  # Speed during turn
 
+# logging
+LOG_DEBUG = const(1)  # 0 compiles out the per-call/per-iteration debug records
+LOG_RECORDS = 128  # Ring capacity; records beyond it are dropped and counted
+LOG_DRAIN_AT = 64  # Loop drains the ring once it holds this many records
+LOG_FILE = None  # None prints records over serial; a path appends raw records (decode with rlog_decode.py)
+PROFILE = const(0)  # 1 times the hot functions (prof.py) and prints a table at exit
+
 # PWM
-PWM_FREQ = 10000
-MAX_DUTY = 65535
+PWM_FREQ = const(10000)
+MAX_DUTY = const(65535)
+BACKGROUND_RAMPS = True  # forward() returns at once; the ramp finishes on a Timer while sensing continues
+RAMP_STEP_MS = 20  # Ramp step for the engine Timer and the asyncio motor task
+
+# Ramp easing per maneuver (easing.py: LINEAR, SMOOTHSTEP, SMOOTHERSTEP, TRAPEZOID, SCURVE)
+RESUME_PROFILE = easing.SMOOTHSTEP  # forward(): resume and adaptive speed changes
+DECEL_PROFILE = easing.SMOOTHSTEP  # Ramps down to a stop
+TURN_PROFILE = easing.SMOOTHSTEP  # Turn and peek spin-up and spin-down
+REVERSE_PROFILE = easing.SMOOTHSTEP  # Reverse spin-up
 
 # Turn validation constants
 TURN_VALIDATION_PAUSE_MS = 100  # Pause for stable sensor reading after turn
@@ -61,71 +169,106 @@ PEEK_SETTLE_MS = TURN_VALIDATION_PAUSE_MS
 RECENTER_MS = PEEK_MS
 PEEK_TIE_EPS = 5
 ESCAPE_TURN_MS = 1000  # Tune for ~180° on your chassis
+# With ENCODERS the angles below replace the timings above (which become the nominal
+# durations a stalled maneuver is given up after); the recenter undoes the measured peek
+PEEK_DEG = MAP_SIDE_BEARING_DEG
+ESCAPE_DEG = 180
+
+# chassis calibration (calibrate_run): start facing a flat wall ~2m away, clear around
+PROFILE_FILE = "chassis.cal"  # Measured profile; overrides the hand-tuned timings above when present (None: ignore)
+CAL_DUTY_START = 5  # Dead-band search starts here and steps up 1% per dwell
+CAL_DWELL_MS = 150
+CAL_MOVE_CM = 0.5  # Wheel counts as moving once the wall reading shifts this much (without ENCODERS)
+CAL_DRIVE_SPEEDS = (40, CRUISE_SPEED, TTC_CRUISE_SPEED)  # Stopping runs at the wall, one per speed
+CAL_BRAKE_CM = 60  # Wall distance at which each stopping run brakes
+CAL_TURN_SPEEDS = (40, TURN_SPEED, 70)  # Spin rates timed by the wall passing the sensor
+CAL_SPIN_MS = 12000  # Sampling time per spin speed; needs two whole revolutions at the slowest
+CAL_SAMPLE_MS = 20  # Ping spacing during calibration
+MIN_DRIVE_MARGIN = 5  # A loaded profile keeps reverse/turn speeds this far above the dead-band
+
+# asyncio runtime
+ASYNC_RUNTIME = True  # main() runs async_run() instead of the blocking simplified_run()
+LOG_PERIOD_MS = 200  # Log task drains the log ring this often
+
+# boot
+FAST_BOOT = True  # Drive at the first reading with the LED pattern on a Timer, instead of blink_led()'s 3s
+BOOT_PING_TIMEOUT_MS = 300  # Drive anyway if no echo by then (nothing in range)
+BOOT_POLL_MS = 5  # First-reading poll interval
+STATUS_STEP_MS = 50  # LED pattern step (statusled.py)
+
+# Wi-Fi (telemetry and the control endpoint)
+WIFI_SSID = ""
+WIFI_PASSWORD = ""
+
+# telemetry
+TELEMETRY = False  # Stream state over Wi-Fi UDP (telemetry.py); receive with telemetry_recv.py
+TELEMETRY_HOST = "192.168.1.100"  # Receiver's IP address
+TELEMETRY_PORT = 5005
+TELEMETRY_PERIOD_MS = 50  # One frame this often
+TELEMETRY_BATCH = 8  # Frames per datagram (16 bytes each, plus an 8-byte header)
+
+# control endpoint
+CONTROL = False  # HTTP/WebSocket status, start/stop and live retuning (webctl.py); asyncio runtime only
+CONTROL_PORT = 80
+CONTROL_PUSH_MS = 250  # WebSocket status push period
+CONTROL_PARAMS = {  # Constants POST /params may change, with their limits
+    "CRUISE_SPEED": (20, 100),
+    "TTC_CRUISE_SPEED": (20, 100),
+    "THRESHOLD_CM": (10, 200),
+    "TURN_MS": (50, 3000),
+    "TURN_SPEED": (20, 100),
+}
+
+
+rlog = RingLog(LOG_RECORDS, LOG_FILE)
+profiler = Profiler(PROFILE, 12)
 
 
 def _log(tag, msg=""):
-    try:
-        ts = utime.ticks_ms()
-    except Exception:
-        ts = int(utime.time() * 1000)
-    print("[{}ms] {}: {}".format(ts, tag, msg))
-
-
-class Motor:
-    def __init__(self, pwm_pin, in1, in2):
-        _log("Motor.__init__", "pwm=%s in1=%s in2=%s" % (pwm_pin, in1, in2))
-        self.pwm = PWM(Pin(pwm_pin))
-        self.pwm.freq(PWM_FREQ)
-        self.pwm.duty_u16(0)
-        self.current_duty = 0
-        self.in1 = Pin(in1, Pin.OUT)
-        self.in2 = Pin(in2, Pin.OUT)
-        self.in1.off()
-        self.in2.off()
+    """Print a free-form line (cold paths only) after flushing queued records."""
+    rlog.drain()
+    drivers.log(tag, msg)
+
+
+class Motor(drivers.Motor):
+    """drivers.Motor on the shared RampEngine; a direct set cancels this motor's ramp."""
+
+    def __init__(self, pwm_pin, in1, in2, ramps):
+        rlog.event(ev.MOTOR_INIT, pwm_pin, in1, in2)
+        super().__init__(pwm_pin, in1, in2, PWM_FREQ)
+        self.ramps = ramps
 
     def forward(self, speed=100):
-        speed = max(0, min(100, speed))
-        _log("Motor.forward", "speed=%s" % speed)
-        self.in1.on()
-        self.in2.off()
-        duty = int((speed / 100) * MAX_DUTY)
-        self.pwm.duty_u16(duty)
-        self.current_duty = duty
+        if LOG_DEBUG:
+            rlog.event(ev.MOTOR_FORWARD, speed)
+        self.ramps.cancel(self)
+        super().forward(speed)
 
     def reverse(self, speed=100):
-        speed = max(0, min(100, speed))
-        _log("Motor.reverse", "speed=%s" % speed)
-        self.in1.off()
-        self.in2.on()
-        duty = int((speed / 100) * MAX_DUTY)
-        self.pwm.duty_u16(duty)
-        self.current_duty = duty
+        if LOG_DEBUG:
+            rlog.event(ev.MOTOR_REVERSE, speed)
+        self.ramps.cancel(self)
+        super().reverse(speed)
 
     def stop(self):
-        _log("Motor.stop", "")
-        self.pwm.duty_u16(0)
-        self.current_duty = 0
-        self.in1.off()
-        self.in2.off()
+        if LOG_DEBUG:
+            rlog.event(ev.MOTOR_STOP)
+        self.ramps.cancel(self)
+        super().stop()
 
     def ramp_stop(self, ramp_time_ms=200):
         """Gradually reduce speed to zero before stopping."""
-        _log("Motor.ramp_stop", "ramp_time_ms=%s" % ramp_time_ms)
-        self.ramp_speed(0, ramp_time_ms)
+        rlog.event(ev.MOTOR_RAMP_STOP, ramp_time_ms)
+        self.ramp_speed(0, ramp_time_ms, profile=DECEL_PROFILE)
         self.stop()
 
-    def ramp_speed(self, target_speed, ramp_time_ms=200):
+    def ramp_speed(self, target_speed, ramp_time_ms=200, wait=True, profile=easing.LINEAR):
+        """Ramp on the shared RampEngine; wait=False returns immediately."""
         target_speed = max(0, min(100, target_speed))
-        target_duty = int((target_speed / 100) * MAX_DUTY)
-        steps = max(1, ramp_time_ms // 20)
-        step_time = ramp_time_ms // steps
-        duty_step = (target_duty - self.current_duty) // steps
-        for _ in range(steps):
-            self.current_duty += duty_step
-            self.pwm.duty_u16(self.current_duty)
-            utime.sleep_ms(step_time)
-        self.current_duty = target_duty
-        self.pwm.duty_u16(self.current_duty)
+        target_duty = int(target_speed) * MAX_DUTY // 100
+        self.ramps.ramp((self,), target_duty, ramp_time_ms, profile)
+        if wait:
+            self.ramps.wait(self)
 
 
 def _smoothstep(t):
@@ -134,63 +277,144 @@ def _smoothstep(t):
     return t * t * (3 - 2 * t)
 
 
-def ramp_both(left_motor, right_motor, target_speed, ramp_time_ms, ease=True):
+@profiler.wrap("ramp_both")
+def ramp_both(left_motor, right_motor, target_speed, ramp_time_ms, profile=easing.SMOOTHSTEP, wait=True):
     """
-    Ramp both motors in sync to avoid drift. Uses ease-in/ease-out for smoother
-    acceleration/deceleration. Both motors step together each interval.
+    Ramp both motors in sync to avoid drift, eased by an easing.py profile
+    (ease-in/ease-out by default). Both motors step together on the ramp engine
+    Timer; wait=False returns immediately and the ramp continues in the background.
     """
     target_speed = max(0, min(100, target_speed))
-    left_target = int((target_speed / 100) * MAX_DUTY)
-    right_target = left_target
-    left_start = left_motor.current_duty
-    right_start = right_motor.current_duty
-
-    steps = max(1, ramp_time_ms // 20)
-    step_time = ramp_time_ms // steps
-
-    for i in range(steps):
-        t = (i + 1) / steps
-        t_eased = _smoothstep(t) if ease else t
-        left_duty = left_start + int((left_target - left_start) * t_eased)
-        right_duty = right_start + int((right_target - right_start) * t_eased)
-        left_motor.pwm.duty_u16(left_duty)
-        right_motor.pwm.duty_u16(right_duty)
-        left_motor.current_duty = left_duty
-        right_motor.current_duty = right_duty
-        utime.sleep_ms(step_time)
-
-    left_motor.current_duty = left_target
-    right_motor.current_duty = right_target
-    left_motor.pwm.duty_u16(left_target)
-    right_motor.pwm.duty_u16(right_target)
-
-
-class HBridge:
+    target_duty = int(target_speed) * MAX_DUTY // 100
+    ramps.ramp((left_motor, right_motor), target_duty, ramp_time_ms, profile)
+    if wait:
+        ramps.wait()
+
+
+class HBridge(drivers.HBridge):
     def __init__(self, stby_pin):
-        _log("HBridge.__init__", "stby=%s" % stby_pin)
-        self.stby = Pin(stby_pin, Pin.OUT)
-        self.enable()
+        rlog.event(ev.HBRIDGE_INIT, stby_pin)
+        super().__init__(stby_pin)
 
     def enable(self):
-        _log("HBridge.enable", "")
-        self.stby.on()
+        rlog.event(ev.HBRIDGE_ENABLE)
+        super().enable()
 
     def disable(self):
-        _log("HBridge.disable", "")
-        self.stby.off()
+        rlog.event(ev.HBRIDGE_DISABLE)
+        super().disable()
 
 
-class HCSR04:
+class HCSR04(drivers.HCSR04):
+    """
+    drivers.HCSR04 with a filter pipeline, a short-lived fallback for missed echoes,
+    and the background, core-1, array and scanner ranging modes.
+    """
+
     def __init__(self, trigger_pin, echo_pin):
-        _log("HCSR04.__init__", "trig=%s echo=%s" % (trigger_pin, echo_pin))
-        self.trigger = Pin(trigger_pin, Pin.OUT)
-        self.echo = Pin(echo_pin, Pin.IN)
-        self.trigger.value(0)
-        self.reading_buffer = []  # Moving-average filter buffer
-        self.buffer_size = 5  # Larger buffer for smoother readings
+        rlog.event(ev.HCSR04_INIT, trigger_pin, echo_pin)
+        super().__init__(trigger_pin, echo_pin, EchoScale(read_temperature, TEMP_REFRESH_MS))
+        self.filter = Pipeline(Median(MEDIAN_WINDOW), MovingAverage(AVERAGE_WINDOW))
         self.last_valid_cm = None  # Use when sensor returns None (with timeout)
+        self.last_raw_cm = None  # Newest unfiltered reading (for the local map)
         self.last_valid_time_ms = 0
         self.NONE_TIMEOUT_MS = 500  # Max age of last_valid before treating as unknown
+        self.ranger = None  # EchoRanger while background ranging is active
+        self.core = None  # SensorCore while core 1 owns sampling
+        self._core1 = None  # The one SensorCore, kept so its loop is reused, never restarted
+        self.array = None  # SonarArray while the side sensors are ranging
+        self.scanner = None  # Scanner when the sensor is on a servo
+        self._paused = None  # Ranger stopped for a scan
+        self._scan_t0 = 0
+
+    def start_background(self, period_ms=SENSOR_PERIOD_MS):
+        """Ping from a Timer and capture echoes by IRQ; distance_cm() then never blocks."""
+        rlog.event(ev.HCSR04_START_BACKGROUND, period_ms)
+        self.ranger = EchoRanger(self.trigger, self.echo, period_ms, self._accept, self.tof)
+        self.ranger.start()
+
+    def start_array(self, slot_ms=ARRAY_SLOT_MS):
+        """Range left, centre and right in turn from one Timer; distance_cm() reads the centre."""
+        rlog.event(ev.HCSR04_START_ARRAY, slot_ms)
+        sides = []
+        for trig, echo in ((LEFT_TRIG_PIN, LEFT_ECHO_PIN), (RIGHT_TRIG_PIN, RIGHT_ECHO_PIN)):
+            sides.append(EchoRanger(Pin(trig, Pin.OUT, value=0), Pin(echo, Pin.IN), slot_ms,
+                                    Median(MEDIAN_WINDOW).update, self.tof))
+        self.ranger = EchoRanger(self.trigger, self.echo, slot_ms, self._accept, self.tof)
+        self.array = SonarArray(('left', 'centre', 'right'), (sides[0], self.ranger, sides[1]), slot_ms)
+        self.array.start()
+
+    def side_distances(self):
+        """(left_cm, right_cm) from the side sensors; None where missing or stale."""
+        return self.array.distance('left'), self.array.distance('right')
+
+    def attach_scanner(self, servo):
+        """Mount the sensor on servo; scans then replace peeking."""
+        self.scanner = Scanner(servo, self.trigger, self.echo, SCAN_ANGLES, SCAN_RANGE_CM,
+                               SERVO_MS_PER_DEG, SERVO_SETTLE_MS, scale=self.tof)
+        servo.set_angle(self.scanner.centre_angle)
+
+    def begin_scan(self):
+        """Pause background ranging (it shares the pins) and start one scanner pass."""
+        self._paused = self.ranger if self.array is None else None
+        if self._paused is not None:
+            self._paused.stop()
+        if self.core is not None and not self.core.pause():
+            _log("HCSR04.begin_scan", "core 1 still measuring; scanning anyway")
+        self._scan_t0 = utime.ticks_ms()
+        self.scanner.begin()
+
+    def scan_finished(self):
+        """True once the pass is done; background ranging is then running again."""
+        if not self.scanner.finished():
+            return False
+        rlog.event(ev.HCSR04_SCAN, len(self.scanner.angles), utime.ticks_diff(utime.ticks_ms(), self._scan_t0))
+        if self._paused is not None:
+            self._paused.start()
+            self._paused = None
+        if self.core is not None:
+            self.core.resume()
+        return True
+
+    def scan(self):
+        """One blocking scanner pass; returns the Scanner with its fresh profile."""
+        self.begin_scan()
+        while not self.scan_finished():
+            utime.sleep_ms(self.scanner.window_ms)
+        return self.scanner
+
+    def start_core1(self, period_ms=SENSOR_PERIOD_MS):
+        """Sample and filter on core 1; distance_cm() on core 0 reads the newest published value."""
+        rlog.event(ev.HCSR04_START_CORE1, period_ms)
+        if self._core1 is None:
+            self._core1 = SensorCore(self.measure, period_ms)
+        self._core1.period_ms = period_ms
+        self.core = self._core1
+        self.core.start()
+
+    def stop_background(self):
+        if self.array is not None:
+            self.array.stop()
+            _log("HCSR04.stop_background", "timeouts/pings " + self.array.stats())
+            self.array = None
+            self.ranger = None
+        if self.ranger is not None:
+            rlog.event(ev.HCSR04_STOP_BACKGROUND, self.ranger.pings, self.ranger.timeouts)
+            self.ranger.stop()
+            self.ranger = None
+        if self.core is not None:
+            if not self.core.stop():
+                _log("HCSR04.stop_background", "core 1 did not stop in time")
+            _log("HCSR04.stop_background", "%s misses=%d" % (self.core.stats.summary(), self.core.misses))
+            self.core = None
+
+    def latest(self):
+        """Return (distance_cm, age_ms) of the newest background reading."""
+        if self.ranger is not None:
+            return self.ranger.mailbox.read()
+        if self.core is not None:
+            return self.core.read()
+        return None, None
 
     def _fallback_distance(self):
         """Return last valid distance if recent, else None."""
@@ -201,44 +425,143 @@ class HCSR04:
             return self.last_valid_cm
         return None
 
+    @profiler.wrap("HCSR04.distance_cm")
     def distance_cm(self):
-        # Trigger pulse
-        self.trigger.low()
-        sleep_us(200)
-        self.trigger.high()
-        sleep_us(10)
-        self.trigger.low()
-
-        # Wait for echo HIGH
-        start_wait = utime.ticks_us()
-        while self.echo.value() == 0:
-            if utime.ticks_diff(utime.ticks_us(), start_wait) > 30000:
-                return self._fallback_distance()
-
-        start = utime.ticks_us()
-
-        # Wait for echo LOW
-        while self.echo.value() == 1:
-            if utime.ticks_diff(utime.ticks_us(), start) > 30000:
-                return self._fallback_distance()
-
-        end = utime.ticks_us()
-
-        duration = utime.ticks_diff(end, start)
-        distance = (duration * 0.0343) / 2
-        if distance > 300:
+        self.tof.maybe_refresh()
+        if self.ranger is not None or self.core is not None:
+            dist, age = self.latest()
+            if dist is None or age > self.NONE_TIMEOUT_MS:
+                return None
+            return dist
+        return self.measure()
+
+    def measure(self):
+        """Blocking ping (busy-waits on the echo), filtered; the fallback when it misses."""
+        mm = self.distance_mm()
+        if mm is None:
             return self._fallback_distance()
-        
-        # Add to moving-average buffer
-        self.reading_buffer.append(distance)
-        if len(self.reading_buffer) > self.buffer_size:
-            self.reading_buffer.pop(0)
-
-        # Return average of buffered readings
-        avg_distance = sum(self.reading_buffer) / len(self.reading_buffer)
-        self.last_valid_cm = avg_distance
+        return self._accept(mm / 10)
+
+    def _accept(self, distance):
+        """Run a raw reading through the filter pipeline and return the filtered distance."""
+        self.last_raw_cm = distance
+        filtered = self.filter.update(distance)
+        self.last_valid_cm = filtered
         self.last_valid_time_ms = utime.ticks_ms()
-        return avg_distance
+        return filtered
+
+
+def wheel_mm_s(motor):
+    """Wheel speed implied by the commanded duty and direction pins, mm/s (negative in reverse)."""
+    a = motor.in1.value()
+    if a == motor.in2.value():
+        return 0  # Brake or coast
+    stall = WHEEL_DEADBAND * MAX_DUTY // 100
+    if motor.current_duty <= stall:
+        return 0
+    speed = (motor.current_duty - stall) * WHEEL_MM_S // (MAX_DUTY - stall)
+    return speed if a else -speed
+
+
+def along(motor, encoder):
+    """Speed feedback for motor's controller: the encoder's speed in the commanded direction."""
+    def speed():
+        return encoder.speed_mm_s() * (motor.in1.value() - motor.in2.value())
+    return speed
+
+
+class LocalMap:
+    """
+    Occupancy grid around the robot (occupancy.py), kept current from a Timer: every
+    MAP_PERIOD_MS the Timer queues an update with micropython.schedule, which
+    dead-reckons the pose from the wheel encoders (or, without them, the motors'
+    commanded duty) and fuses the newest raw front reading along the heading. The
+    ray tracing stays out of the Timer callback. recall() then answers the
+    peek directions from memory where the grid knows them.
+    """
+
+    def __init__(self, sensor, left_motor, right_motor, odometry=None, period_ms=MAP_PERIOD_MS):
+        self.grid = OccupancyGrid(MAP_SIZE, MAP_CELL_CM, TRACK_MM)
+        self.sensor = sensor
+        self.left = left_motor
+        self.right = right_motor
+        self.odometry = odometry
+        self._left_ticks = 0
+        self._right_ticks = 0
+        self.period_ms = period_ms
+        self.running = False
+        self.lookups = 0
+        self.answered = 0  # Sides recall() knew without peeking
+        self._seen_ms = 0
+        self._last_ms = 0
+        self._timer = None
+        self._queued = False  # _update is scheduled
+        self._update_ref = self._update  # Bound once: schedule() from the Timer must not allocate
+
+    def start(self):
+        rlog.event(ev.MAP_START, MAP_SIZE, MAP_SIZE, MAP_CELL_CM)
+        self._seen_ms = self.sensor.last_valid_time_ms
+        self._last_ms = utime.ticks_ms()
+        if self.odometry is not None:
+            self._left_ticks = self.odometry.left.ticks
+            self._right_ticks = self.odometry.right.ticks
+        self._timer = Timer()
+        self._timer.init(period=self.period_ms, mode=Timer.PERIODIC, callback=self._tick)
+        self.running = True
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        if self.running:
+            self.running = False
+            _log("LocalMap", "answered %d/%d side lookups, %d cells known" % (
+                self.answered, self.lookups, self.grid.known()))
+
+    def _tick(self, t):
+        if not self._queued:
+            self._queued = True
+            try:
+                schedule(self._update_ref, 0)
+            except RuntimeError:
+                self._queued = False  # Schedule queue full: the next period covers the longer dt
+
+    def _update(self, _):
+        self._queued = False
+        now = utime.ticks_ms()
+        dt = utime.ticks_diff(now, self._last_ms)
+        if self.odometry is None:
+            self.grid.move(wheel_mm_s(self.left), wheel_mm_s(self.right), dt)
+        elif dt > 0:
+            # Ticks counted since the last period, as the mean speed over it (um/ms = mm/s)
+            enc_l = self.odometry.left
+            enc_r = self.odometry.right
+            l_ticks = enc_l.ticks
+            r_ticks = enc_r.ticks
+            self.grid.move((l_ticks - self._left_ticks) * enc_l.um_per_tick // dt,
+                           (r_ticks - self._right_ticks) * enc_r.um_per_tick // dt, dt)
+            self._left_ticks = l_ticks
+            self._right_ticks = r_ticks
+        self._last_ms = now
+        if self.sensor.last_valid_time_ms != self._seen_ms:
+            self._seen_ms = self.sensor.last_valid_time_ms
+            self.grid.observe(self.sensor.last_raw_cm, 0, MAP_BEAM_DEG)
+        self.grid.fade_row(MAP_FADE_STEP)
+
+    def recall(self):
+        """(left_cm, right_cm) at the peek bearings from memory; None for a side the grid does not know."""
+        left_cm = self.grid.clearance(MAP_SIDE_BEARING_DEG, MAP_LOOKUP_CM)
+        right_cm = self.grid.clearance(-MAP_SIDE_BEARING_DEG, MAP_LOOKUP_CM)
+        self.lookups += 2
+        self.answered += (left_cm is not None) + (right_cm is not None)
+        rlog.event(ev.MAP_RECALL, -1 if left_cm is None else left_cm, -1 if right_cm is None else right_cm)
+        return left_cm, right_cm
+
+    def observe_scan(self, scanner):
+        """Fuse a scanner profile: one reading per swept angle."""
+        for i in range(len(scanner.angles)):
+            if scanner.profile[i] != NO_ECHO:
+                self.grid.observe(scanner.profile[i], scanner.angles[i] - scanner.centre_angle)
 
 
 def read_distance_avg(count, delay_ms):
@@ -254,94 +577,284 @@ def read_distance_avg(count, delay_ms):
     return None
 
 
+def apply_profile(p):
+    """
+    Replace the hand-tuned chassis constants with a measured chassis.Profile: the
+    dead-band and full-duty wheel speed behind dead reckoning and speed control, and
+    the turn, peek and escape durations of the open-loop turns.
+    """
+    global WHEEL_DEADBAND, WHEEL_MM_S, REVERSE_SPEED, TURN_SPEED, PEEK_SPEED
+    global TURN_MS, PEEK_MS, RECENTER_MS, ESCAPE_TURN_MS
+    line = p.drive_line()
+    if line is not None:
+        WHEEL_DEADBAND = max(0, int(line[0] + 0.5))
+        WHEEL_MM_S = int(line[1])
+    # Maneuver speeds stay clear of the duty a wheel needs to start from rest
+    low = max(p.deadband) + MIN_DRIVE_MARGIN
+    REVERSE_SPEED = max(REVERSE_SPEED, low)
+    TURN_SPEED = max(TURN_SPEED, low)
+    PEEK_SPEED = max(PEEK_SPEED, low)
+    turn_ms = p.turn_ms(TURN_DEG, TURN_SPEED, TURN_RAMP_MS)
+    if turn_ms is not None:
+        TURN_MS = turn_ms
+        PEEK_MS = RECENTER_MS = p.turn_ms(PEEK_DEG, PEEK_SPEED, TURN_RAMP_MS)
+        ESCAPE_TURN_MS = p.turn_ms(ESCAPE_DEG, TURN_SPEED, TURN_RAMP_MS)
+    rlog.event(ev.PROFILE_LOADED, WHEEL_DEADBAND, TURN_MS, PEEK_MS, ESCAPE_TURN_MS)
+
+
 # initialize
+profile = chassis.load(PROFILE_FILE) if PROFILE_FILE else None
+if profile is not None:
+    apply_profile(profile)
 hbridge = HBridge(STBY_PIN)
-left = Motor(LEFT_PWM, LEFT_IN1, LEFT_IN2)
-right = Motor(RIGHT_PWM, RIGHT_IN1, RIGHT_IN2)
+ramps = RampEngine(RAMP_STEP_MS)
+left = Motor(LEFT_PWM, LEFT_IN1, LEFT_IN2, ramps)
+right = Motor(RIGHT_PWM, RIGHT_IN1, RIGHT_IN2, ramps)
 sensor = HCSR04(TRIG_PIN, ECHO_PIN)
+if SCANNER:
+    if Servo is None:
+        raise ImportError("SCANNER needs servo.py from pic2w-servo-example next to main.py")
+    sensor.attach_scanner(Servo(SCAN_SERVO_PIN))
+odometry = None
+if ENCODERS:
+    odometry = Odometry(
+        Encoder(LEFT_ENC_A, LEFT_ENC_B, left.in1, left.in2, ENCODER_TICKS_PER_REV, WHEEL_DIAMETER_MM),
+        Encoder(RIGHT_ENC_A, RIGHT_ENC_B, right.in1, right.in2, ENCODER_TICKS_PER_REV, WHEEL_DIAMETER_MM,
+                invert=True),
+        TRACK_MM)
+speedloop = None
+if SPEED_CONTROL:
+    if odometry is None:
+        raise ValueError("SPEED_CONTROL needs ENCODERS for speed feedback")
+    # Duty writes from here on set each wheel's speed setpoint; the loop drives the PWM
+    stall = WHEEL_DEADBAND * MAX_DUTY // 100
+    left.pwm = SpeedPI(left.pwm, along(left, odometry.left), LEFT_SPEED_GAINS[0], LEFT_SPEED_GAINS[1],
+                       WHEEL_MM_S, stall, MAX_DUTY)
+    right.pwm = SpeedPI(right.pwm, along(right, odometry.right), RIGHT_SPEED_GAINS[0], RIGHT_SPEED_GAINS[1],
+                        WHEEL_MM_S, stall, MAX_DUTY)
+    speedloop = SpeedLoop((left.pwm, right.pwm), SPEED_PERIOD_MS)
+localmap = LocalMap(sensor, left, right, odometry)
+closing = ClosingRate(CLOSING_SAMPLES)
+brake = BrakeModel(DECEL_RAMP_MS, SENSOR_PERIOD_MS)
+if profile is not None and profile.drive:
+    # Start from the measured stop at cruise instead of the ramp's nominal value
+    _cruise = TTC_CRUISE_SPEED if TTC_BRAKING else CRUISE_SPEED
+    if profile.drive_mm_s(_cruise) > 0:
+        brake.brake_s = profile.stop_mm(_cruise) / profile.drive_mm_s(_cruise)
 led = Pin("LED", Pin.OUT)
+status = StatusLed(led, STATUS_STEP_MS)
+boot_init_ms = utime.ticks_ms()  # Since reset: imports and hardware set up
+telemetry = None  # Telemetry once streaming has started
+robot_state = IDLE  # Telemetry state; the control loops set it
+run_stats = None  # LoopStats of the running control loop, for telemetry
+control = None  # ControlServer while the asyncio runtime serves it
 
 
 def blink_led(times=3, delay=0.5):
     """Blink the onboard LED as a startup indicator."""
-    _log("blink_led", "starting with %d blinks" % times)
+    rlog.event(ev.BLINK_START, times)
     for _ in range(times):
         led.on()
         sleep(delay)
         led.off()
         sleep(delay)
-    _log("blink_led", "finished")
+    rlog.event(ev.BLINK_DONE)
+
+
+def start_indicator():
+    """Startup indicator: the BOOTING pattern with FAST_BOOT, else the blocking blink_led()."""
+    if FAST_BOOT:
+        status.show(BOOTING)
+    else:
+        blink_led(times=3, delay=0.5)
+
+
+def first_reading():
+    """
+    Wait for the sensor's first reading, at most BOOT_PING_TIMEOUT_MS.
+    Returns its ticks_ms, or None if nothing echoed in time.
+    """
+    start = utime.ticks_ms()
+    while utime.ticks_diff(utime.ticks_ms(), start) < BOOT_PING_TIMEOUT_MS:
+        if sensor.distance_cm() is not None:
+            return utime.ticks_ms()
+        utime.sleep_ms(BOOT_POLL_MS)
+    return None
+
+
+def boot_done(reading_ms):
+    """Log the boot timeline (ms since reset) just before the first motor command."""
+    rlog.event(ev.BOOT_TIMING, boot_init_ms, -1 if reading_ms is None else reading_ms, utime.ticks_ms())
+    if FAST_BOOT:
+        status.show(RUNNING)
+
+
+def set_state(state):
+    global robot_state
+    robot_state = state
+
+
+def start_telemetry(stats):
+    """
+    With TELEMETRY, start joining Wi-Fi (without waiting) and stream a frame every
+    TELEMETRY_PERIOD_MS, with stats as the loop timing. Called after the first motor
+    command, since powering up the radio takes a while.
+    """
+    global telemetry, run_stats
+    run_stats = stats
+    if not TELEMETRY:
+        return
+    if telemetry is None:
+        wifi_up(WIFI_SSID, WIFI_PASSWORD)
+        sock, addr = udp_socket(TELEMETRY_HOST, TELEMETRY_PORT)
+        telemetry = Telemetry(sock, addr, TELEMETRY_BATCH)
+    telemetry.start(TELEMETRY_PERIOD_MS, sample_telemetry)
+
+
+def stop_telemetry():
+    set_state(IDLE)
+    if telemetry is not None:
+        telemetry.stop()
+        _log("Telemetry", telemetry.summary())
+
+
+def _signed_duty(motor):
+    """Duty in 0.01% steps, negative in reverse."""
+    return (motor.in1.value() - motor.in2.value()) * motor.current_duty * 10000 // MAX_DUTY
+
+
+def sample_telemetry(t):
+    """Telemetry Timer callback: newest reading (no ping), duties, state and loop period."""
+    dist = sensor._fallback_distance()
+    t.add(NO_DISTANCE if dist is None else int(dist * 10), _signed_duty(left), _signed_duty(right),
+          robot_state, 0 if run_stats is None else run_stats.last_us)
+
+
+def control_status():
+    """State for the control endpoint: the telemetry frame's fields, in plain units."""
+    return {
+        "state": STATES[robot_state],
+        "dist_cm": sensor._fallback_distance(),
+        "left": _signed_duty(left) / 100,
+        "right": _signed_duty(right) / 100,
+        "loop_us": 0 if run_stats is None else run_stats.last_us,
+        "ticks_ms": utime.ticks_ms(),
+    }
 
 
 def forward(speed=None, ramp=True):
     s = CRUISE_SPEED if speed is None else speed
-    _log("forward", "speed=%s ramp=%s" % (s, ramp))
+    if BACKGROUND_RAMPS and ramps.target_of(left) == int(s) * MAX_DUTY // 100:
+        return  # Already ramping there; restarting would only stretch the ramp
+    rlog.event(ev.FORWARD, s, ramp)
     both_moving = left.current_duty > 0 or right.current_duty > 0
     if ramp and both_moving:
         left.in1.on()
         left.in2.off()
         right.in1.on()
         right.in2.off()
-        ramp_both(left, right, s, RAMP_TIME_MS)
+        ramp_both(left, right, s, RAMP_TIME_MS, RESUME_PROFILE, not BACKGROUND_RAMPS)
     else:
         left.forward(0)
         right.forward(0)
-        ramp_both(left, right, s, RESUME_RAMP_MS)
+        ramp_both(left, right, s, RESUME_RAMP_MS, RESUME_PROFILE, not BACKGROUND_RAMPS)
 
 
 def stop():
-    _log("stop", "")
+    rlog.event(ev.STOP)
     left.stop()
     right.stop()
 
 
-def reverse(duration_ms, speed=None):
+def _run_to(target, measure, rate, ramp_down_ms, nominal_ms):
+    """
+    Poll the encoders until measure() plus what rate() will add during a ramp_down_ms
+    ramp to a stop reaches target (magnitudes). False if the wheels have not got there
+    within twice nominal_ms plus a ramp: stalled against something.
+    """
+    start = utime.ticks_ms()
+    limit = ramp_down_ms + 2 * nominal_ms
+    while abs(measure()) + abs(rate()) * ramp_down_ms // 2000 < target:
+        if utime.ticks_diff(utime.ticks_ms(), start) > limit:
+            return False
+        utime.sleep_ms(ENCODER_POLL_MS)
+    return True
+
+
+def _turn_report(deg, reached):
+    """Log an encoder-timed turn once stopped; returns the angle actually turned."""
+    turned = int(abs(odometry.turned_deg()))
+    rlog.event(ev.TURN_ANGLE if reached else ev.TURN_STALLED, deg, turned)
+    return turned
+
+
+def reverse(duration_ms, speed=None, mm=None):
+    """Reverse for duration_ms, or with ENCODERS and mm given, until mm travelled."""
     if speed is None:
         speed = REVERSE_SPEED
-    _log("reverse", "duration_ms=%s speed=%s" % (duration_ms, speed))
+    rlog.event(ev.REVERSE, duration_ms, speed)
+    closed = odometry is not None and mm is not None
     utime.sleep_ms(PRE_RAMP_DELAY_MS)
     left.reverse(0)
     right.reverse(0)
-    ramp_both(left, right, speed, RAMP_TIME_MS)
-    utime.sleep_ms(duration_ms)
-    ramp_both(left, right, 0, DECEL_RAMP_MS)
+    if closed:
+        odometry.mark()
+    ramp_both(left, right, speed, RAMP_TIME_MS, REVERSE_PROFILE, not closed)
+    if closed:
+        _run_to(mm, odometry.travelled_mm, odometry.speed_mm_s, DECEL_RAMP_MS, duration_ms)
+    else:
+        utime.sleep_ms(duration_ms)
+    ramp_both(left, right, 0, DECEL_RAMP_MS, DECEL_PROFILE)
     stop()
 
 
-def reverse_until_safe(speed=None):
+@profiler.wrap("reverse_until_safe")
+def reverse_until_safe(speed=None, max_ms=None):
     """
-    Reverse until distance > THRESHOLD_CM or MAX_REVERSE_MS timeout.
-    Returns final distance (None if sensor timeout).
+    Reverse until distance > THRESHOLD_CM or MAX_REVERSE_MS timeout (with ENCODERS,
+    also after MAX_REVERSE_MM). max_ms, if given, caps the whole reverse including
+    its spin-up; one too short to spin up is skipped. Returns final distance (None
+    if sensor timeout or skipped).
     """
     if speed is None:
         speed = REVERSE_SPEED
-    _log("reverse_until_safe", "speed=%s" % speed)
+    limit = MAX_REVERSE_MS if max_ms is None else min(MAX_REVERSE_MS, max_ms - RAMP_TIME_MS)
+    if limit <= 0:
+        rlog.event(ev.REVERSE_SKIPPED, max_ms)
+        return None
+    rlog.event(ev.REVERSE_SAFE_START, speed)
 
     utime.sleep_ms(PRE_RAMP_DELAY_MS)
     left.reverse(0)
     right.reverse(0)
-    ramp_both(left, right, speed, RAMP_TIME_MS)
+    if odometry is not None:
+        odometry.mark()
+    ramp_both(left, right, speed, RAMP_TIME_MS, REVERSE_PROFILE)
 
     reverse_start = utime.ticks_ms()
     final_dist = None
 
     while True:
         elapsed = utime.ticks_diff(utime.ticks_ms(), reverse_start)
-        if elapsed >= MAX_REVERSE_MS:
-            _log("reverse_until_safe", "timeout after %dms" % elapsed)
+        if elapsed >= limit:
+            rlog.event(ev.REVERSE_SAFE_TIMEOUT, elapsed)
+            break
+        if odometry is not None and -odometry.travelled_mm() >= MAX_REVERSE_MM:
+            rlog.event(ev.REVERSE_DISTANCE, -odometry.travelled_mm())
             break
 
         dist = sensor.distance_cm()
         if dist is not None:
             final_dist = dist
-            _log("reverse_until_safe", "distance=%.2fcm" % dist)
+            if LOG_DEBUG:
+                rlog.event(ev.REVERSE_SAFE_DIST, dist)
             if dist > THRESHOLD_CM:
-                _log("reverse_until_safe", "safe distance reached: %.2fcm > %dcm" % (dist, THRESHOLD_CM))
+                rlog.event(ev.REVERSE_SAFE_REACHED, dist, THRESHOLD_CM)
                 break
 
         utime.sleep_ms(LOOP_DELAY_MS)
 
-    ramp_both(left, right, 0, DECEL_RAMP_MS)
+    ramp_both(left, right, 0, DECEL_RAMP_MS, DECEL_PROFILE)
     stop()
 
     return final_dist
@@ -349,185 +862,875 @@ def reverse_until_safe(speed=None):
 
 def ramp_both_stop(ramp_time_ms=DECEL_RAMP_MS):
     """Synchronized ramp-down of both motors to stop."""
-    ramp_both(left, right, 0, ramp_time_ms)
+    ramp_both(left, right, 0, ramp_time_ms, DECEL_PROFILE)
     stop()
 
 
-def turn_left(duration_ms=None, speed=None):
-    """Left reverse, right forward -> rotate left."""
+def _spin(dur, spd, deg):
+    """Spin in the direction already set on the motor pins; see turn_left()."""
+    closed = odometry is not None and deg is not None
+    if closed:
+        odometry.mark()
+    ramp_both(left, right, spd, TURN_RAMP_MS, TURN_PROFILE, not closed)
+    if closed:
+        reached = _run_to(deg, odometry.turned_deg, odometry.spin_deg_s, TURN_RAMP_MS, dur)
+    else:
+        utime.sleep_ms(dur)
+    ramp_both(left, right, 0, TURN_RAMP_MS, TURN_PROFILE)
+    stop()
+    if closed:
+        return _turn_report(deg, reached)
+    return None
+
+
+def turn_left(duration_ms=None, speed=None, deg=None):
+    """
+    Left reverse, right forward -> rotate left. With ENCODERS and deg given, stop at
+    deg instead of after duration_ms; returns the degrees turned (None open-loop).
+    """
     dur = TURN_MS if duration_ms is None else duration_ms
     spd = TURN_SPEED if speed is None else speed
-    _log("turn_left", "duration_ms=%s speed=%s" % (dur, spd))
+    rlog.event(ev.TURN_LEFT, dur, spd)
     utime.sleep_ms(PRE_RAMP_DELAY_MS)
     left.reverse(0)
     right.forward(0)
-    ramp_both(left, right, spd, TURN_RAMP_MS)
-    utime.sleep_ms(dur)
-    ramp_both(left, right, 0, TURN_RAMP_MS)
-    stop()
+    return _spin(dur, spd, deg)
 
 
-def turn_right(duration_ms=None, speed=None):
-    """Left forward, right reverse -> rotate right."""
+def turn_right(duration_ms=None, speed=None, deg=None):
+    """Left forward, right reverse -> rotate right. See turn_left()."""
     dur = TURN_MS if duration_ms is None else duration_ms
     spd = TURN_SPEED if speed is None else speed
-    _log("turn_right", "duration_ms=%s speed=%s" % (dur, spd))
+    rlog.event(ev.TURN_RIGHT, dur, spd)
     utime.sleep_ms(PRE_RAMP_DELAY_MS)
     left.forward(0)
     right.reverse(0)
-    ramp_both(left, right, spd, TURN_RAMP_MS)
-    utime.sleep_ms(dur)
-    ramp_both(left, right, 0, TURN_RAMP_MS)
-    stop()
+    return _spin(dur, spd, deg)
 
 
+@profiler.wrap("turn_with_validation")
 def turn_with_validation(side='left', max_retries=2):
     """Turn until obstacle no longer directly ahead, with retry logic."""
     retry_count = 0
     
     while retry_count < max_retries:
         if side == 'left':
-            turn_left(TURN_MS, TURN_SPEED)
+            turn_left(TURN_MS, TURN_SPEED, TURN_DEG)
         else:
-            turn_right(TURN_MS, TURN_SPEED)
+            turn_right(TURN_MS, TURN_SPEED, TURN_DEG)
         
         utime.sleep_ms(100)  # Brief pause for stable reading
         dist = sensor.distance_cm()
         
         if dist is not None and dist >= THRESHOLD_CM:
-            _log("turn_with_validation", "%s turn successful: dist=%.2fcm" % (side, dist))
+            rlog.event(ev.TURN_OK, side, dist)
             return True
         
         retry_count += 1
-        _log("turn_with_validation", "turn incomplete, retrying: attempt %d/%d" % (retry_count, max_retries))
+        rlog.event(ev.TURN_RETRY, retry_count, max_retries)
     
-    _log("turn_with_validation", "%s turn exhausted retries" % side)
+    rlog.event(ev.TURN_EXHAUSTED, side)
     return False
 
 
+@profiler.wrap("peek")
 def peek(side):
     """Micro-rotate to 'side', measure distance, then recenter."""
-    _log("peek", "starting side=%s" % side)
+    rlog.event(ev.PEEK_START, side)
     if side == 'left':
-        turn_left(PEEK_MS, PEEK_SPEED)
+        turned = turn_left(PEEK_MS, PEEK_SPEED, PEEK_DEG)
     else:
-        turn_right(PEEK_MS, PEEK_SPEED)
+        turned = turn_right(PEEK_MS, PEEK_SPEED, PEEK_DEG)
     
     utime.sleep_ms(PEEK_SETTLE_MS)
     dist = read_distance_avg(PEEK_SAMPLES, LOOP_DELAY_MS)
     
     # Recenter with mirrored turn
     if side == 'left':
-        turn_right(RECENTER_MS, PEEK_SPEED)
+        turn_right(RECENTER_MS, PEEK_SPEED, turned)
     else:
-        turn_left(RECENTER_MS, PEEK_SPEED)
+        turn_left(RECENTER_MS, PEEK_SPEED, turned)
     
-    _log("peek", "side=%s dist=%.2fcm" % (side, dist if dist is not None else -1))
+    rlog.event(ev.PEEK_RESULT, side, dist if dist is not None else -1)
     return dist
 
 
-def decide_turn_side(turn_alternate):
-    """Peek both sides, choose the clearer one."""
-    left_cm = peek('left')
-    right_cm = peek('right')
-    
+def _choose_side(left_cm, right_cm, turn_alternate):
+    """Pick 'left', 'right' or 'blocked' from the two peeked distances."""
     left_blocked = left_cm is None or left_cm < THRESHOLD_CM
     right_blocked = right_cm is None or right_cm < THRESHOLD_CM
     
     if left_blocked and right_blocked:
-        _log("decide_turn_side", "both blocked: left=%.2f right=%.2f" % (left_cm or -1, right_cm or -1))
+        rlog.event(ev.SIDE_BOTH_BLOCKED, left_cm or -1, right_cm or -1)
         return 'blocked'
     
     if left_blocked:
-        _log("decide_turn_side", "left blocked, choosing right: left=%.2f right=%.2f" % (left_cm or -1, right_cm or -1))
+        rlog.event(ev.SIDE_LEFT_BLOCKED, left_cm or -1, right_cm or -1)
         return 'right'
     if right_blocked:
-        _log("decide_turn_side", "right blocked, choosing left: left=%.2f right=%.2f" % (left_cm or -1, right_cm or -1))
+        rlog.event(ev.SIDE_RIGHT_BLOCKED, left_cm or -1, right_cm or -1)
         return 'left'
     
     # Both clear, choose larger distance
     diff = abs(left_cm - right_cm)
     if diff > PEEK_TIE_EPS:
         chosen = 'left' if left_cm > right_cm else 'right'
-        _log("decide_turn_side", "clearer side: left=%.2f right=%.2f chosen=%s" % (left_cm, right_cm, chosen))
+        rlog.event(ev.SIDE_CLEARER_LEFT if chosen == 'left' else ev.SIDE_CLEARER_RIGHT, left_cm, right_cm)
         return chosen
     else:
         # Tie, use turn_alternate
         chosen = 'left' if not turn_alternate else 'right'
-        _log("decide_turn_side", "tie (diff=%.2f < %d), using alternate: left=%.2f right=%.2f chosen=%s" % (diff, PEEK_TIE_EPS, left_cm, right_cm, chosen))
+        rlog.event(ev.SIDE_TIE_LEFT if chosen == 'left' else ev.SIDE_TIE_RIGHT, diff, PEEK_TIE_EPS, left_cm, right_cm)
         return chosen
 
 
+@profiler.wrap("decide_turn_side")
+def decide_turn_side(turn_alternate):
+    """Choose the clearer side from the side sensors or a scan if fitted, else the local map, peeking where it has no answer."""
+    if sensor.array is not None:
+        left_cm, right_cm = sensor.side_distances()
+        rlog.event(ev.SIDE_SENSED, left_cm or -1, right_cm or -1)
+    elif sensor.scanner is not None:
+        scanner = sensor.scan()
+        left_cm, right_cm = scanner.side_distances()
+        rlog.event(ev.SCAN_RESULT, left_cm, right_cm)
+        if localmap.running:
+            localmap.observe_scan(scanner)
+    else:
+        left_cm, right_cm = localmap.recall() if localmap.running else (None, None)
+        if left_cm is None:
+            left_cm = peek('left')
+        if right_cm is None:
+            right_cm = peek('right')
+    return _choose_side(left_cm, right_cm, turn_alternate)
+
+
+def adaptive_speed(dist):
+    """Speed for a distance inside the adaptive band: CRUISE_SPEED at its edge, easing down to 20% at THRESHOLD_CM."""
+    adaptive_threshold = THRESHOLD_CM * ADAPTIVE_THRESHOLD_MULT
+    distance_range = adaptive_threshold - THRESHOLD_CM
+    distance_from_threshold = dist - THRESHOLD_CM
+    t = distance_from_threshold / distance_range
+    speed_factor = _smoothstep(t)  # Gentler curve for gradual slowdown
+    speed = int(CRUISE_SPEED * speed_factor)
+    return max(20, min(CRUISE_SPEED, speed))
+
+
+def threshold_speed(dist):
+    """Fixed-distance rule: None (brake) inside THRESHOLD_CM, adaptive_speed() in the band, else CRUISE_SPEED."""
+    if dist < THRESHOLD_CM:
+        return None
+    if dist < THRESHOLD_CM * ADAPTIVE_THRESHOLD_MULT:
+        return adaptive_speed(dist)
+    return CRUISE_SPEED
+
+
+def ttc_speed(dist):
+    """
+    Time-to-collision rule: None (brake) once the gap down to STOP_GAP_CM would close
+    within the learned stop time plus TTC_MARGIN_S; else TTC_CRUISE_SPEED, easing down
+    to CRUISE_SPEED below TTC_SLOW_S. Inside STOP_GAP_CM it always brakes, and while
+    there is no time to collision (closing rate not yet known, or not closing) the
+    distance decides through threshold_speed().
+    """
+    closing.add(dist, sensor.last_valid_time_ms)
+    rate = closing.rate()
+    gap = dist - STOP_GAP_CM
+    ttc = brake.ttc(gap, rate)
+    floor = brake.brake_s + TTC_MARGIN_S
+    if gap <= 0 or (ttc is not None and ttc < floor):
+        rlog.event(ev.TTC_BRAKE, dist, rate or 0, -1 if ttc is None else int(ttc * 1000))
+        brake.begin(dist, rate)
+        return None
+    if ttc is None:
+        return threshold_speed(dist)
+    if ttc >= TTC_SLOW_S:
+        return TTC_CRUISE_SPEED
+    return CRUISE_SPEED + int((TTC_CRUISE_SPEED - CRUISE_SPEED) * (ttc - floor) / (TTC_SLOW_S - floor))
+
+
+def target_speed(dist):
+    """Forward speed for a reading, or None to brake and avoid."""
+    return ttc_speed(dist) if TTC_BRAKING else threshold_speed(dist)
+
+
+def backtrack_ms(drove_ms):
+    """
+    Cap for the reverse after a stop. With TTC_BRAKING the robot stops close and the
+    reverse has no sensor behind it, so it only backs over ground it just drove:
+    drove_ms of forward driving since it last turned. Else None (no cap).
+    """
+    return drove_ms if TTC_BRAKING else None
+
+
+def learn_stop():
+    """After a TTC stop has settled: teach the brake model how far it actually went."""
+    sensor.distance_cm()  # Blocking mode: take a fresh reading
+    measured = brake.end(sensor.last_raw_cm)
+    if measured is not None:
+        rlog.event(ev.TTC_LEARNED, int(measured * 1000), int(brake.brake_s * 1000))
+    closing.reset()
+
+
 def simplified_run(total_ms=3000):
-    _log("simplified_run", "start total_ms=%s" % total_ms)
-    blink_led(times=3, delay=0.5)
+    rlog.event(ev.RUN_START, total_ms)
+    start_indicator()
+    if SIDE_SENSORS:
+        sensor.start_array(ARRAY_SLOT_MS)
+    elif DUAL_CORE:
+        sensor.start_core1(SENSOR_PERIOD_MS)
+    elif IRQ_RANGING:
+        sensor.start_background(SENSOR_PERIOD_MS)
+    if LOCAL_MAP:
+        localmap.start()
+    if speedloop is not None:
+        speedloop.start()
+    loop_stats = LoopStats("core0")
+    cruise = TTC_CRUISE_SPEED if TTC_BRAKING else CRUISE_SPEED
+    closing.reset()
     start = utime.ticks_ms()
     turn_alternate = False  # alternate turn_left / turn_right per obstacle
+    boot_done(first_reading())
+    set_state(CRUISE)
     forward(CRUISE_SPEED, ramp=True)
+    resumed = utime.ticks_ms()
+    start_telemetry(loop_stats)
     try:
         while utime.ticks_diff(utime.ticks_ms(), start) < total_ms:
+            loop_stats.tick()
             dist = sensor.distance_cm()
             if dist is None:
                 utime.sleep_ms(LOOP_DELAY_MS)
                 continue
-            _log("simplified_run", "measured=%.2fcm" % dist)
-
-            adaptive_threshold = THRESHOLD_CM * ADAPTIVE_THRESHOLD_MULT
-            if dist < adaptive_threshold and dist >= THRESHOLD_CM:
-                distance_range = adaptive_threshold - THRESHOLD_CM
-                distance_from_threshold = dist - THRESHOLD_CM
-                t = distance_from_threshold / distance_range
-                speed_factor = _smoothstep(t)  # Gentler curve for gradual slowdown
-                adaptive_speed = int(CRUISE_SPEED * speed_factor)
-                adaptive_speed = max(20, min(CRUISE_SPEED, adaptive_speed))
-                _log("simplified_run", "adaptive slowdown: dist=%.2fcm speed=%d%%" % (dist, adaptive_speed))
-                forward(adaptive_speed, ramp=True)
-            elif dist < THRESHOLD_CM:
-                _log("simplified_run", "obstacle detected %.2fcm — stop, reverse, peek-and-choose, resume" % dist)
+            if LOG_DEBUG:
+                rlog.event(ev.RUN_MEASURED, dist)
+
+            speed = target_speed(dist)
+            if speed is not None and speed < cruise:
+                rlog.event(ev.RUN_ADAPTIVE, dist, speed)
+                set_state(SLOW)
+                forward(speed, ramp=True)
+            elif speed is None:
+                rlog.event(ev.RUN_OBSTACLE, dist)
+                set_state(AVOID)
+                drove_ms = utime.ticks_diff(utime.ticks_ms(), resumed)
                 ramp_both_stop(DECEL_RAMP_MS)
                 utime.sleep_ms(TURN_SETTLE_MS)
-                reverse_until_safe(REVERSE_SPEED)
-                
+                learn_stop()
+                reverse_until_safe(REVERSE_SPEED, backtrack_ms(drove_ms))
+
                 choice = decide_turn_side(turn_alternate)
                 if choice in ['left', 'right']:
-                    success = turn_with_validation(side=choice, max_retries=2)
+                    success = turn_with_validation(choice, 2)
                     if not success:
-                        _log("simplified_run", "chosen side failed, trying opposite")
+                        rlog.event(ev.RUN_SIDE_FAILED)
                         opposite = 'left' if choice == 'right' else 'right'
-                        turn_with_validation(side=opposite, max_retries=1)
+                        turn_with_validation(opposite, 1)
                 elif choice == 'blocked':
-                    _log("simplified_run", "both sides blocked, performing 180° escape")
+                    rlog.event(ev.RUN_ESCAPE)
                     escape_side = 'left' if not turn_alternate else 'right'
                     if escape_side == 'left':
-                        turn_left(ESCAPE_TURN_MS, TURN_SPEED)
+                        turn_left(ESCAPE_TURN_MS, TURN_SPEED, ESCAPE_DEG)
                     else:
-                        turn_right(ESCAPE_TURN_MS, TURN_SPEED)
+                        turn_right(ESCAPE_TURN_MS, TURN_SPEED, ESCAPE_DEG)
                     # After escape, check once
                     utime.sleep_ms(TURN_VALIDATION_PAUSE_MS)
                     post_escape_dist = sensor.distance_cm()
                     if post_escape_dist is None or post_escape_dist < THRESHOLD_CM:
-                        _log("simplified_run", "escape failed, reversing again")
-                        reverse_until_safe(REVERSE_SPEED)
+                        rlog.event(ev.RUN_ESCAPE_FAILED)
+                        reverse_until_safe(REVERSE_SPEED, backtrack_ms(0))  # Facing a new way
                         # Retry with new peeks
                         choice = decide_turn_side(turn_alternate)
                         if choice in ['left', 'right']:
-                            turn_with_validation(side=choice, max_retries=2)
+                            turn_with_validation(choice, 2)
                 
                 turn_alternate = not turn_alternate
+                set_state(CRUISE)
                 forward(CRUISE_SPEED, ramp=True)
-            elif dist >= adaptive_threshold:
-                cruise_duty = int((CRUISE_SPEED / 100) * MAX_DUTY * CRUISE_HYSTERESIS_FACTOR)
+                resumed = utime.ticks_ms()
+            else:
+                set_state(CRUISE)
+                cruise_duty = int((cruise / 100) * MAX_DUTY * CRUISE_HYSTERESIS_FACTOR)
                 if left.current_duty < cruise_duty or right.current_duty < cruise_duty:
-                    forward(CRUISE_SPEED, ramp=True)
+                    forward(cruise, ramp=True)
+            rlog.drain_if(LOG_DRAIN_AT)
             utime.sleep_ms(LOOP_DELAY_MS)
     except KeyboardInterrupt:
-        _log("simplified_run", "keyboard interrupt")
+        rlog.event(ev.RUN_INTERRUPT)
     finally:
         stop()
+        stop_telemetry()
+        localmap.stop()
+        if speedloop is not None:
+            speedloop.stop()
+            _log("SpeedLoop", speedloop.summary())
+        sensor.stop_background()
+        status.off()
+        hbridge.disable()
+        _log("simplified_run", loop_stats.summary())
+        rlog.event(ev.RUN_FINISHED)
+        rlog.drain()
+        profiler.report()
+
+
+# --- chassis calibration ---
+# calibrate_run() measures the chassis against a wall with blocking pings and saves
+# the result to PROFILE_FILE, which apply_profile() picks up at the next boot.
+
+_cal_until = 0  # ticks_ms deadline of the calibration in progress
+
+
+def _cal_over():
+    return utime.ticks_diff(utime.ticks_ms(), _cal_until) >= 0
+
+
+def _ping_cm():
+    """One blocking ping, unfiltered: cm, or None without an echo."""
+    sensor.last_raw_cm = None
+    sensor.measure()
+    return sensor.last_raw_cm
+
+
+def _ping_avg(count=3):
+    """Mean of count unfiltered pings, or None if none came back."""
+    total = 0
+    n = 0
+    for _ in range(count):
+        dist = _ping_cm()
+        if dist is not None:
+            total += dist
+            n += 1
+        utime.sleep_ms(CAL_SAMPLE_MS)
+    return total / n if n else None
+
+
+def _find_deadband(motor, encoder):
+    """
+    Step motor's duty up from CAL_DUTY_START until the wheel turns: encoder ticks, or
+    without an encoder, the wall reading shifting as the robot pivots. Returns the duty %.
+    """
+    base = _ping_avg()
+    ticks = 0 if encoder is None else encoder.ticks
+    duty = CAL_DUTY_START
+    while duty < 100 and not _cal_over():
+        motor.forward(duty)
+        utime.sleep_ms(CAL_DWELL_MS)
+        if encoder is not None:
+            moved = abs(encoder.ticks - ticks) >= 2
+        else:
+            dist = _ping_avg()
+            moved = dist is not None and abs(dist - base) >= CAL_MOVE_CM
+        if moved:
+            break
+        duty += 1
+    motor.stop()
+    utime.sleep_ms(TURN_SETTLE_MS)
+    rlog.event(ev.CAL_DEADBAND, 'left' if motor is left else 'right', duty)
+    return duty
+
+
+def _stopping_run(speed):
+    """
+    Drive at the wall at speed and brake at CAL_BRAKE_CM as a TTC stop would.
+    Returns (ground speed mm/s, stopping distance mm), or None without readings.
+    """
+    closing.reset()
+    forward(speed, ramp=True)
+    trigger = None
+    while not _cal_over():
+        dist = _ping_cm()
+        if dist is not None:
+            closing.add(dist, utime.ticks_ms())
+            if dist <= CAL_BRAKE_CM:
+                trigger = dist
+                break
+        utime.sleep_ms(CAL_SAMPLE_MS)
+    rate = closing.rate()
+    ramp_both_stop(DECEL_RAMP_MS)
+    utime.sleep_ms(TURN_SETTLE_MS)
+    final = _ping_avg()
+    if trigger is None or rate is None or final is None:
+        return None
+    rlog.event(ev.CAL_DRIVE, speed, int(rate * 10), int((trigger - final) * 10))
+    return rate * 10, (trigger - final) * 10
+
+
+def _back_to(dist_cm):
+    """Reverse until the wall is dist_cm away again."""
+    left.reverse(0)
+    right.reverse(0)
+    ramp_both(left, right, REVERSE_SPEED, RAMP_TIME_MS, REVERSE_PROFILE)
+    while not _cal_over():
+        dist = _ping_cm()
+        if dist is not None and dist >= dist_cm:
+            break
+        utime.sleep_ms(CAL_SAMPLE_MS)
+    ramp_both_stop(DECEL_RAMP_MS)
+    utime.sleep_ms(TURN_SETTLE_MS)
+
+
+def _time_spin(speed):
+    """Spin left at speed for CAL_SPIN_MS; ms per revolution from the wall coming round, or None."""
+    left.reverse(0)
+    right.forward(0)
+    ramp_both(left, right, speed, TURN_RAMP_MS, TURN_PROFILE)
+    times = []
+    dists = []
+    start = utime.ticks_ms()
+    while not _cal_over():
+        t = utime.ticks_diff(utime.ticks_ms(), start)
+        if t >= CAL_SPIN_MS:
+            break
+        times.append(t)
+        dists.append(_ping_cm())
+        utime.sleep_ms(CAL_SAMPLE_MS)
+    ramp_both_stop(TURN_RAMP_MS)
+    utime.sleep_ms(TURN_SETTLE_MS)
+    period = chassis.revolution_ms(times, dists)
+    if period is not None:
+        rlog.event(ev.CAL_TURN, speed, int(period))
+    return period
+
+
+def calibrate_run(total_ms=180000):
+    """
+    Measure this chassis and save it to PROFILE_FILE: each wheel's dead-band, ground
+    speed and stopping distance at CAL_DRIVE_SPEEDS, spin rate at CAL_TURN_SPEEDS.
+    Start facing a flat wall about 2m away with room to spin near it. Runs open loop
+    (the speed loop is not started) and gives up after total_ms. Returns the Profile,
+    or None if there was no wall to measure against or time ran out.
+    """
+    global _cal_until
+    rlog.event(ev.RUN_START, total_ms)
+    blink_led(times=3, delay=0.5)
+    _cal_until = utime.ticks_add(utime.ticks_ms(), total_ms)
+    profile = chassis.Profile()
+    try:
+        origin = _ping_avg()
+        if origin is None or origin < 2 * CAL_BRAKE_CM:
+            _log("calibrate_run", "no wall %d-300cm ahead" % (2 * CAL_BRAKE_CM))
+            return None
+        profile.deadband[0] = _find_deadband(left, None if odometry is None else odometry.left)
+        profile.deadband[1] = _find_deadband(right, None if odometry is None else odometry.right)
+        for i, speed in enumerate(CAL_DRIVE_SPEEDS):
+            if i:
+                _back_to(origin)
+            run = _stopping_run(speed)
+            if run is not None:
+                profile.add_drive(speed, run[0], run[1])
+        for speed in CAL_TURN_SPEEDS:
+            period = _time_spin(speed)
+            if period:
+                profile.add_turn(speed, 360000 / period)
+        if _cal_over():
+            _log("calibrate_run", "out of time, profile not saved")
+            return None
+        if PROFILE_FILE:
+            profile.save(PROFILE_FILE)
+        _log("calibrate_run", "%s: %s" % (PROFILE_FILE, profile))
+        return profile
+    except KeyboardInterrupt:
+        rlog.event(ev.RUN_INTERRUPT)
+        return None
+    finally:
+        stop()
+        status.off()
+        hbridge.disable()
+        rlog.event(ev.RUN_FINISHED)
+        rlog.drain()
+
+
+# --- asyncio runtime ---
+# Separate tasks for ranging, motor ramping, decisions and logging. Maneuvers await
+# the motor task instead of sleeping, so sensing continues through every ramp and turn.
+
+
+async def _sleep_ms(ms):
+    await asyncio.sleep(ms / 1000)
+
+
+class Drive:
+    """State shared between the runtime tasks."""
+
+    def __init__(self):
+        self.running = True
+        self.dist = None  # Newest reading from ranging_task
+        self.dist_seq = 0
+        self.ramping = False
+        self.profile = easing.SMOOTHSTEP
+        self.ramp_ms = 1
+        self.ramp_t0 = 0
+        self.left_start = 0
+        self.right_start = 0
+        self.target_duty = 0
+
+    def blocked(self):
+        return self.dist is not None and self.dist < THRESHOLD_CM
+
+    def start_ramp(self, speed, ramp_ms, profile=easing.SMOOTHSTEP):
+        """Retarget the motor task from the current duty; takes effect on its next step."""
+        speed = max(0, min(100, speed))
+        self.left_start = left.current_duty
+        self.right_start = right.current_duty
+        self.target_duty = int(speed) * MAX_DUTY // 100
+        self.ramp_ms = max(1, ramp_ms)
+        self.ramp_t0 = utime.ticks_ms()
+        self.profile = profile
+        self.ramping = True
+
+    async def ramp_to(self, speed, ramp_ms, profile=easing.SMOOTHSTEP, abort=None):
+        """Ramp both motors and wait; returns False as soon as abort() is true."""
+        self.start_ramp(speed, ramp_ms, profile)
+        while self.ramping:
+            if abort is not None and abort():
+                return False
+            await _sleep_ms(RAMP_STEP_MS)
+        return True
+
+    async def next_distance(self):
+        """Wait for the next ranging_task update and return it."""
+        seq = self.dist_seq
+        while self.dist_seq == seq:
+            await _sleep_ms(RAMP_STEP_MS)
+        return self.dist
+
+
+async def ranging_task(drive):
+    while drive.running:
+        drive.dist = sensor.distance_cm()
+        drive.dist_seq += 1
+        await _sleep_ms(SENSOR_PERIOD_MS)
+
+
+async def motor_task(drive):
+    while drive.running:
+        if drive.ramping:
+            elapsed = utime.ticks_diff(utime.ticks_ms(), drive.ramp_t0)
+            if elapsed >= drive.ramp_ms:
+                drive.ramping = False
+            eased = easing.at(drive.profile, elapsed, drive.ramp_ms)
+            left_duty = drive.left_start + ((drive.target_duty - drive.left_start) * eased >> easing.SHIFT)
+            right_duty = drive.right_start + ((drive.target_duty - drive.right_start) * eased >> easing.SHIFT)
+            left.pwm.duty_u16(left_duty)
+            right.pwm.duty_u16(right_duty)
+            left.current_duty = left_duty
+            right.current_duty = right_duty
+        await _sleep_ms(RAMP_STEP_MS)
+
+
+async def log_task(drive):
+    while drive.running:
+        rlog.drain()
+        await _sleep_ms(LOG_PERIOD_MS)
+    rlog.drain()
+
+
+async def forward_async(drive, speed):
+    """Ramp forward to speed; returns False if an obstacle cut the ramp short."""
+    if left.current_duty > 0 or right.current_duty > 0:
+        left.in1.on()
+        left.in2.off()
+        right.in1.on()
+        right.in2.off()
+        ramp_ms = RAMP_TIME_MS
+    else:
+        left.forward(0)
+        right.forward(0)
+        ramp_ms = RESUME_RAMP_MS
+    return await drive.ramp_to(speed, ramp_ms, RESUME_PROFILE, drive.blocked)
+
+
+async def stop_async(drive, ramp_ms=DECEL_RAMP_MS, profile=None):
+    await drive.ramp_to(0, ramp_ms, DECEL_PROFILE if profile is None else profile)
+    stop()
+
+
+async def _run_to_async(target, measure, rate, ramp_down_ms, nominal_ms):
+    """_run_to for the asyncio runtime."""
+    start = utime.ticks_ms()
+    limit = ramp_down_ms + 2 * nominal_ms
+    while abs(measure()) + abs(rate()) * ramp_down_ms // 2000 < target:
+        if utime.ticks_diff(utime.ticks_ms(), start) > limit:
+            return False
+        await _sleep_ms(ENCODER_POLL_MS)
+    return True
+
+
+@profiler.wrap_async("turn_async")
+async def turn_async(drive, side, duration_ms=TURN_MS, speed=TURN_SPEED, deg=None):
+    """Turn for duration_ms, or with ENCODERS to deg; returns the degrees turned (None open-loop)."""
+    rlog.event(ev.TURN_ASYNC, side, duration_ms, speed)
+    await _sleep_ms(PRE_RAMP_DELAY_MS)
+    if side == 'left':
+        left.reverse(0)
+        right.forward(0)
+    else:
+        left.forward(0)
+        right.reverse(0)
+    if odometry is None or deg is None:
+        await drive.ramp_to(speed, TURN_RAMP_MS, TURN_PROFILE)
+        await _sleep_ms(duration_ms)
+        await stop_async(drive, TURN_RAMP_MS, TURN_PROFILE)
+        return None
+    odometry.mark()
+    drive.start_ramp(speed, TURN_RAMP_MS, TURN_PROFILE)
+    reached = await _run_to_async(deg, odometry.turned_deg, odometry.spin_deg_s, TURN_RAMP_MS, duration_ms)
+    await stop_async(drive, TURN_RAMP_MS, TURN_PROFILE)
+    return _turn_report(deg, reached)
+
+
+@profiler.wrap_async("reverse_until_safe_async")
+async def reverse_until_safe_async(drive, speed=REVERSE_SPEED, max_ms=None):
+    limit = MAX_REVERSE_MS if max_ms is None else min(MAX_REVERSE_MS, max_ms - RAMP_TIME_MS)
+    if limit <= 0:
+        rlog.event(ev.REVERSE_SKIPPED, max_ms)
+        return None
+    await _sleep_ms(PRE_RAMP_DELAY_MS)
+    left.reverse(0)
+    right.reverse(0)
+    if odometry is not None:
+        odometry.mark()
+    await drive.ramp_to(speed, RAMP_TIME_MS, REVERSE_PROFILE)
+    reverse_start = utime.ticks_ms()
+    final_dist = None
+    while utime.ticks_diff(utime.ticks_ms(), reverse_start) < limit:
+        if odometry is not None and -odometry.travelled_mm() >= MAX_REVERSE_MM:
+            rlog.event(ev.REVERSE_DISTANCE, -odometry.travelled_mm())
+            break
+        dist = await drive.next_distance()
+        if dist is not None:
+            final_dist = dist
+            if dist > THRESHOLD_CM:
+                rlog.event(ev.REVERSE_ASYNC_REACHED, dist)
+                break
+    await stop_async(drive, DECEL_RAMP_MS)
+    return final_dist
+
+
+@profiler.wrap_async("peek_async")
+async def peek_async(drive, side):
+    turned = await turn_async(drive, side, PEEK_MS, PEEK_SPEED, PEEK_DEG)
+    await _sleep_ms(PEEK_SETTLE_MS)
+    total = 0
+    count = 0
+    for _ in range(PEEK_SAMPLES):
+        dist = await drive.next_distance()
+        if dist is not None:
+            total += dist
+            count += 1
+    await turn_async(drive, 'right' if side == 'left' else 'left', RECENTER_MS, PEEK_SPEED, turned)
+    return total / count if count else None
+
+
+async def sides_async(drive):
+    """(left_cm, right_cm): side sensors or a scan if fitted, else the local map, peeking where it has no answer."""
+    if sensor.array is not None:
+        left_cm, right_cm = sensor.side_distances()
+        rlog.event(ev.SIDE_SENSED, left_cm or -1, right_cm or -1)
+        return left_cm, right_cm
+    if sensor.scanner is not None:
+        sensor.begin_scan()
+        while not sensor.scan_finished():
+            await _sleep_ms(RAMP_STEP_MS)
+        left_cm, right_cm = sensor.scanner.side_distances()
+        rlog.event(ev.SCAN_RESULT, left_cm, right_cm)
+        if localmap.running:
+            localmap.observe_scan(sensor.scanner)
+        return left_cm, right_cm
+    left_cm, right_cm = localmap.recall() if localmap.running else (None, None)
+    if left_cm is None:
+        left_cm = await peek_async(drive, 'left')
+    if right_cm is None:
+        right_cm = await peek_async(drive, 'right')
+    return left_cm, right_cm
+
+
+@profiler.wrap_async("turn_with_validation_async")
+async def turn_with_validation_async(drive, side, max_retries=TURN_MAX_RETRIES):
+    for attempt in range(max_retries):
+        await turn_async(drive, side, TURN_MS, TURN_SPEED, TURN_DEG)
+        await _sleep_ms(TURN_VALIDATION_PAUSE_MS)
+        dist = await drive.next_distance()
+        if dist is not None and dist >= THRESHOLD_CM:
+            rlog.event(ev.TURN_ASYNC_OK, side, dist)
+            return True
+        rlog.event(ev.TURN_ASYNC_RETRY, attempt + 1, max_retries)
+    return False
+
+
+@profiler.wrap_async("avoid_async")
+async def avoid_async(drive, turn_alternate, drove_ms):
+    """Stop, reverse until safe, peek both sides and turn toward the clearer one."""
+    await stop_async(drive, DECEL_RAMP_MS)
+    await _sleep_ms(TURN_SETTLE_MS)
+    learn_stop()
+    await reverse_until_safe_async(drive, REVERSE_SPEED, backtrack_ms(drove_ms))
+    choice = _choose_side(*(await sides_async(drive)), turn_alternate)
+    if choice in ('left', 'right'):
+        if not await turn_with_validation_async(drive, choice, TURN_MAX_RETRIES):
+            rlog.event(ev.AVOID_SIDE_FAILED)
+            await turn_with_validation_async(drive, 'left' if choice == 'right' else 'right', 1)
+        return
+    rlog.event(ev.AVOID_ESCAPE)
+    await turn_async(drive, 'left' if not turn_alternate else 'right', ESCAPE_TURN_MS, TURN_SPEED, ESCAPE_DEG)
+    await _sleep_ms(TURN_VALIDATION_PAUSE_MS)
+    dist = await drive.next_distance()
+    if dist is None or dist < THRESHOLD_CM:
+        rlog.event(ev.AVOID_ESCAPE_FAILED)
+        await reverse_until_safe_async(drive, REVERSE_SPEED, backtrack_ms(0))  # Facing a new way
+        choice = _choose_side(*(await sides_async(drive)), turn_alternate)
+        if choice in ('left', 'right'):
+            await turn_with_validation_async(drive, choice, TURN_MAX_RETRIES)
+
+
+async def decision_task(drive, total_ms):
+    start = utime.ticks_ms()
+    turn_alternate = False
+    stats = LoopStats("decisions")
+    closing.reset()
+    boot_done(await first_reading_async(drive))
+    set_state(CRUISE)
+    await forward_async(drive, CRUISE_SPEED)
+    resumed = utime.ticks_ms()
+    start_telemetry(stats)
+    await start_control()
+    cruise = TTC_CRUISE_SPEED if TTC_BRAKING else CRUISE_SPEED
+    cruise_duty = int((cruise / 100) * MAX_DUTY * CRUISE_HYSTERESIS_FACTOR)
+    while utime.ticks_diff(utime.ticks_ms(), start) < total_ms:
+        if control is not None:
+            updates = control.apply()
+            if updates:
+                _log("ControlServer", "applied %s" % updates)
+                cruise = TTC_CRUISE_SPEED if TTC_BRAKING else CRUISE_SPEED
+                cruise_duty = int((cruise / 100) * MAX_DUTY * CRUISE_HYSTERESIS_FACTOR)
+            if control.paused:
+                await hold_async(drive)
+                continue
+        dist = await drive.next_distance()
+        if dist is None:
+            continue
+        stats.tick()
+        if LOG_DEBUG:
+            rlog.event(ev.DECISION_MEASURED, dist)
+        speed = target_speed(dist)
+        if speed is None:
+            rlog.event(ev.DECISION_OBSTACLE, dist)
+            set_state(AVOID)
+            await avoid_async(drive, turn_alternate, utime.ticks_diff(utime.ticks_ms(), resumed))
+            turn_alternate = not turn_alternate
+            set_state(CRUISE)
+            await forward_async(drive, CRUISE_SPEED)
+            resumed = utime.ticks_ms()
+        elif speed < cruise:
+            set_state(SLOW)
+            await forward_async(drive, speed)
+        else:
+            set_state(CRUISE)
+            if left.current_duty < cruise_duty or right.current_duty < cruise_duty:
+                await forward_async(drive, cruise)
+    _log("decision_task", stats.summary())
+
+
+async def start_control():
+    """With CONTROL, serve the control endpoint (after the first motor command, like telemetry)."""
+    global control
+    if not CONTROL:
+        return
+    wifi_up(WIFI_SSID, WIFI_PASSWORD)
+    control = ControlServer(control_status, CONTROL_PARAMS, globals(), CONTROL_PORT, CONTROL_PUSH_MS)
+    await control.start()
+
+
+async def hold_async(drive):
+    """POST /stop: ramp to a standstill, then wait one sensing period per call."""
+    if left.current_duty or right.current_duty:
+        set_state(IDLE)
+        await drive.ramp_to(0, DECEL_RAMP_MS, DECEL_PROFILE)
+    await _sleep_ms(SENSOR_PERIOD_MS)
+
+
+async def first_reading_async(drive):
+    """first_reading() for the asyncio runtime: waits on ranging_task's updates."""
+    start = utime.ticks_ms()
+    while utime.ticks_diff(utime.ticks_ms(), start) < BOOT_PING_TIMEOUT_MS:
+        if drive.dist is not None:
+            return utime.ticks_ms()
+        await _sleep_ms(BOOT_POLL_MS)
+    return None
+
+
+async def blink_async(times=3, delay_ms=500):
+    for _ in range(times):
+        led.on()
+        await _sleep_ms(delay_ms)
         led.off()
+        await _sleep_ms(delay_ms)
+
+
+async def run_async(total_ms=3000):
+    """asyncio application: ranging, motor, logging and decision tasks."""
+    drive = Drive()
+    if FAST_BOOT:
+        status.show(BOOTING)
+    if SIDE_SENSORS:
+        sensor.start_array(ARRAY_SLOT_MS)
+    elif DUAL_CORE:
+        sensor.start_core1(SENSOR_PERIOD_MS)
+    elif IRQ_RANGING:
+        sensor.start_background(SENSOR_PERIOD_MS)
+    if LOCAL_MAP:
+        localmap.start()
+    if speedloop is not None:
+        speedloop.start()
+    tasks = [
+        asyncio.create_task(ranging_task(drive)),
+        asyncio.create_task(motor_task(drive)),
+        asyncio.create_task(log_task(drive)),
+    ]
+    try:
+        if not FAST_BOOT:
+            await blink_async(3, 500)
+        await decision_task(drive, total_ms)
+    finally:
+        drive.running = False
+        for task in tasks[:2]:
+            task.cancel()
+        await tasks[2]  # flush queued log lines
+    return drive
+
+
+def async_run(total_ms=3000):
+    """Synchronous entry point for the asyncio runtime; same contract as simplified_run()."""
+    rlog.event(ev.ASYNC_START, total_ms)
+    try:
+        asyncio.run(run_async(total_ms))
+    except KeyboardInterrupt:
+        rlog.event(ev.ASYNC_INTERRUPT)
+    finally:
+        stop()
+        stop_telemetry()
+        if control is not None:
+            control.close()
+            _log("ControlServer", control.summary())
+        localmap.stop()
+        if speedloop is not None:
+            speedloop.stop()
+            _log("SpeedLoop", speedloop.summary())
+        sensor.stop_background()
+        status.off()
         hbridge.disable()
-        _log("simplified_run", "finished")
+        rlog.event(ev.ASYNC_FINISHED)
+        rlog.drain()
+        profiler.report()
+
+
+def main(total_ms=60000):
+    """Run the configured runtime (ASYNC_RUNTIME); a board's main.py can be just this call."""
+    if ASYNC_RUNTIME:
+        async_run(total_ms)
+    else:
+        simplified_run(total_ms)
 
 
 if __name__ == "__main__":
-    simplified_run(total_ms=60000)
+    main()
@@ -0,0 +1,201 @@
+"""
+Second-core sensor acquisition.
+SensorCore runs a sampling loop on core 1 (via _thread) and hands each reading to
+core 0 through a SeqBuffer: a two-slot buffer guarded by a sequence counter, so
+neither side ever takes a lock. The same buffer carries core 0's run/pause/stop
+requests the other way, so the loop is started once and never restarted (rp2 has
+one core 1, and a second start_new_thread fails while it is still busy).
+LoopStats measures loop throughput and jitter.
+"""
+
+import _thread
+import utime
+from array import array
+
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+
+# SensorCore modes: requested by core 0, acknowledged by the core-1 loop
+RUN = const(0)
+PAUSE = const(1)  # Loop alive but not touching the sensor (e.g. during a scan)
+STOP = const(2)  # Loop exited (or never started)
+
+
+class SeqBuffer:
+    """
+    Single-writer, single-reader double buffer.
+
+    The writer fills the slot the reader is not pointed at, then bumps seq to flip
+    it. A reader that sees seq change while copying a slot simply retries.
+
+    request/ack carry mode changes the other way: core 0 writes the mode and then
+    bumps the request number; the loop copies both into ack once it is in that mode.
+    """
+
+    def __init__(self):
+        self.values = array('f', [0.0, 0.0])
+        self.stamps = array('i', [0, 0])  # ticks_ms of each slot
+        self.seq = array('i', [0])  # Even/odd selects the live slot
+        self.request = array('i', [STOP, 0])  # mode, request number (core 0 writes)
+        self.ack = array('i', [STOP, 0])  # mode, request number in effect (core 1 writes)
+
+    def publish(self, value, stamp_ms):
+        slot = (self.seq[0] + 1) & 1
+        self.values[slot] = value
+        self.stamps[slot] = stamp_ms
+        self.seq[0] += 1
+
+    def read(self):
+        """Return (value, stamp_ms, seq); seq is 0 until the first publish."""
+        while True:
+            seq = self.seq[0]
+            slot = seq & 1
+            value = self.values[slot]
+            stamp = self.stamps[slot]
+            if self.seq[0] == seq:
+                return value, stamp, seq
+
+
+class LoopStats:
+    """Iteration count, period min/mean/max and peak-to-peak jitter, in integer microseconds."""
+
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+        self.last_us = 0  # Newest period
+        self.started_us = utime.ticks_us()
+        self._last_us = None
+
+    def tick(self):
+        """Call once per loop iteration."""
+        now = utime.ticks_us()
+        if self._last_us is not None:
+            period = utime.ticks_diff(now, self._last_us)
+            if self.count == 0 or period < self.min_us:
+                self.min_us = period
+            if period > self.max_us:
+                self.max_us = period
+            self.total_us += period
+            self.last_us = period
+            self.count += 1
+        self._last_us = now
+
+    def summary(self):
+        if not self.count:
+            return "%s: no iterations" % self.name
+        elapsed_ms = utime.ticks_diff(utime.ticks_us(), self.started_us) // 1000
+        return "%s: n=%d rate=%.1f/s period min=%dus mean=%dus max=%dus jitter=%dus" % (
+            self.name, self.count, self.count * 1000 / max(1, elapsed_ms),
+            self.min_us, self.total_us // self.count, self.max_us, self.max_us - self.min_us)
+
+
+class SensorCore:
+    """
+    Sample sensor.measure() every period_ms on core 1.
+
+    measure() may block (the busy-wait HC-SR04 driver is fine here) and returns a
+    distance or None; None readings are counted as misses and not published.
+    The loop is started once; pause()/resume() hand the sensor to core 0 and back
+    without ending it, and stop() ends it.
+    """
+
+    def __init__(self, measure, period_ms=60):
+        self.measure = measure
+        self.period_ms = period_ms
+        self.buffer = SeqBuffer()
+        self.stats = LoopStats("core1")
+        self.misses = 0
+
+    def running(self):
+        """True while the core-1 loop is alive (sampling or paused)."""
+        return self.buffer.ack[0] != STOP
+
+    def start(self):
+        """Start sampling; a loop that is still alive (paused, or slow to stop) is reused."""
+        if self.running():
+            self._request(RUN)
+            return
+        self.buffer.ack[0] = RUN  # Alive from here, so a quick stop() waits for it
+        self._request(RUN)
+        _thread.start_new_thread(self._loop, ())
+
+    def pause(self, timeout_ms=500):
+        """
+        Stop touching the sensor; returns True once the loop has finished its
+        current measurement and is idle, False if it did not within timeout_ms.
+        """
+        return self._switch(PAUSE, timeout_ms)
+
+    def resume(self):
+        self._request(RUN)
+
+    def stop(self, timeout_ms=500):
+        """End the loop; True once it has exited."""
+        return self._switch(STOP, timeout_ms)
+
+    def read(self):
+        """Return (distance, age_ms) of the newest sample, or (None, None) before the first."""
+        value, stamp, seq = self.buffer.read()
+        if seq == 0:
+            return None, None
+        return value, utime.ticks_diff(utime.ticks_ms(), stamp)
+
+    def _request(self, mode):
+        request = self.buffer.request
+        request[0] = mode
+        request[1] += 1
+        return request[1]
+
+    def _switch(self, mode, timeout_ms):
+        if not self.running():
+            return mode == STOP
+        number = self._request(mode)
+        ack = self.buffer.ack
+        start = utime.ticks_ms()
+        while ack[1] != number or ack[0] != mode:
+            if ack[0] == STOP:
+                return mode == STOP
+            if utime.ticks_diff(utime.ticks_ms(), start) >= timeout_ms:
+                return False
+            utime.sleep_ms(1)
+        return True
+
+    def _loop(self):
+        request = self.buffer.request
+        ack = self.buffer.ack
+        try:
+            while True:
+                number = request[1]
+                mode = request[0]
+                if mode == STOP:
+                    break
+                ack[0] = mode
+                ack[1] = number
+                if mode == PAUSE:
+                    utime.sleep_ms(1)
+                    continue
+                start = utime.ticks_ms()
+                self.stats.tick()
+                dist = self.measure()
+                if dist is None:
+                    self.misses += 1
+                else:
+                    self.buffer.publish(dist, utime.ticks_ms())
+                # Sleep out the period in short slices, so a pause takes effect quickly
+                while request[1] == number:
+                    wait = self.period_ms - utime.ticks_diff(utime.ticks_ms(), start)
+                    if wait <= 0:
+                        break
+                    utime.sleep_ms(min(wait, 5))
+        finally:
+            ack[1] = request[1]
+            ack[0] = STOP
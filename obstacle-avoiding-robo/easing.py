@@ -0,0 +1,119 @@
+"""
+Fixed-point easing profiles for motor ramps.
+Each profile is a table of STEPS + 1 samples of the eased fraction, in units of ONE
+(1 << SHIFT); the default ones are stored as literals, so importing computes nothing. at() interpolates a table with integer math only,
+so a ramp step never touches a float (every float is a heap allocation on MicroPython).
+
+    duty = start + ((target - start) * at(SMOOTHSTEP, elapsed_ms, duration_ms) >> SHIFT)
+
+SHIFT is 14 so a full-scale duty delta times ONE still fits a small int.
+"""
+
+from array import array
+
+SHIFT = 14
+ONE = 1 << SHIFT
+STEPS = 64  # Table resolution; at() interpolates between samples
+
+
+def _table(fn):
+    return array('H', [int(fn(i / STEPS) * ONE + 0.5) for i in range(STEPS + 1)])
+
+
+def _trapezoid(accel):
+    """Constant acceleration for the first and last accel of the ramp, constant rate between."""
+    def fn(t):
+        peak = 1 / (1 - accel)  # Rate that makes the area come out at 1
+        if t < accel:
+            return peak * t * t / (2 * accel)
+        if t > 1 - accel:
+            u = 1 - t
+            return 1 - peak * u * u / (2 * accel)
+        return peak * (t - accel / 2)
+    return fn
+
+
+def _scurve(jerk, samples=1024):
+    """
+    Jerk-limited S-curve: the rate of change rises over the first half of the ramp and
+    falls over the second, its slope ramping in and out over a jerk fraction of each half
+    (0 gives the trapezoid's steps, 1 a pure triangle). Integrated numerically.
+    """
+    def accel(t):
+        half = t if t < 0.5 else 1 - t
+        sign = 1 if t < 0.5 else -1
+        ramp = jerk / 2
+        if ramp > 0 and half < ramp:
+            return sign * half / ramp
+        if ramp > 0 and half > 0.5 - ramp:
+            return sign * (0.5 - half) / ramp
+        return sign
+
+    rate = [0.0]
+    for i in range(samples):
+        rate.append(rate[-1] + accel((i + 0.5) / samples) / samples)
+    pos = [0.0]
+    for i in range(samples):
+        pos.append(pos[-1] + (rate[i] + rate[i + 1]) / 2 / samples)
+    total = pos[-1]
+    return lambda t: pos[int(t * samples + 0.5)] / total
+
+
+# The default tables are literals: computing them (the S-curve by a 1024-step float
+# integration) would cost boot time and heap on every start. tests/test_easing.py
+# checks them against _table() of the formulas they come from.
+LINEAR = array('H', range(0, ONE + 1, ONE // STEPS))
+# _table(lambda t: t * t * (3 - 2 * t))
+SMOOTHSTEP = array('H', [
+    0, 12, 47, 105, 184, 284, 405, 545, 704, 881, 1075, 1286, 1512, 1753, 2009, 2278, 2560,
+    2854, 3159, 3475, 3800, 4134, 4477, 4827, 5184, 5547, 5915, 6288, 6664, 7043, 7425,
+    7808, 8192, 8576, 8959, 9341, 9720, 10096, 10469, 10837, 11200, 11557, 11907, 12250,
+    12584, 12909, 13225, 13530, 13824, 14106, 14375, 14631, 14872, 15098, 15309, 15503,
+    15680, 15839, 15979, 16100, 16200, 16279, 16337, 16372, 16384,
+])
+# _table(lambda t: t * t * t * (t * (6 * t - 15) + 10))
+SMOOTHERSTEP = array('H', [
+    0, 1, 5, 16, 36, 69, 117, 181, 263, 365, 488, 632, 799, 989, 1202, 1437, 1696, 1977,
+    2280, 2605, 2949, 3313, 3695, 4094, 4509, 4938, 5379, 5831, 6292, 6760, 7234, 7712,
+    8192, 8672, 9150, 9624, 10092, 10553, 11005, 11446, 11875, 12290, 12689, 13071, 13435,
+    13779, 14104, 14407, 14688, 14947, 15182, 15395, 15585, 15752, 15896, 16019, 16121,
+    16203, 16267, 16315, 16348, 16368, 16379, 16383, 16384,
+])
+# _table(_trapezoid(0.25))
+TRAPEZOID = array('H', [
+    0, 11, 43, 96, 171, 267, 384, 523, 683, 864, 1067, 1291, 1536, 1803, 2091, 2400, 2731,
+    3072, 3413, 3755, 4096, 4437, 4779, 5120, 5461, 5803, 6144, 6485, 6827, 7168, 7509,
+    7851, 8192, 8533, 8875, 9216, 9557, 9899, 10240, 10581, 10923, 11264, 11605, 11947,
+    12288, 12629, 12971, 13312, 13653, 13984, 14293, 14581, 14848, 15093, 15317, 15520,
+    15701, 15861, 16000, 16117, 16213, 16288, 16341, 16373, 16384,
+])
+# _table(_scurve(0.5))
+SCURVE = array('H', [
+    0, 0, 3, 9, 21, 42, 72, 114, 171, 243, 333, 444, 576, 732, 915, 1125, 1365, 1637, 1939,
+    2268, 2624, 3004, 3405, 3827, 4267, 4722, 5192, 5674, 6165, 6665, 7171, 7680, 8192,
+    8704, 9213, 9719, 10219, 10710, 11192, 11662, 12117, 12557, 12979, 13380, 13760, 14116,
+    14445, 14747, 15019, 15259, 15469, 15652, 15808, 15940, 16051, 16141, 16213, 16270,
+    16312, 16342, 16363, 16375, 16381, 16384, 16384,
+])
+
+
+def make_trapezoid(accel=0.25):
+    """Trapezoidal profile spending accel of the ramp accelerating and as much decelerating."""
+    return _table(_trapezoid(accel))
+
+
+def make_scurve(jerk=0.5):
+    """S-curve profile; jerk in (0, 1] is the share of each half spent changing acceleration."""
+    return _table(_scurve(jerk))
+
+
+def at(profile, elapsed, duration):
+    """Eased fraction (0..ONE) of a ramp elapsed of duration in; integers only."""
+    if elapsed <= 0:
+        return 0
+    if elapsed >= duration:
+        return ONE
+    pos = elapsed * STEPS
+    i = pos // duration
+    a = profile[i]
+    return a + (profile[i + 1] - a) * (pos - i * duration) // duration
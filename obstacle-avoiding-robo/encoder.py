@@ -0,0 +1,102 @@
+"""
+Wheel encoders counted by Pin.irq.
+Encoder counts one tick per rising edge on channel A in a hard IRQ and times the
+gap between ticks for a speed estimate. With a quadrature encoder channel B gives
+the direction; a single-channel (slotted disc) encoder takes it from the motor's
+IN1/IN2 pins instead, keeping the last driven direction while the wheel coasts.
+Odometry turns a left/right pair into distance travelled and angle turned.
+"""
+
+from machine import Pin
+import utime
+from math import pi
+
+DEG_PER_RAD = 57.29578
+
+
+class Encoder:
+    """
+    pin_a/pin_b: GPIO numbers (pin_b None for single channel). in1/in2: the motor's
+    direction Pins, for single channel. invert flips a quadrature encoder mounted
+    mirrored (usually the right wheel).
+    """
+
+    def __init__(self, pin_a, pin_b=None, in1=None, in2=None, ticks_per_rev=20, wheel_mm=65,
+                 invert=False, stale_ms=150):
+        self.um_per_tick = int(pi * wheel_mm * 1000 / ticks_per_rev)
+        self.stale_us = stale_ms * 1000  # No tick for this long: the wheel has stopped
+        self.ticks = 0
+        self._a = Pin(pin_a, Pin.IN, Pin.PULL_UP)
+        self._b = None if pin_b is None else Pin(pin_b, Pin.IN, Pin.PULL_UP)
+        self._in1 = in1
+        self._in2 = in2
+        self._sign = -1 if invert else 1
+        self._dir = 1
+        self._last_us = utime.ticks_us()
+        self._period_us = 0
+        self._a.irq(self._quadrature if pin_b is not None else self._single, Pin.IRQ_RISING, hard=True)
+
+    def deinit(self):
+        self._a.irq(None)
+
+    # Hard IRQ handlers: no allocation
+
+    def _single(self, pin):
+        d = self._in1.value() - self._in2.value()
+        if d:
+            self._dir = d
+        self._tick()
+
+    def _quadrature(self, pin):
+        self._dir = -self._sign if self._b.value() else self._sign
+        self._tick()
+
+    def _tick(self):
+        now = utime.ticks_us()
+        self.ticks += self._dir
+        self._period_us = utime.ticks_diff(now, self._last_us)
+        self._last_us = now
+
+    def mm(self):
+        """Distance since start, mm (negative when net backwards)."""
+        return self.ticks * self.um_per_tick // 1000
+
+    def speed_mm_s(self):
+        """Speed from the last tick interval, decaying once ticks are overdue; 0 when stopped."""
+        since = utime.ticks_diff(utime.ticks_us(), self._last_us)
+        if since > self.stale_us or not self._period_us:
+            return 0
+        period = since if since > self._period_us else self._period_us
+        return self._dir * self.um_per_tick * 1000 // period
+
+
+class Odometry:
+    """Distance and rotation of a wheel pair since mark()."""
+
+    def __init__(self, left, right, track_mm):
+        self.left = left
+        self.right = right
+        self.track_mm = track_mm
+        self.mark()
+
+    def mark(self):
+        self._left0 = self.left.ticks
+        self._right0 = self.right.ticks
+
+    def _mm(self, encoder, start):
+        return (encoder.ticks - start) * encoder.um_per_tick // 1000
+
+    def travelled_mm(self):
+        """Mean wheel travel since mark(); negative in reverse."""
+        return (self._mm(self.left, self._left0) + self._mm(self.right, self._right0)) // 2
+
+    def turned_deg(self):
+        """Rotation since mark(), counter-clockwise (left) positive."""
+        return (self._mm(self.right, self._right0) - self._mm(self.left, self._left0)) * DEG_PER_RAD / self.track_mm
+
+    def spin_deg_s(self):
+        """Current rotation rate, left positive."""
+        return (self.right.speed_mm_s() - self.left.speed_mm_s()) * DEG_PER_RAD / self.track_mm
+
+    def speed_mm_s(self):
+        return (self.left.speed_mm_s() + self.right.speed_mm_s()) // 2
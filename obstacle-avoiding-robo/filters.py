@@ -0,0 +1,134 @@
+"""
+Constant-work distance filters backed by preallocated arrays.
+Each stage has update(x) -> filtered value and reset(); a Pipeline chains stages so
+e.g. a median can reject echo spikes before a moving average smooths the rest.
+"""
+
+from array import array
+
+
+class MovingAverage:
+    """Mean of the last n samples, kept as a running sum over a ring buffer."""
+
+    def __init__(self, n=5):
+        self.n = n
+        self.ring = array('f', [0.0] * n)
+        self.reset()
+
+    def reset(self):
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, x):
+        if self.count == self.n:
+            self.total -= self.ring[self.index]
+        else:
+            self.count += 1
+        self.ring[self.index] = x
+        self.total += x
+        self.index = (self.index + 1) % self.n
+        return self.total / self.count
+
+
+class Median:
+    """Median of the last n samples; a single outlier in the window never reaches the output."""
+
+    def __init__(self, n=3):
+        self.n = n
+        self.ring = array('f', [0.0] * n)  # samples in arrival order
+        self.ordered = array('f', [0.0] * n)  # same samples, sorted
+        self.reset()
+
+    def reset(self):
+        self.index = 0
+        self.count = 0
+
+    def update(self, x):
+        ordered = self.ordered
+        count = self.count
+        if count == self.n:
+            # Drop the oldest sample from the sorted window
+            old = self.ring[self.index]
+            i = 0
+            while ordered[i] != old:
+                i += 1
+            while i < count - 1:
+                ordered[i] = ordered[i + 1]
+                i += 1
+            count -= 1
+        # Insertion step of an insertion sort
+        i = count
+        while i > 0 and ordered[i - 1] > x:
+            ordered[i] = ordered[i - 1]
+            i -= 1
+        ordered[i] = x
+        self.count = count + 1
+        self.ring[self.index] = x
+        self.index = (self.index + 1) % self.n
+        mid = self.count // 2
+        if self.count % 2:
+            return ordered[mid]
+        return (ordered[mid - 1] + ordered[mid]) / 2
+
+
+class EWMA:
+    """Exponentially weighted moving average; alpha in (0, 1], higher follows faster."""
+
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.value = None
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class Kalman1D:
+    """
+    Scalar Kalman filter for a slowly changing distance.
+
+    q: process noise (how fast the true distance may move), r: measurement noise.
+    """
+
+    def __init__(self, q=4.0, r=9.0):
+        self.q = q
+        self.r = r
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.p = 0.0
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+            self.p = self.r
+            return x
+        p = self.p + self.q
+        k = p / (p + self.r)
+        self.value += k * (x - self.value)
+        self.p = (1 - k) * p
+        return self.value
+
+
+class Pipeline:
+    """Feed each sample through the stages in order."""
+
+    def __init__(self, *stages):
+        self.stages = stages
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def update(self, x):
+        for stage in self.stages:
+            x = stage.update(x)
+        return x
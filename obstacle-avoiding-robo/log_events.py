@@ -0,0 +1,213 @@
+"""
+Event table for the binary ring logger (rlog.py).
+Shared by the robot scripts and the host-side decoder (rlog_decode.py), so it must
+not import anything board-specific. Each event id indexes EVENTS, whose entry
+gives the tag, the printf-style message and one kind code per argument:
+  i  integer
+  f  value stored x100 and printed with 2 decimals
+  s  index into SYMBOLS
+  b  boolean
+"""
+
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+
+# Record: ticks_ms (u32), event id (u16), 2 spare bytes, 4 x int32 args
+RECORD_FMT = "<IHxxiiii"
+RECORD_SIZE = const(24)
+
+SYMBOLS = ('left', 'right', 'blocked')
+
+MOTOR_INIT = const(0)
+MOTOR_FORWARD = const(1)
+MOTOR_REVERSE = const(2)
+MOTOR_STOP = const(3)
+MOTOR_RAMP_STOP = const(4)
+HBRIDGE_INIT = const(5)
+HBRIDGE_ENABLE = const(6)
+HBRIDGE_DISABLE = const(7)
+HCSR04_INIT = const(8)
+HCSR04_START_BACKGROUND = const(9)
+HCSR04_START_CORE1 = const(10)
+HCSR04_STOP_BACKGROUND = const(11)
+BLINK_START = const(12)
+BLINK_DONE = const(13)
+FORWARD = const(14)
+STOP = const(15)
+REVERSE = const(16)
+REVERSE_SAFE_START = const(17)
+REVERSE_SAFE_TIMEOUT = const(18)
+REVERSE_SAFE_DIST = const(19)
+REVERSE_SAFE_REACHED = const(20)
+TURN_LEFT = const(21)
+TURN_RIGHT = const(22)
+TURN_OK = const(23)
+TURN_RETRY = const(24)
+TURN_EXHAUSTED = const(25)
+PEEK_START = const(26)
+PEEK_RESULT = const(27)
+SIDE_BOTH_BLOCKED = const(28)
+SIDE_LEFT_BLOCKED = const(29)
+SIDE_RIGHT_BLOCKED = const(30)
+SIDE_CLEARER_LEFT = const(31)
+SIDE_CLEARER_RIGHT = const(32)
+SIDE_TIE_LEFT = const(33)
+SIDE_TIE_RIGHT = const(34)
+RUN_START = const(35)
+RUN_MEASURED = const(36)
+RUN_ADAPTIVE = const(37)
+RUN_OBSTACLE = const(38)
+RUN_OBSTACLE_REVERSE = const(39)
+RUN_SIDE_FAILED = const(40)
+RUN_ESCAPE = const(41)
+RUN_ESCAPE_FAILED = const(42)
+RUN_SAFE_STOP = const(43)
+RUN_TIMEOUT_DIST = const(44)
+RUN_TIMEOUT = const(45)
+RUN_INTERRUPT = const(46)
+RUN_FINISHED = const(47)
+ASYNC_START = const(48)
+ASYNC_INTERRUPT = const(49)
+ASYNC_FINISHED = const(50)
+TURN_ASYNC = const(51)
+REVERSE_ASYNC_REACHED = const(52)
+TURN_ASYNC_OK = const(53)
+TURN_ASYNC_RETRY = const(54)
+AVOID_SIDE_FAILED = const(55)
+AVOID_ESCAPE = const(56)
+AVOID_ESCAPE_FAILED = const(57)
+DECISION_MEASURED = const(58)
+DECISION_OBSTACLE = const(59)
+LOG_DROPPED = const(60)
+HCSR04_START_ARRAY = const(61)
+SIDE_SENSED = const(62)
+HCSR04_SCAN = const(63)
+SCAN_RESULT = const(64)
+MAP_START = const(65)
+MAP_RECALL = const(66)
+TTC_BRAKE = const(67)
+TTC_LEARNED = const(68)
+TURN_ANGLE = const(69)
+TURN_STALLED = const(70)
+REVERSE_DISTANCE = const(71)
+PROFILE_LOADED = const(72)
+CAL_DEADBAND = const(73)
+CAL_DRIVE = const(74)
+CAL_TURN = const(75)
+BOOT_TIMING = const(76)
+RUN_DECISIONS = const(77)
+REVERSE_SKIPPED = const(78)
+
+EVENTS = (
+    ("Motor.__init__", "pwm=%s in1=%s in2=%s", b"iii"),
+    ("Motor.forward", "speed=%s", b"i"),
+    ("Motor.reverse", "speed=%s", b"i"),
+    ("Motor.stop", "", b""),
+    ("Motor.ramp_stop", "ramp_time_ms=%s", b"i"),
+    ("HBridge.__init__", "stby=%s", b"i"),
+    ("HBridge.enable", "", b""),
+    ("HBridge.disable", "", b""),
+    ("HCSR04.__init__", "trig=%s echo=%s", b"ii"),
+    ("HCSR04.start_background", "period_ms=%s", b"i"),
+    ("HCSR04.start_core1", "period_ms=%s", b"i"),
+    ("HCSR04.stop_background", "pings=%d timeouts=%d", b"ii"),
+    ("blink_led", "starting with %d blinks", b"i"),
+    ("blink_led", "finished", b""),
+    ("forward", "speed=%s ramp=%s", b"ib"),
+    ("stop", "", b""),
+    ("reverse", "duration_ms=%s speed=%s", b"ii"),
+    ("reverse_until_safe", "speed=%s", b"i"),
+    ("reverse_until_safe", "timeout after %dms", b"i"),
+    ("reverse_until_safe", "distance=%.2fcm", b"f"),
+    ("reverse_until_safe", "safe distance reached: %.2fcm > %dcm", b"fi"),
+    ("turn_left", "duration_ms=%s speed=%s", b"ii"),
+    ("turn_right", "duration_ms=%s speed=%s", b"ii"),
+    ("turn_with_validation", "%s turn successful: dist=%.2fcm", b"sf"),
+    ("turn_with_validation", "turn incomplete, retrying: attempt %d/%d", b"ii"),
+    ("turn_with_validation", "%s turn exhausted retries", b"s"),
+    ("peek", "starting side=%s", b"s"),
+    ("peek", "side=%s dist=%.2fcm", b"sf"),
+    ("decide_turn_side", "both blocked: left=%.2f right=%.2f", b"ff"),
+    ("decide_turn_side", "left blocked, choosing right: left=%.2f right=%.2f", b"ff"),
+    ("decide_turn_side", "right blocked, choosing left: left=%.2f right=%.2f", b"ff"),
+    ("decide_turn_side", "clearer side: left=%.2f right=%.2f chosen=left", b"ff"),
+    ("decide_turn_side", "clearer side: left=%.2f right=%.2f chosen=right", b"ff"),
+    ("decide_turn_side", "tie (diff=%.2f < %d), using alternate: left=%.2f right=%.2f chosen=left", b"fiff"),
+    ("decide_turn_side", "tie (diff=%.2f < %d), using alternate: left=%.2f right=%.2f chosen=right", b"fiff"),
+    ("simplified_run", "start total_ms=%s", b"i"),
+    ("simplified_run", "measured=%.2fcm", b"f"),
+    ("simplified_run", "adaptive slowdown: dist=%.2fcm speed=%d%%", b"fi"),
+    ("simplified_run", "obstacle detected %.2fcm — stop, reverse, peek-and-choose, resume", b"f"),
+    ("simplified_run", "obstacle detected %.2fcm — stopping and reversing", b"f"),
+    ("simplified_run", "chosen side failed, trying opposite", b""),
+    ("simplified_run", "both sides blocked, performing 180° escape", b""),
+    ("simplified_run", "escape failed, reversing again", b""),
+    ("simplified_run", "stopped at safe distance: %.2fcm", b"f"),
+    ("simplified_run", "reverse timeout, stopped anyway (dist=%.2fcm)", b"f"),
+    ("simplified_run", "reverse timeout, stopped (sensor timeout)", b""),
+    ("simplified_run", "keyboard interrupt", b""),
+    ("simplified_run", "finished", b""),
+    ("async_run", "start total_ms=%s", b"i"),
+    ("async_run", "keyboard interrupt", b""),
+    ("async_run", "finished", b""),
+    ("turn_async", "side=%s duration_ms=%s speed=%s", b"sii"),
+    ("reverse_until_safe_async", "safe distance reached: %.2fcm", b"f"),
+    ("turn_with_validation_async", "%s turn successful: dist=%.2fcm", b"sf"),
+    ("turn_with_validation_async", "turn incomplete: attempt %d/%d", b"ii"),
+    ("avoid_async", "chosen side failed, trying opposite", b""),
+    ("avoid_async", "both sides blocked, performing 180° escape", b""),
+    ("avoid_async", "escape failed, reversing again", b""),
+    ("decision_task", "measured=%.2fcm", b"f"),
+    ("decision_task", "obstacle detected %.2fcm", b"f"),
+    ("rlog", "dropped %d records", b"i"),
+    ("HCSR04.start_array", "slot_ms=%s", b"i"),
+    ("decide_turn_side", "side sensors: left=%.2f right=%.2f", b"ff"),
+    ("HCSR04.scan", "%d angles in %dms", b"ii"),
+    ("decide_turn_side", "scan: left=%dcm right=%dcm", b"ii"),
+    ("LocalMap.start", "%dx%d cells of %dcm", b"iii"),
+    ("LocalMap.recall", "left=%d right=%d", b"ii"),
+    ("ttc_speed", "brake: dist=%.2f closing=%.2fcm/s ttc=%dms", b"ffi"),
+    ("learn_stop", "stop took %dms of closing, brake model now %dms", b"ii"),
+    ("turn", "target %ddeg, turned %ddeg", b"ii"),
+    ("turn", "stalled: target %ddeg, turned %ddeg", b"ii"),
+    ("reverse", "stopped by encoders after %dmm", b"i"),
+    ("apply_profile", "deadband %d%%, turn %dms, peek %dms, escape %dms", b"iiii"),
+    ("calibrate_run", "%s wheel moves from %d%%", b"si"),
+    ("calibrate_run", "drive at %d%%: %dmm/s, stopped in %dmm", b"iii"),
+    ("calibrate_run", "spin at %d%%: %dms per revolution", b"ii"),
+    ("boot", "init %dms, first reading %dms, first motor command %dms after reset", b"iii"),
+    ("simplified_run", "%d decisions in %dms (%.2f/s)", b"iif"),
+    ("reverse_until_safe", "skipped: only %dms of ground behind known clear", b"i"),
+)
+
+
+def encode(kind, value):
+    """Convert one argument to the int32 stored in a record."""
+    if kind == 0x66:  # 'f'
+        return int(value * 100)
+    if kind == 0x73:  # 's'
+        return SYMBOLS.index(value)
+    return int(value)
+
+
+def format_record(ts, event, a, b, c, d):
+    """Render a record in the same text format _log prints."""
+    if event >= len(EVENTS):
+        return "[{}ms] ?: event={} args={} {} {} {}".format(ts, event, a, b, c, d)
+    tag, fmt, kinds = EVENTS[event]
+    raw = (a, b, c, d)
+    args = []
+    for i in range(len(kinds)):
+        kind = kinds[i]
+        if kind == 0x66:
+            args.append(raw[i] / 100)
+        elif kind == 0x73:
+            args.append(SYMBOLS[raw[i]])
+        elif kind == 0x62:  # 'b'
+            args.append(bool(raw[i]))
+        else:
+            args.append(raw[i])
+    return "[{}ms] {}: {}".format(ts, tag, fmt % tuple(args) if args else fmt)
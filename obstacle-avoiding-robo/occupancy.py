@@ -0,0 +1,194 @@
+"""
+Robot-centred occupancy grid with dead-reckoned pose.
+The grid is a size x size bytearray of cells cell_cm wide, always covering the area
+around the robot. It scrolls as the robot moves: storage is indexed by world cell
+modulo size, so crossing into a new cell only clears the row or column that comes
+into view instead of shifting the whole array.
+
+Each cell holds occupancy evidence around UNKNOWN: sensor hits push it up, beams
+passing through push it down, and fade_row() eases it back towards UNKNOWN so stale
+obstacles (and dead-reckoning drift) are forgotten after a while. Pose and ray
+tracing use integer math with a Q14 sine table.
+
+Headings and bearings are counter-clockwise (left) positive; 0 is the heading the
+robot had when the grid was created.
+"""
+
+from math import radians, sin
+from array import array
+
+SHIFT = 14
+ONE = 1 << SHIFT
+UNKNOWN = 128
+OCCUPIED = 160  # At or above: something is there
+FREE = 96  # At or below: seen empty
+HIT = 64
+MISS = 32
+
+_SIN = array('h', [int(sin(radians(d)) * ONE + 0.5) for d in range(91)])
+
+
+def sin_q(deg):
+    """sin(deg) in units of ONE, for integer degrees."""
+    deg %= 360
+    if deg <= 90:
+        return _SIN[deg]
+    if deg <= 180:
+        return _SIN[180 - deg]
+    if deg <= 270:
+        return -_SIN[deg - 180]
+    return -_SIN[360 - deg]
+
+
+def cos_q(deg):
+    return sin_q(deg + 90)
+
+
+class OccupancyGrid:
+    def __init__(self, size=32, cell_cm=10, track_mm=140):
+        self.size = size
+        self.half = size // 2
+        self.cell_mm = cell_cm * 10
+        self.track_mm = track_mm
+        self.cells = bytearray([UNKNOWN] * (size * size))
+        self._blank = bytes([UNKNOWN] * size)
+        self._fade_row = 0
+        self.reset()
+
+    def reset(self):
+        """Forget everything and put the robot back at the origin, heading 0."""
+        for i in range(len(self.cells)):
+            self.cells[i] = UNKNOWN
+        self.x_um = 0
+        self.y_um = 0
+        self.heading_cdeg = 0  # Hundredths of a degree, 0..35999
+        self._cx = 0
+        self._cy = 0
+
+    def heading_deg(self):
+        return self.heading_cdeg // 100
+
+    # --- dead reckoning ---
+
+    def move(self, left_mm_s, right_mm_s, dt_ms):
+        """Advance the pose by dt_ms of driving at the given wheel speeds (mm/s, negative backwards)."""
+        # 5730 ~ 180/pi * 100: rad -> centidegrees
+        dh = (right_mm_s - left_mm_s) * dt_ms * 5730 // self.track_mm // 1000
+        mid = (self.heading_cdeg + dh // 2) // 100
+        d_um = (left_mm_s + right_mm_s) // 2 * dt_ms
+        self.x_um += d_um * cos_q(mid) >> SHIFT
+        self.y_um += d_um * sin_q(mid) >> SHIFT
+        self.heading_cdeg = (self.heading_cdeg + dh) % 36000
+        self._scroll(self.x_um // 1000 // self.cell_mm, self.y_um // 1000 // self.cell_mm)
+
+    def _scroll(self, cx, cy):
+        size = self.size
+        if abs(cx - self._cx) >= size or abs(cy - self._cy) >= size:
+            for i in range(len(self.cells)):
+                self.cells[i] = UNKNOWN
+        else:
+            # Clear each column/row entering the window; its storage held the one leaving
+            while self._cx != cx:
+                step = 1 if cx > self._cx else -1
+                self._cx += step
+                col = (self._cx + (self.half - 1 if step > 0 else -self.half)) % size
+                for r in range(size):
+                    self.cells[r * size + col] = UNKNOWN
+            while self._cy != cy:
+                step = 1 if cy > self._cy else -1
+                self._cy += step
+                row = (self._cy + (self.half - 1 if step > 0 else -self.half)) % size
+                self.cells[row * size:(row + 1) * size] = self._blank
+        self._cx = cx
+        self._cy = cy
+
+    # --- cells ---
+
+    def _index(self, d_mm, cos, sin):
+        """Storage index of the cell d_mm from the robot along (cos, sin), or -1 outside the window."""
+        cx = (self.x_um // 1000 + (d_mm * cos >> SHIFT)) // self.cell_mm
+        cy = (self.y_um // 1000 + (d_mm * sin >> SHIFT)) // self.cell_mm
+        if not (-self.half <= cx - self._cx < self.half and -self.half <= cy - self._cy < self.half):
+            return -1
+        return (cy % self.size) * self.size + cx % self.size
+
+    def observe(self, cm, bearing_deg=0, beam_deg=0):
+        """
+        Fuse a range reading taken bearing_deg off the heading: free along the beam,
+        occupied at cm. beam_deg > 0 also clears rays that far either side (the echo
+        came from the nearest thing anywhere in the cone).
+        """
+        if beam_deg:
+            self._trace(cm, bearing_deg - beam_deg, False)
+            self._trace(cm, bearing_deg + beam_deg, False)
+        self._trace(cm, bearing_deg, True)
+
+    def _trace(self, cm, bearing_deg, mark_hit):
+        deg = self.heading_deg() + bearing_deg
+        cos = cos_q(deg)
+        sin = sin_q(deg)
+        end = int(cm * 10)
+        if mark_hit:
+            hit = self._index(end, cos, sin)
+        else:
+            hit = -1
+            end -= self.cell_mm  # Stop short of the range: that cell may hold the echo
+        step = self.cell_mm // 2
+        last = -1
+        d = 0
+        while d < end:
+            i = self._index(d, cos, sin)
+            if i < 0:
+                break
+            if i != last and i != hit:
+                v = self.cells[i]
+                self.cells[i] = v - MISS if v > MISS else 0
+                last = i
+            d += step
+        if hit >= 0:
+            v = self.cells[hit]
+            self.cells[hit] = v + HIT if v < 255 - HIT else 255
+
+    def clearance(self, bearing_deg, max_cm):
+        """
+        Remembered clearance bearing_deg off the heading: cm to the first occupied cell,
+        max_cm if the beam is known free that far, or None where it runs into unknown cells.
+        """
+        deg = self.heading_deg() + bearing_deg
+        cos = cos_q(deg)
+        sin = sin_q(deg)
+        max_mm = max_cm * 10
+        step = self.cell_mm // 2
+        d = self.cell_mm  # The robot's own cell is never observed as an obstacle
+        while d <= max_mm:
+            i = self._index(d, cos, sin)
+            if i < 0:
+                return None
+            v = self.cells[i]
+            if v >= OCCUPIED:
+                return d // 10
+            if v > FREE:
+                return None
+            d += step
+        return max_cm
+
+    def fade_row(self, step=4):
+        """Ease the next storage row towards UNKNOWN; call periodically to forget old evidence."""
+        base = self._fade_row * self.size
+        for i in range(base, base + self.size):
+            v = self.cells[i]
+            if v > UNKNOWN + step:
+                self.cells[i] = v - step
+            elif v < UNKNOWN - step:
+                self.cells[i] = v + step
+            else:
+                self.cells[i] = UNKNOWN
+        self._fade_row = (self._fade_row + 1) % self.size
+
+    def known(self):
+        """Number of cells currently holding free or occupied evidence."""
+        n = 0
+        for v in self.cells:
+            if v <= FREE or v >= OCCUPIED:
+                n += 1
+        return n
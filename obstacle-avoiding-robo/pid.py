@@ -0,0 +1,187 @@
+"""
+Closed-loop wheel speed control.
+SpeedPI stands in for a wheel's PWM: whatever sets the duty (Motor.forward, the ramp
+engine, the asyncio motor task) now sets a setpoint. The setpoint maps to a target
+speed through the open-loop calibration (full_mm_s at full duty, nothing below
+stall_duty), and the controller drives the real PWM to hold that speed against a
+feedback source: any callable returning mm/s, usually an encoder.
+
+The setpoint duty itself is the feedforward (derated along with the target), so the
+PI terms only make up the difference between the calibration and today's battery,
+floor and gearbox. Integer
+math with Q8 gains; the integral is frozen while the output is pinned at either end
+(conditional integration) so it does not wind up against a stalled wheel.
+SpeedLoop updates the wheels from one Timer and keeps tracking-error and CPU-cost
+metrics. When a wheel cannot reach its target even at full duty for a while (not
+just while spinning up), SpeedLoop scales every wheel's target down by the same
+factor, so the pair keeps its speed ratio (and a straight line) instead of the
+weaker wheel falling behind; the factor eases back up while every wheel keeps up
+with its derated target, and holds as soon as one falls behind it again.
+"""
+
+from machine import Timer
+import utime
+
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+
+GAIN_SHIFT = const(8)
+ONE = const(256)  # 1.0 for target scales
+SCALE_RECOVER = const(2)  # Per step, once no wheel is pinned: eases the targets back up
+PINNED_STEPS = const(10)  # Steps at full duty before a wheel counts as out of headroom
+BEHIND_SHIFT = const(5)  # A wheel short of its target by over 1/32 of it holds the recovery
+
+
+class SpeedPI:
+    """
+    pwm: the wheel's machine.PWM. feedback(): measured speed in mm/s along the
+    commanded direction. kp: duty counts per mm/s of error; ki: the same per second.
+    """
+
+    def __init__(self, pwm, feedback, kp, ki, full_mm_s, stall_duty, max_duty=65535, i_limit=None):
+        self.pwm = pwm
+        self.feedback = feedback
+        self.kp = int(kp * (1 << GAIN_SHIFT))
+        self.ki = int(ki * (1 << GAIN_SHIFT))
+        self.full_mm_s = full_mm_s
+        self.stall_duty = stall_duty
+        self.max_duty = max_duty
+        # Integral authority, Q8 duty; half of full duty by default
+        self.i_limit = (max_duty // 2 if i_limit is None else i_limit) << GAIN_SHIFT
+        self.setpoint = 0
+        self.target_mm_s = 0
+        self.duty = 0  # Last duty written to the real PWM
+        self.scale = ONE  # Target derate from the last update()
+        self.measured = 0
+        self.err = 0  # Derated target minus measured, mm/s, at the last update()
+        self.pinned = 0  # Consecutive steps at full duty
+        self.integral = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.samples = 0
+        self.err_sum = 0
+        self.err_max = 0
+
+    def freq(self, hz=None):
+        return self.pwm.freq() if hz is None else self.pwm.freq(hz)
+
+    def duty_u16(self, duty=None):
+        """PWM-compatible: set the setpoint duty (applied now as feedforward), or read it back."""
+        if duty is None:
+            return self.setpoint
+        self.setpoint = duty
+        if duty <= self.stall_duty:
+            # Stopping (or too slow to move): open loop, and start afresh next time
+            self.target_mm_s = 0
+            self.integral = 0
+            self.err = 0
+            self.pinned = 0
+            self._write(duty)
+        else:
+            self.target_mm_s = (duty - self.stall_duty) * self.full_mm_s // (self.max_duty - self.stall_duty)
+            self._write(self._feedforward(self.scale) + (self.integral >> GAIN_SHIFT))
+
+    def update(self, dt_ms, scale=ONE):
+        """One control step; call every dt_ms. scale (ONE = 1.0) derates the target."""
+        if not self.target_mm_s:
+            return
+        self.scale = scale
+        self.measured = self.feedback()
+        target = self.target_mm_s * scale >> GAIN_SHIFT
+        err = target - self.measured
+        self.err = err
+        out = self._feedforward(scale) + ((self.kp * err + self.integral) >> GAIN_SHIFT)
+        if (out < self.max_duty or err < 0) and (out > 0 or err > 0):
+            i = self.integral + self.ki * err * dt_ms // 1000
+            self.integral = self.i_limit if i > self.i_limit else (-self.i_limit if i < -self.i_limit else i)
+        self._write(out)
+        self.pinned = self.pinned + 1 if self.duty == self.max_duty else 0
+        a = err if err >= 0 else -err
+        self.samples += 1
+        self.err_sum += a
+        if a > self.err_max:
+            self.err_max = a
+
+    def _feedforward(self, scale):
+        """The setpoint duty for scale (ONE = 1.0) of its target speed, on the same calibration line."""
+        return self.stall_duty + ((self.setpoint - self.stall_duty) * scale >> GAIN_SHIFT)
+
+    def _write(self, duty):
+        duty = 0 if duty < 0 else (self.max_duty if duty > self.max_duty else duty)
+        self.duty = duty
+        self.pwm.duty_u16(duty)
+
+    def behind(self):
+        """True while well short of the derated target (pinned or not), so it could not take more."""
+        return self.err > (self.target_mm_s * self.scale >> GAIN_SHIFT + BEHIND_SHIFT)
+
+    def headroom(self):
+        """Achievable fraction of the target (ONE = all of it); below ONE only once pinned at full duty."""
+        if self.pinned < PINNED_STEPS or self.measured >= self.target_mm_s or not self.target_mm_s:
+            return ONE
+        return (self.measured << GAIN_SHIFT) // self.target_mm_s if self.measured > 0 else 0
+
+    def mean_error(self):
+        """Mean absolute tracking error in mm/s over the steps where the wheel had a target."""
+        return self.err_sum // self.samples if self.samples else 0
+
+
+class SpeedLoop:
+    """Fixed-rate Timer stepping each SpeedPI; times every step in microseconds."""
+
+    def __init__(self, wheels, period_ms=10):
+        self.wheels = wheels
+        self.period_ms = period_ms
+        self.scale = ONE
+        self._timer = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.steps = 0
+        self.cost_us = 0
+        self.cost_max_us = 0
+        for w in self.wheels:
+            w.reset_stats()
+
+    def start(self):
+        self._timer = Timer()
+        self._timer.init(period=self.period_ms, mode=Timer.PERIODIC, callback=self._tick)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def _tick(self, t):
+        t0 = utime.ticks_us()
+        scale = ONE
+        hold = False
+        for w in self.wheels:
+            w.update(self.period_ms, self.scale)
+            h = w.headroom()
+            if h < scale:
+                scale = h
+            if w.pinned or w.behind():
+                hold = True
+        if scale == ONE and self.scale < ONE:
+            # Hold while a wheel is at full duty or short of its target; otherwise ease back up
+            scale = self.scale if hold else min(ONE, self.scale + SCALE_RECOVER)
+        self.scale = scale
+        cost = utime.ticks_diff(utime.ticks_us(), t0)
+        self.steps += 1
+        self.cost_us += cost
+        if cost > self.cost_max_us:
+            self.cost_max_us = cost
+
+    def summary(self):
+        if not self.steps:
+            return "no steps"
+        errs = " ".join("%d/%d" % (w.mean_error(), w.err_max) for w in self.wheels)
+        return "%d steps, %dus mean %dus max per step (%d.%d%% CPU), tracking error mean/max mm/s: %s" % (
+            self.steps, self.cost_us // self.steps, self.cost_max_us,
+            self.cost_us // self.steps // (self.period_ms * 10),
+            self.cost_us // self.steps * 10 // (self.period_ms * 10) % 10, errs)
@@ -0,0 +1,135 @@
+"""
+Per-function profiling hooks.
+Profiler.wrap(name) decorates a function so every call records its duration in
+preallocated arrays: call count, total and self time (total minus profiled callees),
+min, max and a log2 histogram. Profiler.wrap_async(name) does the same for a
+coroutine function, timing each call from start to return, suspensions included.
+A disabled Profiler returns the function unchanged, so the decorators cost nothing
+unless profiling is switched on.
+
+The wrappers take up to six positional arguments and no keywords: *args and
+**kwargs would build a tuple and a dict on every call.
+"""
+
+import utime
+from array import array
+
+BUCKETS = 24  # Bucket k holds durations in [2^(k-1), 2^k) us; the last one is open-ended
+MAX_DEPTH = 16  # Deepest nesting of profiled calls tracked for self time
+_NO = object()  # Marks a wrapper argument the caller left out
+
+
+def _call(fn, a, b, c, d, e, f):
+    """fn with the arguments a wrapper was actually given."""
+    if c is _NO:
+        return fn() if a is _NO else fn(a) if b is _NO else fn(a, b)
+    if e is _NO:
+        return fn(a, b, c) if d is _NO else fn(a, b, c, d)
+    return fn(a, b, c, d, e) if f is _NO else fn(a, b, c, d, e, f)
+
+
+class Profiler:
+    def __init__(self, enabled=True, max_functions=8):
+        self.enabled = enabled
+        self.names = []
+        self.count = array('I', [0] * max_functions)
+        self.total_us = array('I', [0] * max_functions)
+        self.self_us = array('I', [0] * max_functions)
+        self.min_us = array('I', [0] * max_functions)
+        self.max_us = array('I', [0] * max_functions)
+        self.hist = array('I', [0] * (max_functions * BUCKETS))
+        self._child_us = array('I', [0] * (MAX_DEPTH + 1))  # Callee time per open call
+        self._depth = 0
+
+    def wrap(self, name):
+        """Decorator recording each call under name; a no-op when disabled."""
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+            slot = self._slot(name)
+
+            def profiled(a=_NO, b=_NO, c=_NO, d=_NO, e=_NO, f=_NO):
+                depth = self._enter()
+                start = utime.ticks_us()
+                try:
+                    return _call(fn, a, b, c, d, e, f)
+                finally:
+                    self._leave(slot, depth, start)
+            return profiled
+        return decorate
+
+    def wrap_async(self, name):
+        """
+        wrap() for a coroutine function. Self time assumes only one task at a time is
+        inside profiled coroutines; plain profiled calls from other tasks are fine.
+        """
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+            slot = self._slot(name)
+
+            async def profiled(a=_NO, b=_NO, c=_NO, d=_NO, e=_NO, f=_NO):
+                depth = self._enter()
+                start = utime.ticks_us()
+                try:
+                    return await _call(fn, a, b, c, d, e, f)
+                finally:
+                    self._leave(slot, depth, start)
+            return profiled
+        return decorate
+
+    def _slot(self, name):
+        if len(self.names) == len(self.count):
+            raise ValueError("profiler full: raise max_functions")
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def _enter(self):
+        depth = self._depth + 1
+        if depth <= MAX_DEPTH:
+            self._child_us[depth] = 0
+        self._depth = depth
+        return depth
+
+    def _leave(self, slot, depth, start):
+        elapsed = utime.ticks_diff(utime.ticks_us(), start)
+        self._depth = depth - 1
+        self._record(slot, depth, elapsed)
+
+    def _record(self, slot, depth, elapsed):
+        if depth <= MAX_DEPTH:
+            self.self_us[slot] += elapsed - self._child_us[depth]
+            self._child_us[depth - 1] += elapsed
+        if self.count[slot] == 0 or elapsed < self.min_us[slot]:
+            self.min_us[slot] = elapsed
+        if elapsed > self.max_us[slot]:
+            self.max_us[slot] = elapsed
+        self.count[slot] += 1
+        self.total_us[slot] += elapsed
+        bucket = 0
+        while elapsed and bucket < BUCKETS - 1:
+            elapsed >>= 1
+            bucket += 1
+        self.hist[slot * BUCKETS + bucket] += 1
+
+    def reset(self):
+        for arr in (self.count, self.total_us, self.self_us, self.min_us, self.max_us, self.hist):
+            for i in range(len(arr)):
+                arr[i] = 0
+
+    def report(self):
+        """Print one row per profiled function, then its non-empty histogram buckets."""
+        if not self.enabled:
+            return
+        print("%-26s %6s %10s %10s %9s %9s %9s" % ("function", "calls", "total_ms", "self_ms", "min_us", "mean_us", "max_us"))
+        for slot, name in enumerate(self.names):
+            n = self.count[slot]
+            if not n:
+                print("%-26s %6d" % (name, 0))
+                continue
+            print("%-26s %6d %10d %10d %9d %9d %9d" % (
+                name, n, self.total_us[slot] // 1000, self.self_us[slot] // 1000,
+                self.min_us[slot], self.total_us[slot] // n, self.max_us[slot]))
+            base = slot * BUCKETS
+            print("    <us:n " + " ".join("%d:%d" % (1 << k, self.hist[base + k])
+                                         for k in range(BUCKETS) if self.hist[base + k]))
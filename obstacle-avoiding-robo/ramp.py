@@ -0,0 +1,107 @@
+"""
+Timer-driven motor ramps.
+RampEngine.ramp() returns immediately; a periodic machine.Timer advances each motor's
+duty along an easing profile (an easing.py table) until it reaches the target, using
+integer math only. Ramps can be cancelled or retargeted in flight, e.g. when an
+obstacle shows up halfway through accelerating.
+Motors only need a .pwm with duty_u16() and a .current_duty attribute.
+"""
+
+from machine import Timer
+import utime
+from easing import LINEAR, SHIFT, SMOOTHSTEP, at
+
+
+class _Channel:
+    def __init__(self):
+        self.active = False
+        self.motor = None
+        self.start = 0
+        self.target = 0
+        self.t0 = 0
+        self.duration = 1
+        self.profile = LINEAR
+
+
+class RampEngine:
+    def __init__(self, step_ms=20, max_channels=2):
+        self.step_ms = step_ms
+        self._channels = [_Channel() for _ in range(max_channels)]
+        self._timer = None
+
+    def ramp(self, motors, target_duty, duration_ms, profile=SMOOTHSTEP):
+        """Start (or retarget) a ramp for each motor from its current duty; does not block."""
+        now = utime.ticks_ms()
+        for motor in motors:
+            ch = self._channel_for(motor)
+            ch.active = False  # Hide half-written fields from _tick
+            ch.motor = motor
+            ch.start = motor.current_duty
+            ch.target = target_duty
+            ch.t0 = now
+            ch.duration = max(1, duration_ms)
+            ch.profile = profile
+            ch.active = True
+        if self._timer is None:
+            self._timer = Timer()
+            self._timer.init(period=self.step_ms, mode=Timer.PERIODIC, callback=self._tick)
+
+    def retarget(self, target_duty, duration_ms=None, motor=None):
+        """Send in-flight ramps to a new target, continuing from where they are now."""
+        for ch in self._channels:
+            if ch.active and (motor is None or ch.motor is motor):
+                self.ramp((ch.motor,), target_duty, ch.duration if duration_ms is None else duration_ms, ch.profile)
+
+    def cancel(self, motor=None):
+        """Stop ramping (one motor or all); duty stays wherever the ramp had got to."""
+        for ch in self._channels:
+            if motor is None or ch.motor is motor:
+                ch.active = False
+
+    def busy(self, motor=None):
+        for ch in self._channels:
+            if ch.active and (motor is None or ch.motor is motor):
+                return True
+        return False
+
+    def target_of(self, motor):
+        """Target duty of the motor's in-flight ramp, or None."""
+        for ch in self._channels:
+            if ch.active and ch.motor is motor:
+                return ch.target
+        return None
+
+    def wait(self, motor=None):
+        """Block until the motor's ramp (or every ramp) has finished."""
+        while self.busy(motor):
+            utime.sleep_ms(self.step_ms)
+
+    def _channel_for(self, motor):
+        free = None
+        for ch in self._channels:
+            if ch.motor is motor:
+                return ch
+            if free is None and not ch.active:
+                free = ch
+        if free is None:
+            raise ValueError("no free ramp channel")
+        return free
+
+    def _tick(self, t):
+        now = utime.ticks_ms()
+        active = False
+        for ch in self._channels:
+            if not ch.active:
+                continue
+            elapsed = utime.ticks_diff(now, ch.t0)
+            if elapsed >= ch.duration:
+                duty = ch.target
+                ch.active = False
+            else:
+                duty = ch.start + ((ch.target - ch.start) * at(ch.profile, elapsed, ch.duration) >> SHIFT)
+                active = True
+            ch.motor.pwm.duty_u16(duty)
+            ch.motor.current_duty = duty
+        if not active and self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
@@ -0,0 +1,218 @@
+"""
+Interrupt-driven HC-SR04 ranging.
+A periodic Timer fires the trigger pulse, Pin.irq timestamps the echo edges and the
+finished pulse is converted (drivers.tof.EchoScale), filtered and published to a Mailbox. The control loop
+reads the newest distance and its age without ever waiting on the sensor.
+SonarArray fires several sensors in turn from one Timer so their bursts never overlap.
+"""
+
+from machine import Pin, Timer
+import utime
+from array import array
+from drivers.tof import EchoScale
+
+try:
+    from micropython import const, schedule
+except ImportError:  # CPython host: run deferred work inline
+    def const(x):
+        return x
+
+    def schedule(func, arg):
+        func(arg)
+
+
+ECHO_TIMEOUT_US = const(30000)  # Same limit as the blocking driver
+MAX_RANGE_MM = const(3000)
+
+# Echo capture states
+_IDLE = const(0)
+_ARMED = const(1)
+_RISEN = const(2)
+_DONE = const(3)
+
+
+class Mailbox:
+    """Single-slot store for the newest value; publish and read are both O(1)."""
+
+    def __init__(self):
+        self._value = None
+        self._stamp_ms = 0
+        self.seq = 0
+
+    def publish(self, value):
+        self._value = value
+        self._stamp_ms = utime.ticks_ms()
+        self.seq += 1
+
+    def read(self):
+        """Return (value, age_ms); value is None if nothing was published yet."""
+        while True:
+            seq = self.seq
+            value = self._value
+            stamp = self._stamp_ms
+            if seq == self.seq:
+                break
+        if value is None:
+            return None, None
+        return value, utime.ticks_diff(utime.ticks_ms(), stamp)
+
+
+class EchoRanger:
+    """
+    Background pinger for one HC-SR04.
+
+    on_echo(cm) is called with each in-range raw reading and returns the value to
+    publish (e.g. a filtered distance); when omitted the raw reading is published.
+    scale is the EchoScale used for the conversion (a fixed 20 C one by default).
+    """
+
+    def __init__(self, trigger, echo, period_ms=60, on_echo=None, scale=None):
+        self.trigger = trigger
+        self.echo = echo
+        self.period_ms = period_ms
+        self.on_echo = on_echo
+        self.scale = EchoScale() if scale is None else scale
+        self.mailbox = Mailbox()
+        self.pings = 0
+        self.timeouts = 0
+        self._edges = array('i', [0, 0])  # rise_us, fall_us
+        self._state = _IDLE
+        self._timer = None
+        # Bound method is allocated once here, not inside the IRQ
+        self._process_ref = self._process
+
+    def start(self):
+        """Ping now and then every period_ms."""
+        self.listen()
+        self._timer = Timer()
+        self._timer.init(period=self.period_ms, mode=Timer.PERIODIC, callback=self._tick)
+        self.fire()
+
+    def listen(self):
+        """Arm the echo IRQ only; pings are then fired by someone else (see SonarArray)."""
+        self._state = _IDLE
+        self.echo.irq(handler=self._edge, trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING, hard=True)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.echo.irq(handler=None)
+        self._state = _IDLE
+
+    def _edge(self, pin):
+        # Hard IRQ: timestamp only, no allocation
+        now = utime.ticks_us()
+        if self._state == _ARMED:
+            self._edges[0] = now
+            self._state = _RISEN
+        elif self._state == _RISEN:
+            self._edges[1] = now
+            self._state = _DONE
+            schedule(self._process_ref, 0)
+
+    def _tick(self, t):
+        self.fire()
+
+    def close(self):
+        """
+        End the current ping's listening window: a finished echo is processed now,
+        one still missing or still high counts as a timeout, and later edges are ignored.
+        """
+        if self._state == _DONE:
+            # Echo finished but its scheduled processing has not run yet
+            self._process(0)
+        elif self._state != _IDLE:
+            self.timeouts += 1
+        self._state = _IDLE
+
+    def fire(self):
+        """Send one ping; the echo is captured and published in the background."""
+        self.close()
+        self._state = _ARMED
+        self.trigger.value(1)
+        utime.sleep_us(10)
+        self.trigger.value(0)
+        self.pings += 1
+
+    def _process(self, _):
+        if self._state != _DONE:
+            return
+        self._state = _IDLE
+        duration = utime.ticks_diff(self._edges[1], self._edges[0])
+        if duration > ECHO_TIMEOUT_US:
+            self.timeouts += 1
+            return
+        mm = self.scale.mm(duration)
+        if mm > MAX_RANGE_MM:
+            return
+        distance = mm / 10
+        if self.on_echo is not None:
+            distance = self.on_echo(distance)
+        self.mailbox.publish(distance)
+
+
+class SonarArray:
+    """
+    Several EchoRangers (e.g. left, centre, right) behind one Timer.
+
+    Each slot_ms tick fires the next sensor in a round-robin, so only one burst is
+    in the air at a time and no sensor can pick up another's echo. slot_ms must
+    cover the longest echo (~38ms when nothing answers); every sensor is refreshed
+    once per len(names) * slot_ms.
+    """
+
+    def __init__(self, names, rangers, slot_ms=40):
+        self.names = tuple(names)
+        self.rangers = tuple(rangers)
+        self.slot_ms = slot_ms
+        self.stale_ms = 3 * slot_ms * len(self.rangers)  # Older readings count as missing
+        self.distances = array('f', [-1.0] * len(self.rangers))
+        self._next = 0
+        self._timer = None
+
+    def start(self):
+        for ranger in self.rangers:
+            ranger.listen()
+        self._next = 0
+        self._timer = Timer()
+        self._timer.init(period=self.slot_ms, mode=Timer.PERIODIC, callback=self._tick)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        for ranger in self.rangers:
+            ranger.stop()
+
+    def _tick(self, t):
+        # Close the previous sensor's window first: an echo it picks up from now on
+        # would be this burst (crosstalk), not its own
+        self.rangers[self._next - 1].close()
+        self.rangers[self._next].fire()
+        self._next = (self._next + 1) % len(self.rangers)
+
+    def index(self, name):
+        return self.names.index(name)
+
+    def read(self, name):
+        """Return (distance_cm, age_ms) for one direction; (None, None) before its first echo."""
+        return self.rangers[self.index(name)].mailbox.read()
+
+    def distance(self, name):
+        """Newest distance for one direction, or None if missing or stale."""
+        dist, age = self.read(name)
+        if dist is None or age > self.stale_ms:
+            return None
+        return dist
+
+    def vector(self):
+        """Refresh and return self.distances: one entry per name, -1 where missing or stale."""
+        for i, ranger in enumerate(self.rangers):
+            dist, age = ranger.mailbox.read()
+            self.distances[i] = -1.0 if dist is None or age > self.stale_ms else dist
+        return self.distances
+
+    def stats(self):
+        return " ".join("%s=%d/%d" % (name, ranger.timeouts, ranger.pings)
+                        for name, ranger in zip(self.names, self.rangers))
@@ -0,0 +1,87 @@
+"""
+Binary ring-buffer logger.
+event() packs a fixed-size record (timestamp, event id, up to 4 numeric args) into a
+preallocated bytearray; no string is built until the ring is drained. Draining
+either prints the records as text over serial or appends them raw to a file that
+rlog_decode.py turns back into text on the host. When the ring is full new records
+are dropped and counted.
+"""
+
+import struct
+import utime
+from log_events import EVENTS, LOG_DROPPED, RECORD_FMT, RECORD_SIZE, encode, format_record
+
+
+class RingLog:
+    def __init__(self, records=128, path=None):
+        """path=None drains to serial as text; otherwise raw records are appended to path."""
+        self.capacity = records
+        self.buf = bytearray(records * RECORD_SIZE)
+        self.path = path
+        self.head = 0  # Records written (next write slot = head % capacity)
+        self.tail = 0  # Records drained
+        self.dropped = 0
+
+    def pending(self):
+        return self.head - self.tail
+
+    def event(self, event, a=0, b=0, c=0, d=0):
+        if self.head - self.tail >= self.capacity:
+            self.dropped += 1
+            return
+        kinds = EVENTS[event][2]
+        n = len(kinds)
+        if n > 0:
+            a = encode(kinds[0], a)
+        if n > 1:
+            b = encode(kinds[1], b)
+        if n > 2:
+            c = encode(kinds[2], c)
+        if n > 3:
+            d = encode(kinds[3], d)
+        offset = (self.head % self.capacity) * RECORD_SIZE
+        struct.pack_into(RECORD_FMT, self.buf, offset, utime.ticks_ms(), event, a, b, c, d)
+        self.head += 1
+
+    def drain(self, limit=None):
+        """Empty the ring (or up to limit records) to the configured sink."""
+        if self.path is None:
+            self._drain_serial(limit)
+        else:
+            self._drain_file(limit)
+
+    def drain_if(self, fill):
+        """Drain only once the ring holds at least fill records; cheap to call every loop."""
+        if self.head - self.tail >= fill:
+            self.drain()
+
+    def _note_dropped(self):
+        if self.dropped:
+            dropped = self.dropped
+            self.dropped = 0
+            self.event(LOG_DROPPED, dropped)
+
+    def _drain_serial(self, limit):
+        count = 0
+        while self.tail != self.head and (limit is None or count < limit):
+            offset = (self.tail % self.capacity) * RECORD_SIZE
+            print(format_record(*struct.unpack_from(RECORD_FMT, self.buf, offset)))
+            self.tail += 1
+            count += 1
+            if self.tail == self.head:
+                self._note_dropped()
+
+    def _drain_file(self, limit):
+        with open(self.path, "ab") as f:
+            count = 0
+            while self.tail != self.head and (limit is None or count < limit):
+                # Write the contiguous run up to the end of the ring in one go
+                start = self.tail % self.capacity
+                run = min(self.head - self.tail, self.capacity - start)
+                if limit is not None:
+                    run = min(run, limit - count)
+                f.write(memoryview(self.buf)[start * RECORD_SIZE:(start + run) * RECORD_SIZE])
+                self.tail += run
+                count += run
+                if self.tail == self.head:
+                    self._note_dropped()
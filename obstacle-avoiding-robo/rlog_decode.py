@@ -0,0 +1,34 @@
+"""
+Host-side decoder for binary logs written by rlog.RingLog in file mode.
+Copy the log off the Pico (e.g. `mpremote cp :robot.log .`) and run:
+
+    python3 rlog_decode.py robot.log
+"""
+
+import struct
+import sys
+
+from log_events import RECORD_FMT, RECORD_SIZE, format_record
+
+
+def decode(data):
+    """Yield one text line per complete record in data."""
+    for offset in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+        yield format_record(*struct.unpack_from(RECORD_FMT, data, offset))
+
+
+def main(argv):
+    if len(argv) != 2:
+        print("usage: python3 rlog_decode.py <logfile>")
+        return 2
+    with open(argv[1], "rb") as f:
+        data = f.read()
+    for line in decode(data):
+        print(line)
+    if len(data) % RECORD_SIZE:
+        print("(ignored %d trailing bytes)" % (len(data) % RECORD_SIZE))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,194 @@
+"""
+Servo-swept HC-SR04 scanner.
+The sensor sits on a hobby servo (servo.py) and is stepped through a set of angles,
+sweeping back and forth; a single pass starts from the end nearer the servo, so
+passes alternate direction. The servo is sent on to the next angle as soon as the
+ping goes out, so each step takes the longer of the move and the listen window for
+the scan range, not their sum: an echo from range_cm is back within the window,
+before a hobby servo has turned far (it only picks up a new pulse at its next 20ms
+frame). With the defaults a 13-angle 180 degree pass takes about 430ms, plus about
+185ms to slew out to the first angle when it starts from centre.
+
+The result is a polar profile: profile[i] is the distance in cm at angles[i], or -1
+when nothing answered within range_cm (free as far as the scan can tell).
+"""
+
+from machine import Timer
+import utime
+from array import array
+from ranging import EchoRanger
+
+NO_ECHO = -1
+BUSY_RETRY_MS = 2  # Poll interval while the module is still answering the previous ping
+
+
+class Scanner:
+    """
+    servo: a servo.Servo; the sensor points straight ahead at centre_angle and angles
+    above it point left. trigger/echo: the sensor's Pins. scale: drivers.tof.EchoScale.
+    """
+
+    def __init__(self, servo, trigger, echo, angles, range_cm=200, ms_per_deg=2, settle_ms=5,
+                 centre_angle=90, scale=None):
+        self.servo = servo
+        self.angles = array('h', angles)
+        self.profile = array('h', [NO_ECHO] * len(self.angles))
+        self.range_cm = range_cm
+        self.ms_per_deg = ms_per_deg
+        self.settle_ms = settle_ms
+        self.centre_angle = centre_angle
+        # Round trip to range_cm at ~343 m/s, plus the module's burst latency
+        self.window_ms = range_cm * 2 * 10 // 343 + 2
+        self.ranger = EchoRanger(trigger, echo, on_echo=self._on_echo, scale=scale)
+        self.sweeps = 0  # Completed passes; each one refreshes every angle
+        self.running = False
+        self._index = 0  # Angle the servo is at or moving to
+        self._dir = 1
+        self._fired = 0  # Angle of the ping being listened for
+        self._ends_pass = False  # That ping is the last of a pass
+        self._ready_ms = 0  # When the servo reaches angles[_index]
+        self._angle = centre_angle
+        self._waiting = False
+        self._pass_start = 0
+        self._timer = None
+        # Bound methods allocated once, not per step
+        self._fire_ref = self._fire
+        self._step_ref = self._step
+
+    def start(self):
+        """Sweep continuously in the background."""
+        self.ranger.listen()
+        self._timer = Timer()
+        self.running = True
+        self._arm(self._move(), self._fire_ref)
+
+    def stop(self):
+        self.running = False
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.ranger.stop()
+        self._waiting = False
+
+    def begin(self):
+        """
+        Start a single pass from the end of angles nearer the servo (from centre: the
+        end the last pass finished at, so passes alternate); poll finished() until done.
+        """
+        last = len(self.angles) - 1
+        to_first = abs(self.angles[0] - self._angle)
+        to_last = abs(self.angles[last] - self._angle)
+        if to_first < to_last or (to_first == to_last and self._dir > 0):
+            self._index = 0
+            self._dir = 1
+        else:
+            self._index = last
+            self._dir = -1
+        self._pass_start = self.sweeps
+        self.start()
+
+    def finished(self):
+        """True once the pass begun by begin() is complete; the servo is then re-centred."""
+        if self.sweeps == self._pass_start:
+            return False
+        if self.running:
+            self.stop()
+            self.servo.set_angle(self.centre_angle)
+            self._angle = self.centre_angle
+        return True
+
+    def scan(self):
+        """Run one full pass (blocking) and return the profile."""
+        self.begin()
+        while not self.finished():
+            utime.sleep_ms(self.window_ms)
+        return self.profile
+
+    # --- step state machine (Timer and scheduled callbacks) ---
+
+    def _arm(self, ms, callback):
+        self._timer.init(mode=Timer.ONE_SHOT, period=max(1, ms), callback=callback)
+
+    def _move(self):
+        """Send the servo to angles[_index]; returns how long the move takes in ms."""
+        angle = self.angles[self._index]
+        travel = angle - self._angle if angle > self._angle else self._angle - angle
+        self.servo.set_angle(angle)
+        self._angle = angle
+        return self.settle_ms + travel * self.ms_per_deg
+
+    def _fire(self, t):
+        if not self.running:
+            return
+        if self.ranger.echo.value():
+            self._arm(BUSY_RETRY_MS, self._fire_ref)  # Still answering the previous ping
+            return
+        self.ranger.fire()  # Flushes any leftover echo before the flag goes up
+        self._fired = self._index
+        self._waiting = True
+        # Move on while the echo is in flight
+        last = len(self.angles) - 1
+        nxt = self._index + self._dir
+        self._ends_pass = last == 0 or nxt < 0 or nxt > last
+        if last > 0:
+            if nxt < 0 or nxt > last:
+                # End of a pass: turn around and re-use this end's reading
+                self._dir = -self._dir
+                nxt = self._index + self._dir
+            self._index = nxt
+        self._ready_ms = utime.ticks_add(utime.ticks_ms(), self._move())
+        self._arm(self.window_ms, self._step_ref)
+
+    def _on_echo(self, cm):
+        if self._waiting:
+            self._record(int(cm) if cm <= self.range_cm else NO_ECHO)
+        return cm
+
+    def _step(self, t):
+        # Listen window over: a missing echo is recorded now, the next ping waits for the servo
+        if self._waiting:
+            self._record(NO_ECHO)
+        wait = utime.ticks_diff(self._ready_ms, utime.ticks_ms())
+        if wait > 0:
+            self._arm(wait, self._fire_ref)
+        else:
+            self._fire(t)
+
+    def _record(self, cm):
+        self._waiting = False
+        self.profile[self._fired] = cm
+        if self._ends_pass:
+            self.sweeps += 1
+
+    # --- reading the profile ---
+
+    def clearance(self, i):
+        """Distance at angles[i], with no echo counted as range_cm."""
+        cm = self.profile[i]
+        return self.range_cm if cm == NO_ECHO else cm
+
+    def _room(self, i):
+        """clearance(i) taken as the minimum over it and its neighbours: the chassis is wider than the beam."""
+        cm = self.clearance(i)
+        if i > 0 and self.clearance(i - 1) < cm:
+            cm = self.clearance(i - 1)
+        if i < len(self.angles) - 1 and self.clearance(i + 1) < cm:
+            cm = self.clearance(i + 1)
+        return cm
+
+    def side_distances(self):
+        """
+        (left_cm, right_cm): the most room at any angle on each side of straight ahead,
+        so the side chosen holds the freest heading the chassis fits through.
+        """
+        left_cm = None
+        right_cm = None
+        for i in range(len(self.angles)):
+            cm = self._room(i)
+            if self.angles[i] > self.centre_angle:
+                if left_cm is None or cm > left_cm:
+                    left_cm = cm
+            elif self.angles[i] < self.centre_angle:
+                if right_cm is None or cm > right_cm:
+                    right_cm = cm
+        return left_cm, right_cm
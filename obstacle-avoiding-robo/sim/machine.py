@@ -0,0 +1,212 @@
+"""
+Stand-in for MicroPython's machine module (Pin, PWM, Timer, ADC) on the virtual clock.
+Pins with the same id share state, like the real GPIO. Outside code (the world
+model) drives input pins with drive_pin() and watches outputs with on_write().
+"""
+
+import utime
+
+
+class _PinState:
+    def __init__(self):
+        self.value = 0
+        self.mode = None
+        self.handler = None
+        self.trigger = 0
+        self.write_hooks = []
+
+
+_pins = {}
+_pwms = {}
+_irq_count = 0  # Bumped on every delivered pin IRQ (lightsleep wakes on it)
+
+
+def _state(pin_id):
+    state = _pins.get(pin_id)
+    if state is None:
+        state = _pins[pin_id] = _PinState()
+    return state
+
+
+def on_write(pin_id, fn):
+    """Call fn(value) whenever the script writes pin_id."""
+    _state(pin_id).write_hooks.append(fn)
+
+
+def drive_pin(pin_id, value):
+    """Set an input pin from outside and deliver its edge IRQ, if armed."""
+    global _irq_count
+    state = _state(pin_id)
+    value = 1 if value else 0
+    if value == state.value:
+        return
+    state.value = value
+    edge = Pin.IRQ_RISING if value else Pin.IRQ_FALLING
+    if state.handler is not None and state.trigger & edge:
+        _irq_count += 1
+        state.handler(Pin(pin_id))
+
+
+def pwm_for(pin_id):
+    """The PWM instance attached to pin_id, or None."""
+    return _pwms.get(pin_id)
+
+
+def reset_state():
+    _pins.clear()
+    _pwms.clear()
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 4
+    IRQ_FALLING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self._s = _state(id)
+        if mode != -1:
+            self._s.mode = mode
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if v is None:
+            return self._s.value
+        self._s.value = 1 if v else 0
+        for fn in self._s.write_hooks:
+            fn(self._s.value)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    high = on
+    low = off
+
+    def toggle(self):
+        self.value(not self._s.value)
+
+    def irq(self, handler=None, trigger=IRQ_RISING | IRQ_FALLING, hard=False):
+        self._s.handler = handler
+        self._s.trigger = trigger if handler is not None else 0
+
+    def __repr__(self):
+        return "Pin(%s)" % (self.id,)
+
+
+class PWM:
+    def __init__(self, pin, freq=None, duty_u16=None):
+        self.pin = pin
+        self._freq = 0
+        self._duty = 0
+        _pwms[pin.id] = self
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = max(0, min(65535, int(d)))
+
+    def deinit(self):
+        self._duty = 0
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, mode=PERIODIC, period=-1, freq=-1, callback=None):
+        self._entry = None
+        if callback is not None:
+            self.init(mode=mode, period=period, freq=freq, callback=callback)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None):
+        self.deinit()
+        if freq > 0:
+            self._period_us = 1000000 // freq
+        else:
+            self._period_us = max(1, period) * 1000
+        self._mode = mode
+        self._callback = callback
+        self._due = utime.now_us() + self._period_us
+        self._entry = utime.schedule_at(self._due, self._fire)
+
+    def _fire(self):
+        if self._mode == Timer.PERIODIC:
+            self._due += self._period_us
+            self._entry = utime.schedule_at(self._due, self._fire)
+        else:
+            self._entry = None
+        if self._callback is not None:
+            self._callback(self)
+
+    def deinit(self):
+        if self._entry is not None:
+            utime.cancel(self._entry)
+            self._entry = None
+
+
+class ADC:
+    """Channel 4 reads the on-chip temperature sensor at adc_temperature_c."""
+
+    CORE_TEMP = 4
+    adc_temperature_c = 22.0
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def read_u16(self):
+        if self.channel == 4:
+            volts = 0.706 - (ADC.adc_temperature_c - 27) * 0.001721
+            return int(volts / 3.3 * 65535)
+        return 0
+
+
+def lightsleep(ms=None):
+    """Sleep until ms elapse or a pin IRQ is delivered, whichever comes first."""
+    deadline = None if ms is None else utime.now_us() + int(ms) * 1000
+    start_irqs = _irq_count
+    while _irq_count == start_irqs:
+        due = utime.next_event_us()
+        if due is None or (deadline is not None and due > deadline):
+            if deadline is not None:
+                utime.advance(deadline - utime.now_us())
+            return
+        utime.advance(due - utime.now_us())
+
+
+deepsleep = lightsleep
+
+
+def idle():
+    utime.advance(1000)
+
+
+def freq(hz=None):
+    return 150000000
+
+
+def unique_id():
+    return b"\x00SIMPICO"
+
+
+def reset():
+    raise SystemExit("machine.reset()")
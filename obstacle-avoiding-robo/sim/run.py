@@ -0,0 +1,223 @@
+"""
+Run a robot script unmodified against the simulator, faster than real time.
+
+    python3 sim/run.py dual_motor_main.py --seconds 60 --world room
+    python3 sim/run.py single_motor_main.py --world corridor --quiet
+    python3 sim/run.py dual_motor_main.py --entry calibrate_run --flash /tmp/pico
+    python3 sim/run.py dual_motor_main.py --set TELEMETRY=True --set TELEMETRY_HOST='"127.0.0.1"'
+
+The stand-in machine/utime modules in this folder shadow the real ones, the script
+is imported as a module (so its __main__ block does not run) and its entry point is
+called with the requested run time. asyncio runs on the same virtual clock. Files the
+script reads or writes (a calibration profile, LOG_FILE) live in the --flash folder,
+a fresh empty one unless given, so runs do not see each other's files.
+"""
+
+import _thread
+import argparse
+import ast
+import asyncio
+import importlib.util
+import io
+import math
+import os
+import selectors
+import sys
+import tempfile
+import time as _time
+
+_real_start_new_thread = _thread.start_new_thread
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+ROBOT_DIR = os.path.dirname(SIM_DIR)
+# Helper modules the scripts import from sibling projects (copied next to main.py on the Pico)
+SHARED_DIRS = [os.path.join(os.path.dirname(ROBOT_DIR), name)
+               for name in ("pico2w-drivers", "pico2w_temp_sensor", "pic2w-servo-example")]
+
+
+def install():
+    """
+    Put the stand-in modules ahead of everything else on sys.path, and have threads
+    the script starts (core 1) share the virtual clock.
+    """
+    paths = [SIM_DIR, ROBOT_DIR] + SHARED_DIRS
+    for path in paths:
+        if path in sys.path:
+            sys.path.remove(path)
+    sys.path[:0] = paths
+    import utime
+    if _thread.start_new_thread is _real_start_new_thread:
+        _thread.start_new_thread = lambda func, args, kwargs=None: utime.start_thread(
+            _real_start_new_thread, func, args, kwargs)
+
+
+class _VirtualSelector(selectors.SelectSelector):
+    """
+    Instead of blocking until the next asyncio timer, jump the virtual clock to it.
+    Real sockets (the control endpoint) are still polled, without waiting. With
+    realtime set the wait is real, and the virtual clock follows the wall clock.
+    """
+    realtime = False
+
+    def select(self, timeout=None):
+        import utime
+        if self.realtime:
+            start = _time.perf_counter()
+            events = super().select(timeout)
+            utime.advance(math.ceil((_time.perf_counter() - start) * 1000000))
+            return events
+        if timeout:
+            # Round up: float error can leave a sub-microsecond timeout that
+            # truncates to zero and spins the loop forever
+            utime.advance(math.ceil(timeout * 1000000))
+        return super().select(0)
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        super().__init__(_VirtualSelector())
+
+    def time(self):
+        import utime
+        return utime.now_us() / 1000000
+
+
+class _VirtualPolicy(asyncio.DefaultEventLoopPolicy):
+    def new_event_loop(self):
+        return VirtualEventLoop()
+
+
+def _import_path(path, params):
+    """
+    Import the script at path as a module named after the file, with the values of its
+    top-level NAME = ... assignments replaced from params, so even constants used
+    while it imports see them.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    missing = set(params)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            target = node.targets[0].id
+            if target in params:
+                node.value = ast.copy_location(ast.Constant(params[target]), node.value)
+                missing.discard(target)
+    if missing:
+        raise ValueError("%s has no top-level constant %s" % (name, ", ".join(sorted(missing))))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        exec(compile(tree, path, "exec"), module.__dict__)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def script_path(script):
+    """
+    The robot script's absolute path: as given, or for a bare file name that is not
+    in the current folder, the one in this project.
+    """
+    if not os.path.exists(script) and not os.path.dirname(script):
+        script = os.path.join(ROBOT_DIR, script)
+    return os.path.abspath(script)
+
+
+def load(script, world, params=None):
+    """
+    Import the robot script from its path and wire its motor and sensor pins into
+    world. The script's folder goes ahead of this project's on sys.path, so a copy
+    kept elsewhere runs with the helper modules kept beside it. params overrides
+    script constants from the start of the import, so flags that decide what gets
+    built (SCANNER, ENCODERS, SPEED_CONTROL) take effect too.
+    """
+    install()
+    asyncio.set_event_loop_policy(_VirtualPolicy())
+    path = script_path(script)
+    folder = os.path.dirname(path)
+    if folder in sys.path:
+        sys.path.remove(folder)
+    sys.path.insert(1, folder)  # Behind only the stand-in modules
+    module = _import_path(path, params or {})
+    right = None
+    if hasattr(module, "RIGHT_PWM"):
+        right = (module.RIGHT_PWM, module.RIGHT_IN1, module.RIGHT_IN2)
+    world.attach((module.LEFT_PWM, module.LEFT_IN1, module.LEFT_IN2), right,
+                 module.TRIG_PIN, module.ECHO_PIN)
+    if hasattr(module, "LEFT_TRIG_PIN"):
+        # Side sensors, left positive (counter-clockwise from the heading)
+        angle = getattr(module, "SIDE_SENSOR_ANGLE_DEG", 45)
+        world.attach_sonar(module.LEFT_TRIG_PIN, module.LEFT_ECHO_PIN, angle)
+        world.attach_sonar(module.RIGHT_TRIG_PIN, module.RIGHT_ECHO_PIN, -angle)
+    if hasattr(module, "SCAN_SERVO_PIN"):
+        world.attach_servo(module.SCAN_SERVO_PIN, module.ECHO_PIN)
+    if getattr(module, "odometry", None) is not None:
+        # The right encoder is mounted mirrored, so its quadrature phase is inverted
+        ticks_per_m = module.ENCODER_TICKS_PER_REV / (math.pi * module.WHEEL_DIAMETER_MM / 1000)
+        world.attach_encoder("left", module.LEFT_ENC_A, module.LEFT_ENC_B, ticks_per_m)
+        world.attach_encoder("right", module.RIGHT_ENC_A, module.RIGHT_ENC_B, ticks_per_m, invert=True)
+    return module
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("script", help="robot script, e.g. dual_motor_main.py")
+    parser.add_argument("--seconds", type=float, default=60, help="virtual run time passed to the entry point")
+    parser.add_argument("--world", default="room", help="room, corridor, clutter or corner")
+    parser.add_argument("--entry", default="simplified_run", help="entry point, e.g. async_run")
+    parser.add_argument("--quiet", action="store_true", help="hide the script's own output")
+    parser.add_argument("--battery", type=float, default=1.0,
+                        help="wheel speed as a fraction of nominal, e.g. 0.8 for a tired battery")
+    parser.add_argument("--mismatch", type=float, default=1.0,
+                        help="right wheel speed relative to the left, e.g. 0.9 (dual motor)")
+    parser.add_argument("--flash", help="folder standing in for the Pico filesystem (default: a new empty one)")
+    parser.add_argument("--realtime", action="store_true",
+                        help="asyncio runtime: run at wall-clock speed, e.g. to use the control endpoint by hand")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a script constant before the script is imported (repeatable)")
+    args = parser.parse_args(argv)
+    params = {}
+    for item in args.set:
+        name, _, value = item.partition("=")
+        params[name] = ast.literal_eval(value)
+
+    install()
+    import utime
+    from world import make_world
+
+    world = make_world(args.world)
+    world.max_wheel_m_s *= args.battery
+    world.right_wheel_scale = args.mismatch
+    _VirtualSelector.realtime = args.realtime
+    if args.flash:
+        os.makedirs(args.flash, exist_ok=True)
+    script = script_path(args.script)  # Before leaving the current folder
+    os.chdir(args.flash or tempfile.mkdtemp(prefix="pico-"))
+    captured = io.StringIO()
+    real_stdout = sys.stdout
+    if args.quiet:
+        sys.stdout = captured
+    wall_start = _time.perf_counter()
+    try:
+        module = load(script, world, params)
+        getattr(module, args.entry)(int(args.seconds * 1000))
+    finally:
+        sys.stdout = real_stdout
+    wall = _time.perf_counter() - wall_start
+    world.flush()
+    virtual = utime.now_us() / 1000000
+
+    print("--- simulation ---")
+    print("world=%s virtual=%.1fs wall=%.3fs speedup=%.0fx" % (args.world, virtual, wall, virtual / max(wall, 1e-9)))
+    print("travelled=%.2fm mean_speed=%.2fm/s collisions=%d min_clearance=%.3fm pings=%d crosstalk=%d" % (
+        world.odometer_m, world.odometer_m / max(virtual, 1e-9), world.collisions, world.min_clearance_m or 0,
+        world.pings, world.crosstalk))
+    print("pose x=%.2f y=%.2f heading=%.0fdeg" % (world.x, world.y, world.theta * 57.29578 % 360))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Stand-in for MicroPython's utime backed by a virtual clock.
+Time only moves when the script sleeps (or busy-polls ticks_us), and every pending
+event (Timer callbacks, echo edges) fires at its exact virtual time on the way.
+
+Threads started with start_thread() (what _thread.start_new_thread becomes under
+sim/run.py) share the clock like two cores share the timer: it only moves once every
+one of them is waiting on it, and then only to the earliest wake-up, so no thread
+ever sees time jump past a moment it asked to be woken at.
+"""
+
+import heapq
+import threading
+
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+BUSY_POLL_US = 10  # Virtual cost of one ticks_us() call, so busy-wait loops make progress
+
+_now_us = 0
+_events = []  # heap of (due_us, seq, callback)
+_seq = 0
+_listeners = []  # called as fn(from_us, to_us) before time moves
+_cv = threading.Condition(threading.RLock())  # Guards all of the above
+_threads = {}  # Threads sharing the clock: key -> wake-up time, None while running
+_firing = 0  # >0 while advance() runs event callbacks (which may read the clock)
+
+
+def now_us():
+    """Absolute virtual time (not wrapped)."""
+    return _now_us
+
+
+def schedule_at(due_us, callback):
+    """Run callback() when the clock reaches due_us; returns a handle for cancel()."""
+    global _seq
+    with _cv:
+        _seq += 1
+        entry = [due_us, _seq, callback]
+        heapq.heappush(_events, entry)
+    return entry
+
+
+def cancel(entry):
+    entry[2] = None
+
+
+def next_event_us():
+    while _events and _events[0][2] is None:
+        heapq.heappop(_events)
+    return _events[0][0] if _events else None
+
+
+def add_listener(fn):
+    _listeners.append(fn)
+
+
+def _move_to(t_us):
+    global _now_us
+    if t_us <= _now_us:
+        return
+    for fn in _listeners:
+        fn(_now_us, t_us)
+    _now_us = t_us
+
+
+def advance(us):
+    """Move the clock forward by us, firing due events in order."""
+    with _cv:
+        target = _now_us + int(us)
+        me = threading.get_ident()
+        if _firing or len(_threads) < 2 or me not in _threads:
+            _run_to(target)
+            return
+        # Several threads: wait until all of them wait, then the earliest moves time
+        _threads[me] = target
+        _cv.notify_all()
+        try:
+            while _now_us < target:
+                waits = _threads.values()
+                if None not in waits and min(waits) == target:
+                    _run_to(target)
+                    _cv.notify_all()
+                else:
+                    _cv.wait()
+        finally:
+            _threads[me] = None
+
+
+def _run_to(target):
+    global _firing
+    _firing += 1
+    try:
+        while True:
+            due = next_event_us()
+            if due is None or due > target:
+                break
+            _, _, callback = heapq.heappop(_events)
+            _move_to(due)
+            callback()
+        _move_to(target)
+    finally:
+        _firing -= 1
+
+
+def start_thread(start_new_thread, func, args, kwargs=None):
+    """
+    Start func(*args) with start_new_thread (the real _thread one) as a thread that
+    shares this clock with the thread starting it (see advance()).
+    """
+    token = object()  # Holds the new thread's place until it knows its ident
+    with _cv:
+        _threads.setdefault(threading.get_ident(), None)
+        _threads[token] = None
+
+    def body():
+        me = threading.get_ident()
+        with _cv:
+            del _threads[token]
+            _threads[me] = None
+        try:
+            func(*args, **(kwargs or {}))
+        finally:
+            with _cv:
+                del _threads[me]
+                _cv.notify_all()
+
+    return start_new_thread(body, ())
+
+
+def reset():
+    global _now_us, _seq
+    _now_us = 0
+    _seq = 0
+    del _events[:]
+    del _listeners[:]
+    _threads.clear()
+
+
+def ticks_us():
+    advance(BUSY_POLL_US)
+    return _now_us & TICKS_MAX
+
+
+def ticks_ms():
+    return (_now_us // 1000) & TICKS_MAX
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & TICKS_MAX
+
+
+def ticks_diff(ticks1, ticks2):
+    diff = (ticks1 - ticks2) & TICKS_MAX
+    if diff >= TICKS_PERIOD // 2:
+        diff -= TICKS_PERIOD
+    return diff
+
+
+def sleep_us(us):
+    advance(us)
+
+
+def sleep_ms(ms):
+    advance(int(ms) * 1000)
+
+
+def sleep(seconds):
+    advance(int(seconds * 1000000))
+
+
+def time():
+    return _now_us / 1000000
+
+
+def time_ns():
+    return _now_us * 1000
@@ -0,0 +1,314 @@
+"""
+2-D world for the robot simulator.
+Walls are line segments. The robot is a differential-drive disc whose wheel speeds
+follow the TB6612FNG PWM duty and direction pins, and the HC-SR04 echo is produced
+by ray-casting from the sensor along the robot's heading. Several sensors can be
+attached at different angles; a ping fired while another sensor's burst is still in
+the air hears that burst instead of its own echo (crosstalk).
+"""
+
+import math
+
+import machine
+import utime
+
+HCSR04_MAX_M = 4.0
+HCSR04_NO_ECHO_US = 38000  # Pulse width the module returns when nothing echoes
+HCSR04_LATENCY_US = 450  # Trigger fall to echo rise (8-cycle burst)
+HCSR04_CONE_DEG = 15  # Full beam width; sampled with a few rays
+STEP_US = 2000  # Physics step
+
+
+def _ray_hit(ox, oy, dx, dy, wall):
+    """Distance along (dx, dy) from (ox, oy) to the segment, or None."""
+    (x1, y1), (x2, y2) = wall
+    ex, ey = x2 - x1, y2 - y1
+    denom = dx * ey - dy * ex
+    if abs(denom) < 1e-12:
+        return None
+    t = ((x1 - ox) * ey - (y1 - oy) * ex) / denom
+    u = ((x1 - ox) * dy - (y1 - oy) * dx) / denom
+    if t >= 0 and 0 <= u <= 1:
+        return t
+    return None
+
+
+def _point_segment_distance(px, py, wall):
+    (x1, y1), (x2, y2) = wall
+    ex, ey = x2 - x1, y2 - y1
+    length2 = ex * ex + ey * ey
+    t = 0 if length2 == 0 else max(0, min(1, ((px - x1) * ex + (py - y1) * ey) / length2))
+    return math.hypot(px - (x1 + t * ex), py - (y1 + t * ey))
+
+
+def box(x1, y1, x2, y2):
+    """Four wall segments for an axis-aligned rectangle."""
+    return [((x1, y1), (x2, y1)), ((x2, y1), (x2, y2)), ((x2, y2), (x1, y2)), ((x1, y2), (x1, y1))]
+
+
+class World:
+    def __init__(self, walls, x=0.0, y=0.0, heading_deg=0.0):
+        self.walls = list(walls)
+        self.x = x
+        self.y = y
+        self.theta = math.radians(heading_deg)
+        # Chassis
+        self.radius_m = 0.09
+        self.track_m = 0.14  # Wheel separation
+        self.max_wheel_m_s = 0.5  # Wheel speed at full duty
+        self.deadband = 0.15  # Duty fraction below which the wheels do not turn
+        self.right_wheel_scale = 1.0  # Right wheel speed relative to the left (gearbox/motor mismatch)
+        self.sensor_offset_m = 0.08  # Sensor ahead of the axle
+        # Stats
+        self.odometer_m = 0.0
+        self.collisions = 0
+        self.min_clearance_m = None
+        self.pings = 0
+        self.crosstalk = 0  # Pings answered by another sensor's burst
+        self._air_until_us = 0  # When the last burst has died away
+        self._air_echo = None
+        self._servos = {}  # echo pin -> servo PWM pin the sensor is mounted on
+        self._left = None
+        self._right = None
+        self._colliding = False
+        self._pending_us = 0  # Clock time not yet integrated (see _integrate)
+        self._clock_us = 0  # Virtual time the integration has reached
+        self._encoders = []
+
+    # --- geometry ---
+
+    def cast(self, angle, ox=None, oy=None):
+        """Nearest wall distance along angle from the sensor (or ox, oy)."""
+        if ox is None:
+            ox = self.x + self.sensor_offset_m * math.cos(self.theta)
+            oy = self.y + self.sensor_offset_m * math.sin(self.theta)
+        dx, dy = math.cos(angle), math.sin(angle)
+        best = None
+        for wall in self.walls:
+            d = _ray_hit(ox, oy, dx, dy, wall)
+            if d is not None and (best is None or d < best):
+                best = d
+        return best
+
+    def sonar_m(self, offset_deg=0.0):
+        """HC-SR04 range: nearest hit across the beam cone, or None beyond range."""
+        centre = self.theta + math.radians(offset_deg)
+        half = math.radians(HCSR04_CONE_DEG) / 2
+        best = None
+        for k in (-1, -0.5, 0, 0.5, 1):
+            d = self.cast(centre + k * half)
+            if d is not None and (best is None or d < best):
+                best = d
+        if best is None or best > HCSR04_MAX_M:
+            return None
+        return best
+
+    def clearance_m(self):
+        return min(_point_segment_distance(self.x, self.y, w) for w in self.walls) - self.radius_m
+
+    # --- hardware binding ---
+
+    def attach(self, left, right=None, trig=None, echo=None):
+        """
+        Bind motor channels (pwm_pin, in1_pin, in2_pin) and the sensor pins.
+        With no right channel both wheels follow the left one (single-motor car).
+        """
+        self._left = self._resolve(left)
+        self._right = self._resolve(right) if right is not None else self._left
+        if trig is not None:
+            self.attach_sonar(trig, echo)
+        utime.add_listener(self._integrate)
+
+    def attach_sonar(self, trig, echo, offset_deg=0.0):
+        """Answer each trigger pulse (falling edge) on trig with an echo pulse on echo."""
+        level = [0]
+
+        def on_trigger(value):
+            if level[0] and not value:
+                self._ping(echo, offset_deg)
+            level[0] = value
+        machine.on_write(trig, on_trigger)
+
+    def attach_servo(self, servo_pin, echo):
+        """
+        Mount the sonar answering on echo on a 50Hz hobby servo driven from servo_pin:
+        1000-2000us pulses sweep it 0-180 degrees, 1500us pointing straight ahead.
+        The servo moves instantly; the script's own slew delay stands in for travel.
+        """
+        self._servos[echo] = servo_pin
+
+    def _servo_offset_deg(self, echo):
+        pwm = machine.pwm_for(self._servos[echo])
+        if pwm is None or not pwm.freq() or not pwm.duty_u16():
+            return 0.0
+        pulse_us = pwm.duty_u16() / 65535 * 1000000 / pwm.freq()
+        return (pulse_us - 1500) / 1000 * 180
+
+    def attach_encoder(self, side, pin_a, pin_b=None, ticks_per_m=100.0, invert=False):
+        """
+        Pulse pin_a once per 1/ticks_per_m of travel of the left or right wheel, at the
+        exact virtual time the wheel gets there. With pin_b, a quadrature channel: B is
+        low on A's rising edge going forwards (high with invert, for a mirrored mount).
+        Wheels keep turning when the chassis is stuck against a wall, like real slip.
+        """
+        self._encoders.append(_Encoder(side, pin_a, pin_b, ticks_per_m, invert))
+
+    def _update_encoders(self, v_left, v_right, dt):
+        for enc in self._encoders:
+            v = v_left if enc.side == "left" else v_right
+            enc.pos_m += v * dt
+            if v != enc.v or (v != 0 and enc.event is None):
+                enc.v = v
+                self._predict(enc)
+
+    def _predict(self, enc):
+        # Edges are only driven from their own event, never from inside a clock listener,
+        # so the encoder IRQ (which reads ticks_us) sees a settled clock
+        if enc.event is not None:
+            utime.cancel(enc.event)
+            enc.event = None
+        if enc.target() != enc.count:
+            wait_us = 0
+        elif enc.v != 0:
+            edge = (enc.count + (1 if enc.v > 0 else 0)) / enc.ticks_per_m
+            wait_us = max(1, math.ceil((edge - enc.pos_m) / enc.v * 1000000))
+        else:
+            return
+        enc.event = utime.schedule_at(self._clock_us + wait_us, lambda: self._encoder_edge(enc))
+
+    def _encoder_edge(self, enc):
+        enc.event = None
+        self.flush()
+        enc.emit()
+        self._predict(enc)
+
+    def _ping(self, echo, offset_deg):
+        self.flush()
+        if echo in self._servos:
+            offset_deg += self._servo_offset_deg(echo)
+        self.pings += 1
+        now = utime.now_us()
+        rise = now + HCSR04_LATENCY_US
+        if now < self._air_until_us and echo != self._air_echo:
+            # Another sensor's burst is still bouncing around: hear that instead
+            self.crosstalk += 1
+            width = max(1, self._air_until_us - rise)
+        else:
+            d = self.sonar_m(offset_deg)
+            # Air is at the on-chip sensor's temperature (machine.ADC.adc_temperature_c)
+            speed = 331.3 + 0.606 * machine.ADC.adc_temperature_c
+            width = HCSR04_NO_ECHO_US if d is None else int(2 * d / speed * 1000000)
+            # The burst is audible until its echo returns (or out to max range)
+            self._air_until_us = rise + min(width, int(2 * HCSR04_MAX_M / speed * 1000000))
+            self._air_echo = echo
+        utime.schedule_at(rise, lambda: machine.drive_pin(echo, 1))
+        utime.schedule_at(rise + width, lambda: machine.drive_pin(echo, 0))
+
+    @staticmethod
+    def _resolve(channel):
+        pwm_pin, in1, in2 = channel
+        return machine.pwm_for(pwm_pin), machine.Pin(in1), machine.Pin(in2)
+
+    def _wheel_m_s(self, channel):
+        pwm, in1, in2 = channel
+        if pwm is None:
+            return 0.0
+        a = in1.value()
+        b = in2.value()
+        if a == b:
+            return 0.0  # Brake or coast
+        duty = pwm.duty_u16() / 65535
+        if duty <= self.deadband:
+            return 0.0
+        speed = (duty - self.deadband) / (1 - self.deadband) * self.max_wheel_m_s
+        return speed if a else -speed
+
+    # --- kinematics ---
+
+    def _integrate(self, from_us, to_us):
+        # Busy-polls move the clock a few microseconds at a time; stepping the
+        # physics on each of those dominates the run, so collect time into
+        # STEP_US chunks. Wheel commands inside a chunk land up to one chunk late.
+        self._pending_us += to_us - from_us
+        self._clock_us = to_us
+        if self._pending_us >= STEP_US:
+            self.flush()
+
+    def flush(self):
+        """Integrate the motion owed for clock time already passed."""
+        remaining = self._pending_us / 1000000
+        self._pending_us = 0
+        if self._left is None:
+            return
+        v_left = self._wheel_m_s(self._left)
+        v_right = self._wheel_m_s(self._right)
+        if self._right is not self._left:
+            v_right *= self.right_wheel_scale
+        if self._encoders:
+            self._update_encoders(v_left, v_right, remaining)
+        if v_left == 0 and v_right == 0:
+            return
+        v = (v_left + v_right) / 2
+        omega = (v_right - v_left) / self.track_m
+        while remaining > 0:
+            dt = min(remaining, STEP_US / 1000000)
+            remaining -= dt
+            theta = self.theta + omega * dt
+            nx = self.x + v * dt * math.cos(self.theta + omega * dt / 2)
+            ny = self.y + v * dt * math.sin(self.theta + omega * dt / 2)
+            self.theta = theta
+            old = (self.x, self.y)
+            self.x, self.y = nx, ny
+            clearance = self.clearance_m()
+            if clearance < 0:
+                # Bumped a wall: stay put (wheels slip), count each new contact once
+                self.x, self.y = old
+                if not self._colliding:
+                    self.collisions += 1
+                self._colliding = True
+                clearance = 0
+            else:
+                self._colliding = False
+                self.odometer_m += abs(v) * dt
+            if self.min_clearance_m is None or clearance < self.min_clearance_m:
+                self.min_clearance_m = clearance
+
+
+class _Encoder:
+    def __init__(self, side, pin_a, pin_b, ticks_per_m, invert):
+        self.side = side
+        self.pin_a = pin_a
+        self.pin_b = pin_b
+        self.ticks_per_m = ticks_per_m
+        self.invert = invert
+        self.pos_m = 0.0  # Wheel travel
+        self.count = 0  # Edges emitted, net of direction
+        self.v = 0.0
+        self.event = None
+
+    def target(self):
+        return math.floor(self.pos_m * self.ticks_per_m + 1e-9)
+
+    def emit(self):
+        target = self.target()
+        while self.count != target:
+            forward = target > self.count
+            self.count += 1 if forward else -1
+            if self.pin_b is not None:
+                machine.drive_pin(self.pin_b, forward == self.invert)
+            machine.drive_pin(self.pin_a, 1)
+            machine.drive_pin(self.pin_a, 0)
+
+
+def make_world(name):
+    """Preset worlds; the robot starts near the middle facing +x."""
+    if name == "room":
+        return World(box(0, 0, 3, 2), x=0.6, y=1.0)
+    if name == "corridor":
+        return World(box(0, 0, 6, 0.8), x=0.5, y=0.4)
+    if name == "clutter":
+        walls = box(0, 0, 4, 3) + box(1.6, 0.8, 2.0, 1.4) + box(2.8, 1.8, 3.2, 2.4) + box(0.8, 2.0, 1.1, 2.3)
+        return World(walls, x=0.5, y=1.2)
+    if name == "corner":
+        return World(box(0, 0, 1.5, 1.5), x=0.4, y=0.4, heading_deg=45)
+    raise ValueError("unknown world %r (room, corridor, clutter, corner)" % name)
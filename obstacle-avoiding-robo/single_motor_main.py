@@ -6,16 +6,33 @@ Designed for quick testing on the Pico. Keep wiring constants in the
 pins section in sync with your hardware.
 """
 
-from machine import Pin, PWM
+from machine import Pin
 import utime
-from utime import sleep, sleep_us
+from utime import sleep
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+import drivers  # pico2w-drivers/drivers
+from drivers.tof import EchoScale
+from rlog import RingLog
+try:
+    from temp_sensor import read_temperature  # pico2w_temp_sensor/temp_sensor.py
+except ImportError:
+    read_temperature = None  # Speed of sound fixed at 20 C
+import log_events as ev
+import easing
+from ramp import RampEngine
+from ttc import BrakeModel, ClosingRate
+from statusled import StatusLed, BOOTING, RUNNING
 
 
 # --- MOTOR PINS ---
-STBY_PIN = 12
-LEFT_PWM = 15
-LEFT_IN1 = 14
-LEFT_IN2 = 13
+STBY_PIN = const(12)
+LEFT_PWM = const(15)
+LEFT_IN1 = const(14)
+LEFT_IN2 = const(13)
 
 # NOT USING RIGHT MOTOR
 # RIGHT_PWM = 18
@@ -23,8 +40,9 @@ LEFT_IN2 = 13
 # RIGHT_IN2 = 20
 
 # HSR04
-TRIG_PIN = 16
-ECHO_PIN = 17
+TRIG_PIN = const(16)
+ECHO_PIN = const(17)
+TEMP_REFRESH_MS = 30000  # Re-read the on-chip temperature for the speed of sound this often
 
 # behavior
 THRESHOLD_CM = 30
@@ -37,167 +55,173 @@ DECEL_RAMP_MS = 150  # Faster deceleration when obstacle detected
 RESUME_RAMP_MS = 250  # Slower ramp when resuming forward
 ADAPTIVE_THRESHOLD_MULT = 1.5  # Start slowing at 1.5x threshold
 MAX_REVERSE_MS = 3000  # Maximum reverse duration as safety timeout (2 seconds)
+TTC_BRAKING = True  # Brake on time to collision (ttc.py) instead of at THRESHOLD_CM
+TTC_CRUISE_SPEED = 90  # Open-space cruise with TTC_BRAKING; eases to CRUISE_SPEED as TTC drops
+STOP_GAP_CM = 15  # Gap TTC braking aims to leave in front of the obstacle
+TTC_MARGIN_S = 0.15  # Brake this long before the learned stop time would close the gap
+TTC_SLOW_S = 1.5  # Start easing off below this time to collision
+CLOSING_SAMPLES = 6  # Readings in the closing-rate fit
+
+# logging
+LOG_DEBUG = const(1)  # 0 compiles out the per-call/per-iteration debug records
+LOG_RECORDS = 128  # Ring capacity; records beyond it are dropped and counted
+LOG_DRAIN_AT = 64  # Loop drains the ring once it holds this many records
+LOG_FILE = None  # None prints records over serial; a path appends raw records (decode with rlog_decode.py)
 
 # PWM
-PWM_FREQ = 10000
-MAX_DUTY = 65535
+PWM_FREQ = const(10000)
+MAX_DUTY = const(65535)
+BACKGROUND_RAMPS = True  # forward() returns at once; the ramp finishes on a Timer while sensing continues
+RAMP_STEP_MS = 20  # Ramp engine Timer period
 
+# Ramp easing per maneuver (easing.py: LINEAR, SMOOTHSTEP, SMOOTHERSTEP, TRAPEZOID, SCURVE)
+RESUME_PROFILE = easing.LINEAR  # forward(): resume and adaptive speed changes
+DECEL_PROFILE = easing.LINEAR  # Ramps down to a stop
+REVERSE_PROFILE = easing.LINEAR  # Reverse spin-up
 
-def _log(tag, msg=""):
-    try:
-        ts = utime.ticks_ms()
-    except Exception:
-        ts = int(utime.time() * 1000)
-    print("[{}ms] {}: {}".format(ts, tag, msg))
-
-
-class Motor:
-    def __init__(self, pwm_pin, in1, in2):
-        _log("Motor.__init__", "pwm=%s in1=%s in2=%s" % (pwm_pin, in1, in2))
-        self.pwm = PWM(Pin(pwm_pin))
-        self.pwm.freq(PWM_FREQ)
-        self.pwm.duty_u16(0)
-        self.current_duty = 0
-        self.in1 = Pin(in1, Pin.OUT)
-        self.in2 = Pin(in2, Pin.OUT)
-        self.in1.off()
-        self.in2.off()
+# boot
+FAST_BOOT = True  # Drive at the first reading with the LED pattern on a Timer, instead of blink_led()'s 3s
+BOOT_PING_TIMEOUT_MS = 300  # Drive anyway if no echo by then (nothing in range)
+BOOT_POLL_MS = 5  # Pause between first-reading pings that found nothing
+STATUS_STEP_MS = 50  # LED pattern step (statusled.py)
+
+
+rlog = RingLog(LOG_RECORDS, LOG_FILE)
+
+
+class Motor(drivers.Motor):
+    """drivers.Motor on the shared RampEngine; a direct set cancels this motor's ramp."""
+
+    def __init__(self, pwm_pin, in1, in2, ramps):
+        rlog.event(ev.MOTOR_INIT, pwm_pin, in1, in2)
+        super().__init__(pwm_pin, in1, in2, PWM_FREQ)
+        self.ramps = ramps
 
     def forward(self, speed=100):
-        speed = max(0, min(100, speed))
-        _log("Motor.forward", "speed=%s" % speed)
-        self.in1.on()
-        self.in2.off()
-        duty = int((speed / 100) * MAX_DUTY)
-        self.pwm.duty_u16(duty)
-        self.current_duty = duty
+        if LOG_DEBUG:
+            rlog.event(ev.MOTOR_FORWARD, speed)
+        self.ramps.cancel(self)
+        super().forward(speed)
 
     def reverse(self, speed=100):
-        speed = max(0, min(100, speed))
-        _log("Motor.reverse", "speed=%s" % speed)
-        self.in1.off()
-        self.in2.on()
-        duty = int((speed / 100) * MAX_DUTY)
-        self.pwm.duty_u16(duty)
-        self.current_duty = duty
+        if LOG_DEBUG:
+            rlog.event(ev.MOTOR_REVERSE, speed)
+        self.ramps.cancel(self)
+        super().reverse(speed)
 
     def stop(self):
-        _log("Motor.stop", "")
-        self.pwm.duty_u16(0)
-        self.current_duty = 0
-        self.in1.off()
-        self.in2.off()
+        if LOG_DEBUG:
+            rlog.event(ev.MOTOR_STOP)
+        self.ramps.cancel(self)
+        super().stop()
 
     def ramp_stop(self, ramp_time_ms=200):
         """Gradually reduce speed to zero before stopping."""
-        _log("Motor.ramp_stop", "ramp_time_ms=%s" % ramp_time_ms)
-        self.ramp_speed(0, ramp_time_ms)
+        rlog.event(ev.MOTOR_RAMP_STOP, ramp_time_ms)
+        self.ramp_speed(0, ramp_time_ms, profile=DECEL_PROFILE)
         self.stop()
 
-    def ramp_speed(self, target_speed, ramp_time_ms=200):
+    def ramp_speed(self, target_speed, ramp_time_ms=200, wait=True, profile=easing.LINEAR):
+        """Ramp on the shared RampEngine; wait=False returns immediately."""
         target_speed = max(0, min(100, target_speed))
-        target_duty = int((target_speed / 100) * MAX_DUTY)
-        steps = max(1, ramp_time_ms // 20)
-        step_time = ramp_time_ms // steps
-        duty_step = (target_duty - self.current_duty) // steps
-        for _ in range(steps):
-            self.current_duty += duty_step
-            self.pwm.duty_u16(self.current_duty)
-            utime.sleep_ms(step_time)
-        self.current_duty = target_duty
-        self.pwm.duty_u16(self.current_duty)
-
-
-class HBridge:
+        target_duty = int(target_speed) * MAX_DUTY // 100
+        self.ramps.ramp((self,), target_duty, ramp_time_ms, profile)
+        if wait:
+            self.ramps.wait(self)
+
+
+class HBridge(drivers.HBridge):
     def __init__(self, stby_pin):
-        _log("HBridge.__init__", "stby=%s" % stby_pin)
-        self.stby = Pin(stby_pin, Pin.OUT)
-        self.enable()
+        rlog.event(ev.HBRIDGE_INIT, stby_pin)
+        super().__init__(stby_pin)
 
     def enable(self):
-        _log("HBridge.enable", "")
-        self.stby.on()
+        rlog.event(ev.HBRIDGE_ENABLE)
+        super().enable()
 
     def disable(self):
-        _log("HBridge.disable", "")
-        self.stby.off()
+        rlog.event(ev.HBRIDGE_DISABLE)
+        super().disable()
 
 
-class HCSR04:
+class HCSR04(drivers.HCSR04):
     def __init__(self, trigger_pin, echo_pin):
-        _log("HCSR04.__init__", "trig=%s echo=%s" % (trigger_pin, echo_pin))
-        self.trigger = Pin(trigger_pin, Pin.OUT)
-        self.echo = Pin(echo_pin, Pin.IN)
-        self.trigger.value(0)
-
-    def distance_cm(self):
-        # Trigger pulse
-        self.trigger.low()
-        sleep_us(200)
-        self.trigger.high()
-        sleep_us(10)
-        self.trigger.low()
-
-        # Wait for echo HIGH
-        start_wait = utime.ticks_us()
-        while self.echo.value() == 0:
-            if utime.ticks_diff(utime.ticks_us(), start_wait) > 30000:
-                return None
-
-        start = utime.ticks_us()
-
-        # Wait for echo LOW
-        while self.echo.value() == 1:
-            if utime.ticks_diff(utime.ticks_us(), start) > 30000:
-                return None
-
-        end = utime.ticks_us()
-
-        duration = utime.ticks_diff(end, start)
-        distance = (duration * 0.0343) / 2
-        if distance > 300:
-            return None
-        return distance
-
+        rlog.event(ev.HCSR04_INIT, trigger_pin, echo_pin)
+        super().__init__(trigger_pin, echo_pin, EchoScale(read_temperature, TEMP_REFRESH_MS))
 
 
 # initialize
 hbridge = HBridge(STBY_PIN)
-left = Motor(LEFT_PWM, LEFT_IN1, LEFT_IN2)
-# right = Motor(RIGHT_PWM, RIGHT_IN1, RIGHT_IN2)
+ramps = RampEngine(RAMP_STEP_MS, max_channels=1)
+left = Motor(LEFT_PWM, LEFT_IN1, LEFT_IN2, ramps)
+# right = Motor(RIGHT_PWM, RIGHT_IN1, RIGHT_IN2, ramps)
 sensor = HCSR04(TRIG_PIN, ECHO_PIN)
 led = Pin("LED", Pin.OUT)
+status = StatusLed(led, STATUS_STEP_MS)
+closing = ClosingRate(CLOSING_SAMPLES)
+brake = BrakeModel(DECEL_RAMP_MS, LOOP_DELAY_MS)
+boot_init_ms = utime.ticks_ms()  # Since reset: imports and hardware set up
 
 
 def blink_led(times=3, delay=0.5):
     """Blink the onboard LED as a startup indicator."""
-    _log("blink_led", "starting with %d blinks" % times)
+    rlog.event(ev.BLINK_START, times)
     for _ in range(times):
         led.on()
         sleep(delay)
         led.off()
         sleep(delay)
-    _log("blink_led", "finished")
+    rlog.event(ev.BLINK_DONE)
+
+
+def start_indicator():
+    """Startup indicator: the BOOTING pattern with FAST_BOOT, else the blocking blink_led()."""
+    if FAST_BOOT:
+        status.show(BOOTING)
+    else:
+        blink_led(times=3, delay=0.5)
+
+
+def first_reading():
+    """
+    Ping until the first echo, at most BOOT_PING_TIMEOUT_MS.
+    Returns its ticks_ms, or None if nothing echoed in time.
+    """
+    start = utime.ticks_ms()
+    while utime.ticks_diff(utime.ticks_ms(), start) < BOOT_PING_TIMEOUT_MS:
+        if sensor.distance_cm() is not None:
+            return utime.ticks_ms()
+        utime.sleep_ms(BOOT_POLL_MS)
+    return None
+
+
+def boot_done(reading_ms):
+    """Log the boot timeline (ms since reset) just before the first motor command."""
+    rlog.event(ev.BOOT_TIMING, boot_init_ms, -1 if reading_ms is None else reading_ms, utime.ticks_ms())
+    if FAST_BOOT:
+        status.show(RUNNING)
 
 
 def forward(speed=None, ramp=True):
     s = CRUISE_SPEED if speed is None else speed
-    _log("forward", "speed=%s ramp=%s" % (s, ramp))
+    if BACKGROUND_RAMPS and ramps.target_of(left) == int(s) * MAX_DUTY // 100:
+        return  # Already ramping there; restarting would only stretch the ramp
+    rlog.event(ev.FORWARD, s, ramp)
     if ramp and left.current_duty > 0:
         # Already moving, preserve current duty and ramp to new speed
         # Set direction pins without resetting duty
         left.in1.on()
         left.in2.off()
-        left.ramp_speed(s, RAMP_TIME_MS)
+        left.ramp_speed(s, RAMP_TIME_MS, not BACKGROUND_RAMPS, RESUME_PROFILE)
     else:
         # Starting from stop, ramp up
         left.forward(0)  # Set direction
-        left.ramp_speed(s, RESUME_RAMP_MS)
+        left.ramp_speed(s, RESUME_RAMP_MS, not BACKGROUND_RAMPS, RESUME_PROFILE)
     # right.forward(s)
 
 
 def stop():
-    _log("stop", "")
+    rlog.event(ev.STOP)
     left.stop()
     # right.stop()
 
@@ -205,29 +229,34 @@ def stop():
 def reverse(duration_ms, speed=None):
     if speed is None:
         speed = REVERSE_SPEED
-    _log("reverse", "duration_ms=%s speed=%s" % (duration_ms, speed))
+    rlog.event(ev.REVERSE, duration_ms, speed)
     # Brief pause before direction change for smoother transition
     utime.sleep_ms(50)
     left.reverse(0)  # set direction
-    left.ramp_speed(speed, RAMP_TIME_MS)
+    left.ramp_speed(speed, RAMP_TIME_MS, profile=REVERSE_PROFILE)
     utime.sleep_ms(duration_ms)
-    left.ramp_speed(0, RAMP_TIME_MS)
+    left.ramp_speed(0, RAMP_TIME_MS, profile=DECEL_PROFILE)
     stop()
 
 
-def reverse_until_safe(speed=None):
+def reverse_until_safe(speed=None, max_ms=None):
     """
-    Reverse until distance > THRESHOLD_CM or MAX_REVERSE_MS timeout.
-    Returns final distance (None if sensor timeout).
+    Reverse until distance > THRESHOLD_CM or MAX_REVERSE_MS timeout. max_ms, if given,
+    caps the whole reverse including its spin-up; one too short to spin up is skipped.
+    Returns final distance (None if sensor timeout or skipped).
     """
     if speed is None:
         speed = REVERSE_SPEED
-    _log("reverse_until_safe", "speed=%s" % speed)
+    limit = MAX_REVERSE_MS if max_ms is None else min(MAX_REVERSE_MS, max_ms - RAMP_TIME_MS)
+    if limit <= 0:
+        rlog.event(ev.REVERSE_SKIPPED, max_ms)
+        return None
+    rlog.event(ev.REVERSE_SAFE_START, speed)
     
     # Brief pause before direction change for smoother transition
     utime.sleep_ms(50)
     left.reverse(0)  # set direction
-    left.ramp_speed(speed, RAMP_TIME_MS)
+    left.ramp_speed(speed, RAMP_TIME_MS, profile=REVERSE_PROFILE)
     
     reverse_start = utime.ticks_ms()
     final_dist = None
@@ -235,34 +264,98 @@ def reverse_until_safe(speed=None):
     while True:
         # Check if timeout reached
         elapsed = utime.ticks_diff(utime.ticks_ms(), reverse_start)
-        if elapsed >= MAX_REVERSE_MS:
-            _log("reverse_until_safe", "timeout after %dms" % elapsed)
+        if elapsed >= limit:
+            rlog.event(ev.REVERSE_SAFE_TIMEOUT, elapsed)
             break
         
         # Check distance
         dist = sensor.distance_cm()
         if dist is not None:
             final_dist = dist
-            _log("reverse_until_safe", "distance=%.2fcm" % dist)
+            if LOG_DEBUG:
+                rlog.event(ev.REVERSE_SAFE_DIST, dist)
             if dist > THRESHOLD_CM:
-                _log("reverse_until_safe", "safe distance reached: %.2fcm > %dcm" % (dist, THRESHOLD_CM))
+                rlog.event(ev.REVERSE_SAFE_REACHED, dist, THRESHOLD_CM)
                 break
         
         # Small delay between distance checks
         utime.sleep_ms(LOOP_DELAY_MS)
     
     # Ramp down reverse speed to stop
-    left.ramp_speed(0, RAMP_TIME_MS)
+    left.ramp_speed(0, RAMP_TIME_MS, profile=DECEL_PROFILE)
     stop()
     
     return final_dist
 
 
+def threshold_speed(dist):
+    """Fixed-distance rule: None (brake) inside THRESHOLD_CM, proportional slowdown in the band, else CRUISE_SPEED."""
+    if dist < THRESHOLD_CM:
+        return None
+    adaptive_threshold = THRESHOLD_CM * ADAPTIVE_THRESHOLD_MULT
+    if dist >= adaptive_threshold:
+        return CRUISE_SPEED
+    # At adaptive_threshold, speed = CRUISE_SPEED; at THRESHOLD_CM, speed approaches 0
+    speed_factor = (dist - THRESHOLD_CM) / (adaptive_threshold - THRESHOLD_CM)
+    return max(20, min(CRUISE_SPEED, int(CRUISE_SPEED * speed_factor)))  # Clamp between 20% and cruise
+
+
+def ttc_speed(dist, stamp_ms):
+    """
+    Time-to-collision rule: None (brake) once the gap down to STOP_GAP_CM would close
+    within the learned stop time plus TTC_MARGIN_S; else TTC_CRUISE_SPEED, easing down
+    to CRUISE_SPEED below TTC_SLOW_S. Inside STOP_GAP_CM it always brakes, and while
+    there is no time to collision (closing rate not yet known, or not closing) the
+    distance decides through threshold_speed().
+    """
+    closing.add(dist, stamp_ms)
+    rate = closing.rate()
+    gap = dist - STOP_GAP_CM
+    ttc = brake.ttc(gap, rate)
+    floor = brake.brake_s + TTC_MARGIN_S
+    if gap <= 0 or (ttc is not None and ttc < floor):
+        rlog.event(ev.TTC_BRAKE, dist, rate or 0, -1 if ttc is None else int(ttc * 1000))
+        brake.begin(dist, rate)
+        return None
+    if ttc is None:
+        return threshold_speed(dist)
+    if ttc >= TTC_SLOW_S:
+        return TTC_CRUISE_SPEED
+    return CRUISE_SPEED + int((TTC_CRUISE_SPEED - CRUISE_SPEED) * (ttc - floor) / (TTC_SLOW_S - floor))
+
+
+def target_speed(dist):
+    """Forward speed for a fresh reading, or None to brake and reverse."""
+    return ttc_speed(dist, utime.ticks_ms()) if TTC_BRAKING else threshold_speed(dist)
+
+
+def backtrack_ms(drove_ms):
+    """
+    Cap for the reverse after a stop. With TTC_BRAKING the robot stops close and the
+    reverse has no sensor behind it, so it only backs over the drove_ms of track it
+    just covered since the last reverse. Else None (no cap).
+    """
+    return drove_ms if TTC_BRAKING else None
+
+
+def learn_stop():
+    """After a TTC stop has settled: teach the brake model how far it actually went."""
+    measured = brake.end(sensor.distance_cm())
+    if measured is not None:
+        rlog.event(ev.TTC_LEARNED, int(measured * 1000), int(brake.brake_s * 1000))
+    closing.reset()
+
+
 def simplified_run(total_ms=3000):
-    _log("simplified_run", "start total_ms=%s" % total_ms)
-    blink_led(times=3, delay=0.5)
+    rlog.event(ev.RUN_START, total_ms)
+    start_indicator()
+    cruise = TTC_CRUISE_SPEED if TTC_BRAKING else CRUISE_SPEED
+    closing.reset()
     start = utime.ticks_ms()
+    iterations = 0
+    boot_done(first_reading())
     forward(CRUISE_SPEED, ramp=True)
+    resumed = utime.ticks_ms()
     try:
         while utime.ticks_diff(utime.ticks_ms(), start) < total_ms:
             dist = sensor.distance_cm()
@@ -270,54 +363,60 @@ def simplified_run(total_ms=3000):
                 # sensor timed out — just continue
                 utime.sleep_ms(LOOP_DELAY_MS)
                 continue
-            _log("simplified_run", "measured=%.2fcm" % dist)
+            iterations += 1
+            if LOG_DEBUG:
+                rlog.event(ev.RUN_MEASURED, dist)
             
             # Adaptive speed reduction: slow down as obstacle approaches
-            adaptive_threshold = THRESHOLD_CM * ADAPTIVE_THRESHOLD_MULT
-            if dist < adaptive_threshold and dist >= THRESHOLD_CM:
-                # Calculate proportional speed reduction
-                # At adaptive_threshold, speed = CRUISE_SPEED
-                # At THRESHOLD_CM, speed approaches 0
-                distance_range = adaptive_threshold - THRESHOLD_CM
-                distance_from_threshold = dist - THRESHOLD_CM
-                speed_factor = distance_from_threshold / distance_range
-                adaptive_speed = int(CRUISE_SPEED * speed_factor)
-                adaptive_speed = max(20, min(CRUISE_SPEED, adaptive_speed))  # Clamp between 20% and cruise
-                _log("simplified_run", "adaptive slowdown: dist=%.2fcm speed=%d%%" % (dist, adaptive_speed))
-                forward(adaptive_speed, ramp=True)
-            elif dist < THRESHOLD_CM:
+            speed = target_speed(dist)
+            if speed is not None and speed < cruise:
+                rlog.event(ev.RUN_ADAPTIVE, dist, speed)
+                forward(speed, ramp=True)
+            elif speed is None:
                 # Obstacle detected - smooth avoidance sequence
-                _log("simplified_run", "obstacle detected %.2fcm — stopping and reversing" % dist)
+                rlog.event(ev.RUN_OBSTACLE_REVERSE, dist)
+                drove_ms = utime.ticks_diff(utime.ticks_ms(), resumed)
                 # 1. Decelerate gradually (ramp down instead of abrupt stop)
                 left.ramp_stop(DECEL_RAMP_MS)
                 # 2. Brief pause after stopping
                 utime.sleep_ms(100)
+                learn_stop()
                 # 3. Reverse until safe distance reached
-                final_dist = reverse_until_safe(REVERSE_SPEED)
+                final_dist = reverse_until_safe(REVERSE_SPEED, backtrack_ms(drove_ms))
+                resumed = utime.ticks_ms()  # The next pass drives on from here
                 # 4. Stop at safe distance (robot already stopped by reverse_until_safe)
                 if final_dist is not None and final_dist > THRESHOLD_CM:
-                    _log("simplified_run", "stopped at safe distance: %.2fcm" % final_dist)
+                    rlog.event(ev.RUN_SAFE_STOP, final_dist)
                     # Not forcing forward here, let the robot maintain its position after reverse
                 elif final_dist is not None:
-                    _log("simplified_run", "reverse timeout, stopped anyway (dist=%.2fcm)" % final_dist)
+                    rlog.event(ev.RUN_TIMEOUT_DIST, final_dist)
                     # Not forcing forward here, let the robot maintain its position after reverse
                 else:
-                    _log("simplified_run", "reverse timeout, stopped (sensor timeout)")
+                    rlog.event(ev.RUN_TIMEOUT)
                     # Not forcing forward here, let the robot maintain its position after reverse
-            elif dist >= adaptive_threshold:
+            else:
                 # No obstacle nearby, maintain cruise speed
-                if left.current_duty < int((CRUISE_SPEED / 100) * MAX_DUTY * 0.9):
+                if left.current_duty < int((cruise / 100) * MAX_DUTY * 0.9):
                     # Only ramp if we're not already at cruise speed
-                    forward(CRUISE_SPEED, ramp=True)
+                    forward(cruise, ramp=True)
+            rlog.drain_if(LOG_DRAIN_AT)
             utime.sleep_ms(LOOP_DELAY_MS)
     except KeyboardInterrupt:
-        _log("simplified_run", "keyboard interrupt")
+        rlog.event(ev.RUN_INTERRUPT)
     finally:
         stop()
-        led.off()
+        status.off()
         hbridge.disable()
-        _log("simplified_run", "finished")
+        elapsed = utime.ticks_diff(utime.ticks_ms(), start)
+        rlog.event(ev.RUN_DECISIONS, iterations, elapsed, iterations * 1000 / max(1, elapsed))
+        rlog.event(ev.RUN_FINISHED)
+        rlog.drain()
+
+
+def main(total_ms=20000):
+    """Entry point; a board's main.py can be just this call."""
+    simplified_run(total_ms)
 
 
 if __name__ == "__main__":
-    simplified_run(total_ms=20000)
+    main()
@@ -0,0 +1,43 @@
+"""
+Onboard-LED status patterns played from a Timer.
+A pattern is (bits, steps): the LED shows bit 0, 1, ... of bits for step_ms each and
+then repeats, without the caller ever sleeping. Startup can therefore show that the
+robot is booting while initialisation and the first pings carry on.
+"""
+
+from machine import Timer
+
+BOOTING = (0b01, 2)  # Fast even blink: initialising, waiting for the first reading
+RUNNING = (0b101, 20)  # Double blip once a second: driving
+
+
+class StatusLed:
+    def __init__(self, pin, step_ms=50):
+        self.pin = pin
+        self.step_ms = step_ms
+        self._bits = 0
+        self._steps = 1
+        self._pos = 0
+        self._timer = None
+
+    def show(self, pattern):
+        """Start playing pattern from its first step (replacing any other)."""
+        self._bits, self._steps = pattern
+        self._pos = 0
+        self._step(None)
+        if self._timer is None:
+            self._timer = Timer()
+            self._timer.init(period=self.step_ms, mode=Timer.PERIODIC, callback=self._step)
+
+    def off(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.pin.off()
+
+    def _step(self, t):
+        # Timer callback: no allocation
+        self.pin.value((self._bits >> self._pos) & 1)
+        self._pos += 1
+        if self._pos >= self._steps:
+            self._pos = 0
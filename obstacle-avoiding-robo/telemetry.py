@@ -0,0 +1,164 @@
+"""
+UDP telemetry: fixed-size binary frames batched into datagrams.
+A Timer samples the robot every period_ms into a preallocated batch buffer. A full
+batch gets its header and is handed to micropython.schedule, which sends it with one
+sendto() on a non-blocking socket while the next batch fills the other buffer. A send
+that would block or fails is dropped and counted, never retried, so neither the
+control loop nor the Timer ever waits on the network. telemetry_recv.py decodes the
+stream on the host.
+"""
+
+import struct
+
+try:
+    from machine import Timer
+    import utime
+except ImportError:
+    Timer = None  # Host: decoding only
+
+try:
+    from micropython import const, schedule
+except ImportError:
+    def const(x):
+        return x
+
+    def schedule(func, arg):
+        func(arg)
+
+MAGIC = b"RT"
+VERSION = const(1)
+# magic, version, frames in this datagram, datagram sequence, datagrams dropped before it
+HEADER_FMT = "<2sBBHH"
+HEADER_SIZE = struct.calcsize(HEADER_FMT)
+# ticks_ms, distance mm (-1: no reading), left/right duty in 0.01% (negative: reverse),
+# state, control loop period us
+FRAME_FMT = "<IhhhHH"
+FRAME_SIZE = struct.calcsize(FRAME_FMT)
+NO_DISTANCE = const(-1)
+
+# Robot states carried in each frame
+IDLE = const(0)
+CRUISE = const(1)
+SLOW = const(2)
+AVOID = const(3)
+STATES = ("idle", "cruise", "slow", "avoid")
+
+
+def udp_socket(host, port):
+    """Non-blocking UDP socket and the (host, port) address to send to; host is an IP."""
+    import socket
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    return sock, socket.getaddrinfo(host, port)[0][-1]
+
+
+class Telemetry:
+    def __init__(self, sock, addr, frames=8):
+        """sock: a non-blocking UDP socket; addr: where datagrams go; frames: per datagram."""
+        self.sock = sock
+        self.addr = addr
+        self.frames = frames
+        size = HEADER_SIZE + frames * FRAME_SIZE
+        self._bufs = (bytearray(size), bytearray(size))
+        self._views = (memoryview(self._bufs[0]), memoryview(self._bufs[1]))
+        self._fill = 0  # Buffer taking frames
+        self._pending = None  # Buffer waiting for _send, if any
+        self._pending_len = 0
+        self._queued = False  # _send is scheduled
+        self.count = 0  # Frames in the filling buffer
+        self.seq = 0
+        self.sent = 0
+        self.dropped = 0  # Datagrams lost here: send failed or overtaken by the next batch
+        self._sample = None
+        self._timer = None
+        # Bound method is allocated once here, not in the Timer callback
+        self._send_ref = self._send
+
+    def start(self, period_ms, sample):
+        """Call sample(self) every period_ms from a Timer; it should call add() once."""
+        self._sample = sample
+        self._timer = Timer()
+        self._timer.init(period=period_ms, mode=Timer.PERIODIC, callback=self._tick)
+
+    def stop(self):
+        """Stop sampling and send whatever frames are batched."""
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.flush()
+
+    def add(self, dist_mm, left, right, state, loop_us):
+        """Append one frame; sends the batch once it is full."""
+        struct.pack_into(FRAME_FMT, self._bufs[self._fill], HEADER_SIZE + self.count * FRAME_SIZE,
+                         utime.ticks_ms(), dist_mm, left, right, state, min(loop_us, 0xFFFF))
+        self.count += 1
+        if self.count >= self.frames:
+            self._hand_off()
+
+    def flush(self):
+        """Send the part-filled batch and anything still pending, now."""
+        if self.count:
+            self._hand_off()
+        self._send(0)
+
+    def summary(self):
+        return "sent=%d dropped=%d datagrams (%d frames each)" % (self.sent, self.dropped, self.frames)
+
+    def _tick(self, t):
+        self._sample(self)
+
+    def _hand_off(self):
+        struct.pack_into(HEADER_FMT, self._bufs[self._fill], 0, MAGIC, VERSION, self.count,
+                         self.seq & 0xFFFF, self.dropped & 0xFFFF)
+        if self._pending is not None:
+            # The previous batch is still unsent: the network is behind, so drop it
+            self.dropped += 1
+        self._pending = self._fill
+        self._pending_len = HEADER_SIZE + self.count * FRAME_SIZE
+        if not self._queued:
+            self._queued = True
+            try:
+                schedule(self._send_ref, 0)
+            except RuntimeError:
+                self._queued = False  # Schedule queue full: retried at the next hand-off
+        self.seq += 1
+        self.count = 0
+        self._fill ^= 1
+
+    def _send(self, _):
+        self._queued = False
+        i = self._pending
+        if i is None:
+            return
+        self._pending = None
+        try:
+            self.sock.sendto(self._views[i][:self._pending_len], self.addr)
+            self.sent += 1
+        except OSError:
+            # EAGAIN (buffers full), not joined yet, no route: drop it
+            self.dropped += 1
+
+
+def decode(datagram):
+    """
+    Split one datagram into (seq, dropped, frames), each frame a tuple in FRAME_FMT
+    order. Raises ValueError for anything that is not a telemetry datagram.
+    """
+    if len(datagram) < HEADER_SIZE:
+        raise ValueError("short datagram")
+    magic, version, count, seq, dropped = struct.unpack_from(HEADER_FMT, datagram, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a version %d telemetry datagram" % VERSION)
+    if len(datagram) != HEADER_SIZE + count * FRAME_SIZE:
+        raise ValueError("datagram length does not match its %d frames" % count)
+    frames = [struct.unpack_from(FRAME_FMT, datagram, HEADER_SIZE + i * FRAME_SIZE) for i in range(count)]
+    return seq, dropped, frames
+
+
+def format_frame(frame):
+    """One frame as a log-style text line."""
+    ts, dist_mm, left, right, state, loop_us = frame
+    dist = "-" if dist_mm == NO_DISTANCE else "%.1fcm" % (dist_mm / 10)
+    name = STATES[state] if state < len(STATES) else "state%d" % state
+    return "[%dms] %s dist=%s left=%.1f%% right=%.1f%% loop=%dus" % (
+        ts, name, dist, left / 100, right / 100, loop_us)
@@ -0,0 +1,104 @@
+"""
+Host-side receiver for the robot's UDP telemetry (telemetry.py). Set TELEMETRY_HOST
+in the script to this machine's IP, then run:
+
+    python3 telemetry_recv.py               # listen on port 5005, print every frame
+    python3 telemetry_recv.py --port 6000 --count 50
+
+Frames are printed in the log's text format. Gaps in the datagram sequence are
+reported as lost (dropped on the robot or on the network); a datagram that turns up
+after a later one is counted as late instead. Repeats, and anything older than the
+last MISSING_WINDOW sequence numbers, are counted as stale and not printed.
+Ctrl-C prints a summary.
+"""
+
+import argparse
+import socket
+import sys
+
+from telemetry import decode, format_frame
+
+MISSING_WINDOW = 256  # Skipped sequence numbers remembered, for late arrivals
+
+
+class Receiver:
+    def __init__(self, sock):
+        self.sock = sock
+        self.datagrams = 0
+        self.frames = 0
+        self.lost = 0
+        self.late = 0
+        self.bad = 0
+        self.stale = 0
+        self.robot_dropped = 0
+        self._next_seq = None
+        self._missing = set()  # Skipped seqs still counted in lost
+
+    def receive(self):
+        """Wait for one datagram; returns its decoded frames (empty if it was not telemetry)."""
+        data, _ = self.sock.recvfrom(2048)
+        try:
+            seq, dropped, frames = decode(data)
+        except ValueError:
+            self.bad += 1
+            return []
+        self.datagrams += 1
+        gap = 0 if self._next_seq is None else (seq - self._next_seq) & 0xFFFF
+        if gap < 0x8000:
+            self.lost += gap
+            self._skipped(seq, gap)
+            self._next_seq = (seq + 1) & 0xFFFF
+            self.robot_dropped = dropped
+        elif seq in self._missing:
+            # Older than one already received: it was counted lost when skipped
+            self._missing.remove(seq)
+            self.late += 1
+            self.lost -= 1
+        else:
+            # A repeat, or skipped too long ago to tell from one
+            self.stale += 1
+            return []
+        self.frames += len(frames)
+        return frames
+
+    def _skipped(self, seq, gap):
+        """Remember the gap before seq, and forget what fell out of the window."""
+        for back in range(1, min(gap, MISSING_WINDOW) + 1):
+            self._missing.add((seq - back) & 0xFFFF)
+        if gap and len(self._missing) > MISSING_WINDOW:
+            self._missing = {s for s in self._missing if (seq - s) & 0xFFFF <= MISSING_WINDOW}
+
+    def summary(self):
+        return ("%d datagrams, %d frames, %d lost in sequence (%d dropped on the robot), %d late, %d stale, "
+                "%d not telemetry" % (self.datagrams, self.frames, self.lost, self.robot_dropped, self.late,
+                                      self.stale, self.bad))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bind", default="0.0.0.0", help="local address to listen on")
+    parser.add_argument("--port", type=int, default=5005, help="TELEMETRY_PORT in the script")
+    parser.add_argument("--count", type=int, help="exit after this many datagrams")
+    parser.add_argument("--timeout", type=float, help="exit after this many seconds without a datagram")
+    parser.add_argument("--quiet", action="store_true", help="print only the summary")
+    args = parser.parse_args(argv)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((args.bind, args.port))
+    sock.settimeout(args.timeout)
+    receiver = Receiver(sock)
+    try:
+        while args.count is None or receiver.datagrams < args.count:
+            for frame in receiver.receive():
+                if not args.quiet:
+                    print(format_frame(frame))
+    except (KeyboardInterrupt, socket.timeout):
+        pass
+    finally:
+        sock.close()
+    print(receiver.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+"""
+Host tests run against the stand-in machine/utime modules in sim/, on the virtual
+clock. Every test starts from time zero with no pins, timers or events left over.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sim"))
+from run import install  # noqa: E402
+
+install()
+
+import machine  # noqa: E402
+import utime  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clock():
+    utime.reset()
+    machine.reset_state()
+    yield utime
@@ -0,0 +1,131 @@
+"""SeqBuffer and SensorCore with real CPython threads, and the shared virtual clock."""
+
+import _thread
+import sys
+import threading
+
+import utime
+
+from dualcore import PAUSE, RUN, STOP, SensorCore, SeqBuffer
+
+
+class FakeSensor:
+    """measure() takes busy_ms of virtual time and returns 1, 2, 3, ..."""
+
+    def __init__(self, busy_ms=2):
+        self.busy_ms = busy_ms
+        self.calls = 0
+        self.in_use_by_core0 = False
+        self.clashes = 0
+
+    def measure(self):
+        if self.in_use_by_core0:
+            self.clashes += 1
+        utime.sleep_ms(self.busy_ms)
+        self.calls += 1
+        return float(self.calls)
+
+
+def test_seqbuffer_reads_are_never_torn():
+    buf = SeqBuffer()
+    done = threading.Event()
+    torn = []
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible
+
+    def writer():
+        for i in range(1, 20000):
+            buf.publish(float(i), i * 3)
+        done.set()
+
+    try:
+        thread = threading.Thread(target=writer)
+        thread.start()
+        reads = 0
+        while not done.is_set():
+            value, stamp, seq = buf.read()
+            if seq and stamp != int(value) * 3:
+                torn.append((value, stamp))
+            reads += 1
+        thread.join()
+    finally:
+        sys.setswitchinterval(old)
+    assert not torn
+    assert reads > 0
+    assert buf.read() == (19999.0, 19999 * 3, 19999)
+
+
+def test_clock_moves_only_to_the_earliest_wake_up(clock):
+    wakes = {"a": [], "b": []}
+    finished = []
+
+    def sleeper(name, step_ms, count):
+        for _ in range(count):
+            utime.sleep_ms(step_ms)
+            wakes[name].append(clock.now_us())
+        finished.append(name)
+
+    _thread.start_new_thread(sleeper, ("a", 10, 10))
+    sleeper("b", 25, 4)
+    while len(finished) < 2:
+        utime.sleep_ms(1)
+    assert wakes["a"] == [t * 10000 for t in range(1, 11)]
+    assert wakes["b"] == [t * 25000 for t in range(1, 5)]
+    assert clock.now_us() <= 101000  # Both slept ~100 ms side by side, not 200 ms in turn
+
+
+def test_sensor_core_publishes_pauses_and_stops(clock):
+    sensor = FakeSensor()
+    core = SensorCore(sensor.measure, period_ms=20)
+    assert core.read() == (None, None)
+    core.start()
+    utime.sleep_ms(200)
+    value, age = core.read()
+    assert 9 <= value <= 11  # One sample per 20 ms
+    assert 0 <= age <= 20
+    assert core.buffer.ack[0] == RUN
+
+    assert core.pause()
+    sensor.in_use_by_core0 = True  # A scan owns the pins now
+    calls = sensor.calls
+    utime.sleep_ms(200)
+    assert sensor.calls == calls
+    assert core.buffer.ack[0] == PAUSE
+    sensor.in_use_by_core0 = False
+    core.resume()
+    utime.sleep_ms(100)
+    assert sensor.calls > calls
+    assert sensor.clashes == 0
+
+    assert core.stop()
+    assert not core.running()
+    assert core.buffer.ack[0] == STOP
+    assert core.stats.count == sensor.calls - 1  # Periods between samples
+
+
+def test_sensor_core_reuses_a_live_loop(clock, monkeypatch):
+    starts = []
+    real = _thread.start_new_thread
+
+    def counting(func, args, kwargs=None):
+        starts.append(func)
+        return real(func, args, kwargs)
+
+    monkeypatch.setattr(_thread, "start_new_thread", counting)
+    sensor = FakeSensor(busy_ms=1000)  # Longer than stop() waits
+    core = SensorCore(sensor.measure, period_ms=20)
+    core.start()
+    utime.sleep_ms(10)
+    assert not core.stop(timeout_ms=500)  # Still inside measure()
+    assert core.running()
+    core.start()  # Takes the same loop back instead of a second thread
+    assert len(starts) == 1
+    utime.sleep_ms(3000)
+    assert sensor.calls >= 3
+    assert core.pause(timeout_ms=1500)
+    core.start()
+    assert len(starts) == 1
+    assert core.stop(timeout_ms=1500)
+    core.start()  # The loop has exited: a new one is started
+    assert len(starts) == 2
+    assert core.stop(timeout_ms=1500)
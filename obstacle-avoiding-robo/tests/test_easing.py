@@ -0,0 +1,31 @@
+"""The literal easing tables match the formulas they were generated from."""
+
+import pytest
+
+import easing
+from easing import ONE, STEPS, _scurve, _table, _trapezoid, at, make_scurve, make_trapezoid
+
+
+@pytest.mark.parametrize("name, fn", [
+    ("LINEAR", lambda t: t),
+    ("SMOOTHSTEP", lambda t: t * t * (3 - 2 * t)),
+    ("SMOOTHERSTEP", lambda t: t * t * t * (t * (6 * t - 15) + 10)),
+    ("TRAPEZOID", _trapezoid(0.25)),
+    ("SCURVE", _scurve(0.5)),
+])
+def test_literal_table_matches_its_formula(name, fn):
+    table = getattr(easing, name)
+    assert len(table) == STEPS + 1
+    assert list(table) == list(_table(fn))
+
+
+def test_builders_reproduce_the_default_tables():
+    assert list(make_trapezoid()) == list(easing.TRAPEZOID)
+    assert list(make_scurve()) == list(easing.SCURVE)
+
+
+def test_at_is_monotonic_and_hits_both_ends():
+    for table in (easing.LINEAR, easing.SMOOTHSTEP, easing.SMOOTHERSTEP, easing.TRAPEZOID, easing.SCURVE):
+        values = [at(table, ms, 400) for ms in range(-10, 411)]
+        assert values[0] == 0 and values[-1] == ONE
+        assert all(a <= b for a, b in zip(values, values[1:]))
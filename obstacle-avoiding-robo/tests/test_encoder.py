@@ -0,0 +1,99 @@
+"""Encoder and Odometry fed scripted edges on the virtual clock."""
+
+from machine import Pin, drive_pin
+
+from encoder import Encoder, Odometry
+
+A, B = 26, 28
+IN1, IN2 = 14, 13
+PERIOD_US = 5000
+
+
+def ticks(clock, pin, count, period_us=PERIOD_US):
+    """count rising edges on pin, period_us apart."""
+    for _ in range(count):
+        clock.advance(period_us)
+        drive_pin(pin, 1)
+        drive_pin(pin, 0)
+
+
+def near(value, expected, tolerance=0.01):
+    return abs(value - expected) <= abs(expected) * tolerance
+
+
+def test_quadrature_counts_and_direction(clock):
+    enc = Encoder(A, B)
+    per_tick = enc.um_per_tick * 1000 // PERIOD_US
+    ticks(clock, A, 12)  # B low on A's rising edge: forwards
+    assert enc.ticks == 12
+    assert enc.mm() == 12 * enc.um_per_tick // 1000
+    assert near(enc.speed_mm_s(), per_tick)
+    drive_pin(B, 1)  # B leads: backwards
+    ticks(clock, A, 20)
+    assert enc.ticks == -8
+    assert enc.mm() < 0
+    assert near(enc.speed_mm_s(), -per_tick)
+
+
+def test_inverted_quadrature_counts_the_other_way(clock):
+    enc = Encoder(A, B, invert=True)
+    ticks(clock, A, 5)
+    assert enc.ticks == -5
+    assert enc.speed_mm_s() < 0
+
+
+def test_single_channel_takes_direction_from_the_motor_pins(clock):
+    in1, in2 = Pin(IN1, Pin.OUT, value=1), Pin(IN2, Pin.OUT, value=0)
+    enc = Encoder(A, in1=in1, in2=in2)
+    ticks(clock, A, 6)
+    in1.value(0)
+    in2.value(1)
+    ticks(clock, A, 2)
+    assert enc.ticks == 4
+    in2.value(0)  # Coasting: the wheel keeps the last driven direction
+    ticks(clock, A, 3)
+    assert enc.ticks == 1
+    assert enc.speed_mm_s() < 0
+
+
+def test_speed_decays_then_stops_without_ticks(clock):
+    enc = Encoder(A, B, stale_ms=150)
+    assert enc.speed_mm_s() == 0  # No tick yet
+    ticks(clock, A, 4)
+    full = enc.speed_mm_s()
+    clock.advance(4 * PERIOD_US)
+    assert 0 < enc.speed_mm_s() < full // 3  # Overdue ticks bound the speed from above
+    clock.advance(150000)
+    assert enc.speed_mm_s() == 0
+
+
+def test_counts_and_speed_across_the_ticks_wrap(clock):
+    # Start just short of the ticks_us wrap, then tick straight through it
+    clock.advance(clock.TICKS_PERIOD - 4 * PERIOD_US)
+    enc = Encoder(A, B)
+    ticks(clock, A, 2)
+    before = clock.ticks_us()
+    speeds = []
+    for _ in range(8):
+        ticks(clock, A, 1)
+        speeds.append(enc.speed_mm_s())
+    assert clock.ticks_us() < before  # The counter wrapped during the run
+    assert enc.ticks == 10
+    expected = enc.um_per_tick * 1000 // PERIOD_US
+    assert all(near(s, expected) for s in speeds), speeds
+
+
+def test_odometry_distance_and_turn(clock):
+    left, right = Encoder(A, B), Encoder(27, 29)
+    odo = Odometry(left, right, track_mm=130)
+    ticks(clock, A, 10)
+    ticks(clock, 27, 10)
+    assert odo.travelled_mm() == 10 * left.um_per_tick // 1000
+    assert odo.turned_deg() == 0
+    odo.mark()
+    drive_pin(B, 1)  # Left backwards, right forwards: spinning left
+    ticks(clock, A, 5)
+    ticks(clock, 27, 5)
+    assert abs(odo.travelled_mm()) <= 1  # Equal and opposite, up to rounding
+    turned = 2 * 5 * left.um_per_tick / 1000 * 57.29578 / 130
+    assert abs(odo.turned_deg() - turned) < 1
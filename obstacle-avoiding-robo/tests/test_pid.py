@@ -0,0 +1,127 @@
+"""SpeedPI and SpeedLoop holding modelled wheels on the virtual clock."""
+
+from machine import PWM, Pin
+
+from pid import BEHIND_SHIFT, GAIN_SHIFT, ONE, PINNED_STEPS, SCALE_RECOVER, SpeedLoop, SpeedPI
+
+MAX_DUTY = 65535
+STALL = 13107  # 20% duty before the wheel moves
+FULL_MM_S = 300
+KP, KI = 60, 800
+PERIOD_MS = 10
+
+
+class Wheel:
+    """
+    Speed follows the real PWM duty along the calibration line, times gain (the
+    battery), up to top_mm_s (what the motor can reach today).
+    """
+
+    def __init__(self, pin, gain=1.0, top_mm_s=None):
+        self.pwm = PWM(Pin(pin, Pin.OUT))
+        self.gain = gain
+        self.top_mm_s = top_mm_s
+        self.reads = 0
+
+    def speed(self):
+        self.reads += 1
+        mm_s = max(0, self.pwm.duty_u16() - STALL) * FULL_MM_S * self.gain / (MAX_DUTY - STALL)
+        return int(mm_s if self.top_mm_s is None else min(mm_s, self.top_mm_s))
+
+
+def make_pi(wheel, i_limit=None):
+    return SpeedPI(wheel.pwm, wheel.speed, KP, KI, FULL_MM_S, STALL, MAX_DUTY, i_limit)
+
+
+def setpoint_for(mm_s):
+    return STALL + mm_s * (MAX_DUTY - STALL) // FULL_MM_S
+
+
+def run_loop(clock, loop, ms):
+    loop.start()
+    clock.advance(ms * 1000)
+    loop.stop()
+
+
+def test_integral_makes_up_a_weak_battery(clock):
+    wheel = Wheel(15, gain=0.8)
+    pi = make_pi(wheel)
+    loop = SpeedLoop((pi,), PERIOD_MS)
+    pi.duty_u16(setpoint_for(150))
+    assert wheel.pwm.duty_u16() == pi.setpoint  # Feedforward before the first step
+    run_loop(clock, loop, 2000)
+    assert loop.steps == 2000 // PERIOD_MS
+    assert abs(wheel.speed() - pi.target_mm_s) <= 2
+    assert pi.duty > pi.setpoint and loop.scale == ONE
+
+
+def test_integral_is_clamped_and_frozen_while_pinned(clock):
+    wheel = Wheel(15, top_mm_s=0)  # Jammed
+    pi = make_pi(wheel, i_limit=4000)
+    loop = SpeedLoop((pi,), PERIOD_MS)
+    pi.duty_u16(setpoint_for(50))
+    run_loop(clock, loop, 1000)
+    assert pi.integral == 4000 << GAIN_SHIFT  # Capped at i_limit, not still climbing
+    assert pi.duty < MAX_DUTY
+    pi = make_pi(wheel)  # Default i_limit; stepped by hand, so no SpeedLoop derate
+    pi.duty_u16(setpoint_for(250))
+    for _ in range(5):
+        pi.update(PERIOD_MS)
+    assert pi.duty == MAX_DUTY
+    held = pi.integral
+    for _ in range(200):
+        pi.update(PERIOD_MS)
+    assert pi.integral == held  # Conditional integration: nothing added at full duty
+    wheel.top_mm_s = None  # Freed: no wound-up integral holding it at full duty
+    pi.update(PERIOD_MS)
+    assert pi.duty < MAX_DUTY
+
+
+def test_weaker_wheel_derates_the_pair(clock):
+    left, right = Wheel(15, top_mm_s=120), Wheel(16)
+    pl, pr = make_pi(left), make_pi(right)
+    loop = SpeedLoop((pl, pr), PERIOD_MS)
+    pl.duty_u16(setpoint_for(200))
+    pr.duty_u16(setpoint_for(200))
+    run_loop(clock, loop, (PINNED_STEPS - 1) * PERIOD_MS)
+    assert loop.scale == ONE  # Spinning up, not out of headroom yet
+    run_loop(clock, loop, 1000)
+    # Both held near what the weaker wheel can do: still (nearly) a straight line
+    assert loop.scale < ONE
+    assert abs(right.speed() - 120) <= (120 >> BEHIND_SHIFT) + SCALE_RECOVER
+    assert abs(left.speed() - right.speed()) <= (120 >> BEHIND_SHIFT) + SCALE_RECOVER
+    steady = loop.scale
+    run_loop(clock, loop, 1000)
+    assert abs(loop.scale - steady) <= 2 * SCALE_RECOVER  # Settled, not cycling back to ONE
+    left.top_mm_s = None
+    run_loop(clock, loop, 2000)
+    assert loop.scale == ONE
+    assert abs(right.speed() - 200) <= 2
+
+
+def test_feedforward_is_scaled_with_the_target(clock):
+    wheel = Wheel(15)
+    pi = SpeedPI(wheel.pwm, lambda: 100, 0, 0, FULL_MM_S, STALL, MAX_DUTY)
+    pi.duty_u16(setpoint_for(200))
+    pi.update(PERIOD_MS, ONE // 2)
+    assert pi.duty == setpoint_for(100)  # On target at half scale, so feedforward alone
+    pi.duty_u16(setpoint_for(160))
+    assert pi.duty == setpoint_for(80)  # A new setpoint keeps the derate
+
+
+def test_stall_duty_is_open_loop(clock):
+    wheel = Wheel(15, gain=0.5)
+    pi = make_pi(wheel)
+    loop = SpeedLoop((pi,), PERIOD_MS)
+    pi.duty_u16(setpoint_for(100))
+    run_loop(clock, loop, 500)
+    assert pi.integral > 0
+    reads = wheel.reads
+    pi.duty_u16(STALL)
+    assert (pi.target_mm_s, pi.integral, pi.pinned) == (0, 0, 0)
+    assert wheel.pwm.duty_u16() == STALL
+    run_loop(clock, loop, 500)
+    assert wheel.reads == reads  # No feedback, no correction
+    assert wheel.pwm.duty_u16() == STALL
+    pi.duty_u16(0)
+    assert wheel.pwm.duty_u16() == 0
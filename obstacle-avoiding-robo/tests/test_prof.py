@@ -0,0 +1,124 @@
+"""Profiler wrappers on the virtual clock: argument passing, self time and coroutines."""
+
+import pytest
+
+from prof import Profiler
+
+SLACK_US = 100  # Each ticks_us() read moves the virtual clock on by 10 us
+
+
+class Pause:
+    """Suspends a coroutine once, like waiting on the event loop."""
+
+    def __await__(self):
+        yield
+
+
+def finish(coro):
+    """Resume coro until it returns; its result."""
+    with pytest.raises(StopIteration) as stop:
+        coro.send(None)
+    return stop.value.value
+
+
+def near(value, expected):
+    return expected <= value <= expected + SLACK_US
+
+
+def test_positional_arguments_and_defaults_pass_through(clock):
+    prof = Profiler()
+
+    @prof.wrap("args")
+    def args(a=1, b=2, c=3, d=4, e=5, f=6):
+        return (a, b, c, d, e, f)
+
+    assert args() == (1, 2, 3, 4, 5, 6)
+    assert args(10) == (10, 2, 3, 4, 5, 6)
+    assert args(10, 20, 30) == (10, 20, 30, 4, 5, 6)
+    assert args(10, 20, 30, 40, 50, 60) == (10, 20, 30, 40, 50, 60)
+    assert args(None, None) == (None, None, 3, 4, 5, 6)
+    assert prof.count[0] == 5
+
+
+def test_self_time_leaves_out_profiled_callees(clock):
+    prof = Profiler()
+
+    @prof.wrap("inner")
+    def inner():
+        clock.advance(3000)
+
+    @prof.wrap("outer")
+    def outer():
+        clock.advance(1000)
+        inner()
+        inner()
+
+    outer()
+    assert prof.names == ["inner", "outer"]
+    assert prof.count[0] == 2 and near(prof.total_us[0], 6000)
+    assert near(prof.total_us[1], 7000)
+    assert near(prof.self_us[1], 1000)
+    assert prof.min_us[0] <= prof.max_us[0] < 3000 + SLACK_US
+
+
+def test_exception_still_records_the_call(clock):
+    prof = Profiler()
+
+    @prof.wrap("fails")
+    def fails(x):
+        clock.advance(500)
+        raise ValueError(x)
+
+    with pytest.raises(ValueError):
+        fails(1)
+    assert prof.count[0] == 1 and near(prof.total_us[0], 500)
+    assert prof._depth == 0
+
+
+def test_coroutine_is_timed_across_suspensions(clock):
+    prof = Profiler()
+
+    @prof.wrap("sensor")
+    def sensor():
+        clock.advance(200)
+
+    @prof.wrap_async("turn")
+    async def turn(side, speed=50):
+        await Pause()
+        clock.advance(4000)
+        return side, speed
+
+    @prof.wrap_async("avoid")
+    async def avoid(side):
+        clock.advance(1000)
+        return await turn(side)
+
+    coro = avoid("left")
+    coro.send(None)  # Suspended inside turn()
+    clock.advance(2000)
+    sensor()  # Another task runs meanwhile
+    assert finish(coro) == ("left", 50)
+    sensor_slot, turn_slot, avoid_slot = 0, 1, 2
+    assert near(prof.total_us[avoid_slot], 7200)
+    assert near(prof.total_us[turn_slot], 6200)
+    assert near(prof.self_us[avoid_slot], 1000)
+    assert prof.count[sensor_slot] == 1
+    assert prof._depth == 0
+
+
+def test_disabled_profiler_leaves_functions_alone():
+    prof = Profiler(enabled=False)
+
+    def fn(a, b=2):
+        return a + b
+
+    assert prof.wrap("fn")(fn) is fn
+    assert prof.wrap_async("fn")(fn) is fn
+    assert prof.names == []
+
+
+def test_slots_run_out():
+    prof = Profiler(max_functions=1)
+    prof.wrap("one")(lambda: None)
+    with pytest.raises(ValueError):
+        prof.wrap("two")(lambda: None)
@@ -0,0 +1,135 @@
+"""EchoRanger against scripted echo edges, and the Mailbox seqlock."""
+
+from machine import Pin, drive_pin, on_write
+
+from drivers.tof import EchoScale
+from ranging import ECHO_TIMEOUT_US, EchoRanger, Mailbox
+
+TRIG = 16
+ECHO = 17
+
+
+def echo_after(clock, delay_us, width_us):
+    """Script one echo pulse: rise delay_us after now, fall width_us later."""
+    start = clock.now_us() + delay_us
+    clock.schedule_at(start, lambda: drive_pin(ECHO, 1))
+    if width_us is not None:
+        clock.schedule_at(start + width_us, lambda: drive_pin(ECHO, 0))
+
+
+def ranger(**kwargs):
+    return EchoRanger(Pin(TRIG, Pin.OUT), Pin(ECHO, Pin.IN), **kwargs)
+
+
+def test_echo_width_is_converted_to_distance(clock):
+    r = ranger()
+    r.listen()
+    width = 5831  # 1000 mm round trip at 20 C
+    r.fire()
+    echo_after(clock, 200, width)
+    clock.advance(20000)
+    dist, age = r.mailbox.read()
+    assert dist == EchoScale().mm(width) / 10
+    assert 99.5 <= dist <= 100.5
+    assert age >= 0
+    assert (r.pings, r.timeouts) == (1, 0)
+
+
+def test_on_echo_filters_published_value(clock):
+    seen = []
+    r = ranger(on_echo=lambda cm: seen.append(cm) or cm * 2)
+    r.listen()
+    r.fire()
+    echo_after(clock, 100, 2916)
+    clock.advance(20000)
+    assert len(seen) == 1
+    assert r.mailbox.read()[0] == seen[0] * 2
+
+
+def test_missing_echo_counts_a_timeout(clock):
+    r = ranger()
+    r.listen()
+    r.fire()
+    clock.advance(60000)  # Nothing answers
+    r.fire()
+    assert r.timeouts == 1
+    assert r.mailbox.read() == (None, None)
+
+
+def test_echo_that_never_falls_counts_a_timeout(clock):
+    r = ranger()
+    r.listen()
+    r.fire()
+    echo_after(clock, 100, None)
+    clock.advance(60000)
+    r.fire()
+    assert r.timeouts == 1
+    assert r.mailbox.read() == (None, None)
+
+
+def test_overlong_echo_is_a_timeout_not_a_reading(clock):
+    r = ranger()
+    r.listen()
+    r.fire()
+    echo_after(clock, 100, ECHO_TIMEOUT_US + 1000)
+    clock.advance(60000)
+    assert r.timeouts == 1
+    assert r.mailbox.read() == (None, None)
+
+
+def test_periodic_timer_pings_and_publishes_every_echo(clock):
+    r = ranger(period_ms=60)
+
+    def answer(value):
+        if value:  # Trigger pulse: the echo comes back from 1000 mm away
+            echo_after(clock, 100, 5831)
+
+    on_write(TRIG, answer)
+    r.start()
+    clock.advance(630000)
+    r.stop()
+    assert r.pings == 11  # One at start, then every 60 ms up to 600 ms
+    assert r.timeouts == 0
+    assert r.mailbox.seq == r.pings
+
+
+class InterruptedMailbox(Mailbox):
+    """
+    A Mailbox whose reader is interrupted by a publish (as the scheduled echo
+    processing would) just before the attribute read number `at` inside read().
+    """
+
+    def __init__(self, at):
+        super().__init__()
+        self.at = at
+        self.reads = 0
+        self.busy = False
+
+    def __getattribute__(self, name):
+        if name in ("seq", "_value", "_stamp_ms") and not object.__getattribute__(self, "busy"):
+            self.busy = True
+            try:
+                if self.reads == self.at:
+                    import utime
+                    utime.advance(7000)
+                    self.publish(utime.ticks_ms())
+                self.reads += 1
+            finally:
+                self.busy = False
+        return object.__getattribute__(self, name)
+
+
+def test_seqlock_never_returns_a_torn_read(clock):
+    # Value published == ticks_ms at publish time, so value + age must be now
+    for at in range(4):  # seq, _value, _stamp_ms, seq
+        box = InterruptedMailbox(at)
+        box.busy = True
+        clock.advance(3000)
+        box.publish(clock.ticks_ms())
+        box.reads = 0
+        box.busy = False
+        clock.advance(2000)
+        value, age = box.read()
+        box.busy = True
+        assert value + age == clock.ticks_ms(), "torn read with publish before read %d" % at
+        assert box.seq == 2, "publish was not injected at read %d" % at
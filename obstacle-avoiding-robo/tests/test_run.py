@@ -0,0 +1,55 @@
+"""sim/run.py loading a robot script from its path, with constants overridden."""
+
+import os
+import sys
+
+import pytest
+
+import run
+from world import make_world
+
+SCRIPT = """
+import load_probe_helper
+
+LEFT_PWM, LEFT_IN1, LEFT_IN2 = 15, 14, 13
+TRIG_PIN, ECHO_PIN = 16, 17
+SPEED = 10
+DOUBLE = SPEED * 2  # Computed while importing
+FOUND_HELPER = load_probe_helper.WHERE
+"""
+
+
+@pytest.fixture
+def elsewhere(tmp_path):
+    """A dual_motor_main.py outside the project, with a helper module beside it."""
+    (tmp_path / "dual_motor_main.py").write_text(SCRIPT)
+    (tmp_path / "load_probe_helper.py").write_text("WHERE = 'beside the script'\n")
+    yield tmp_path
+    for name in ("dual_motor_main", "load_probe_helper"):
+        sys.modules.pop(name, None)
+    if str(tmp_path) in sys.path:
+        sys.path.remove(str(tmp_path))
+
+
+def test_script_outside_the_project_is_the_one_run(elsewhere):
+    module = run.load(str(elsewhere / "dual_motor_main.py"), make_world("room"))
+    assert module.__file__ == str(elsewhere / "dual_motor_main.py")
+    assert module.FOUND_HELPER == "beside the script"
+    assert sys.modules["dual_motor_main"] is module
+
+
+def test_overrides_apply_before_the_script_runs(elsewhere):
+    module = run.load(str(elsewhere / "dual_motor_main.py"), make_world("room"), {"SPEED": 30})
+    assert (module.SPEED, module.DOUBLE) == (30, 60)
+
+
+def test_unknown_override_is_refused(elsewhere):
+    with pytest.raises(ValueError, match="NO_SUCH_FLAG"):
+        run.load(str(elsewhere / "dual_motor_main.py"), make_world("room"), {"NO_SUCH_FLAG": 1})
+    assert "dual_motor_main" not in sys.modules
+
+
+def test_relative_and_bare_paths(elsewhere, monkeypatch):
+    monkeypatch.chdir(elsewhere)
+    assert run.script_path("dual_motor_main.py") == str(elsewhere / "dual_motor_main.py")
+    assert run.script_path("single_motor_main.py") == os.path.join(run.ROBOT_DIR, "single_motor_main.py")
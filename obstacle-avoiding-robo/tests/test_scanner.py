@@ -0,0 +1,95 @@
+"""Scanner passes on the virtual clock: overlapped moves, alternating sweeps, side choice."""
+
+from machine import Pin, drive_pin, on_write
+
+from scanner import NO_ECHO, Scanner
+
+TRIG, ECHO = 16, 17
+ANGLES = (0, 45, 90, 135, 180)
+MS_PER_DEG = 2
+SETTLE_MS = 5
+ECHO_US = 2916  # 500 mm round trip at 20 C
+
+
+class Servo:
+    """Records where it was sent and when (ms)."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.angle = 90
+        self.moves = []
+
+    def set_angle(self, angle):
+        self.angle = angle
+        self.moves.append((self.clock.now_us() // 1000, angle))
+
+
+def make_scanner(clock):
+    servo = Servo(clock)
+    scanner = Scanner(servo, Pin(TRIG, Pin.OUT), Pin(ECHO, Pin.IN), ANGLES, 200, MS_PER_DEG, SETTLE_MS)
+    fires = []
+    on_write(TRIG, lambda value: value and fires.append((clock.now_us() // 1000, servo.angle)))
+    return scanner, servo, fires
+
+
+def run_pass(clock, scanner, limit_ms=2000):
+    """begin() and advance until finished(); the pass time in ms."""
+    start = clock.now_us()
+    scanner.begin()
+    while not scanner.finished():
+        clock.advance(1000)
+        assert clock.now_us() - start < limit_ms * 1000
+    return (clock.now_us() - start) // 1000
+
+
+def test_next_move_overlaps_the_listen_window(clock):
+    scanner, servo, fires = make_scanner(clock)
+    step_ms = SETTLE_MS + 45 * MS_PER_DEG
+    assert scanner.window_ms < step_ms
+    took = run_pass(clock, scanner)
+    slew_ms = SETTLE_MS + 90 * MS_PER_DEG  # Out from centre to angles[0]
+    assert [t for t, _ in fires] == [slew_ms + i * step_ms for i in range(len(ANGLES))]
+    # Each ping sends the servo on at once; nothing answered, so every angle reads free
+    assert [angle for _, angle in servo.moves[1:5]] == [45, 90, 135, 180]
+    assert [t for t, _ in servo.moves[1:5]] == [t for t, _ in fires[:4]]
+    assert list(scanner.profile) == [NO_ECHO] * len(ANGLES)
+    # Done one listen window after the last ping, then re-centred
+    assert took == fires[-1][0] + scanner.window_ms
+    assert servo.angle == scanner.centre_angle
+
+
+def test_passes_from_centre_alternate_direction(clock):
+    scanner, servo, fires = make_scanner(clock)
+    run_pass(clock, scanner)
+    assert [angle for _, angle in fires] == list(ANGLES)
+    del fires[:]
+    run_pass(clock, scanner)
+    assert [angle for _, angle in fires] == list(reversed(ANGLES))
+    del fires[:]
+    servo.set_angle(150)
+    scanner._angle = 150  # Left off nearer angles[-1]
+    run_pass(clock, scanner)
+    assert fires[0][1] == ANGLES[-1]
+
+
+def test_echo_lands_on_the_angle_it_was_fired_at(clock):
+    scanner, servo, fires = make_scanner(clock)
+
+    def answer(value):
+        if value:
+            width = ECHO_US * (2 + servo.angle // 45) // 2  # 50 cm at angles[0], 25 cm more per angle
+            start = clock.now_us() + 200
+            clock.schedule_at(start, lambda: drive_pin(ECHO, 1))
+            clock.schedule_at(start + width, lambda: drive_pin(ECHO, 0))
+
+    on_write(TRIG, answer)
+    run_pass(clock, scanner)
+    assert [round(cm / 5) * 5 for cm in scanner.profile] == [50, 75, 100, 125, 150]
+
+
+def test_side_distances_want_room_for_the_chassis(clock):
+    scanner, _, _ = make_scanner(clock)
+    # Free at 0 and 150 cm at 135, but each only one beam wide: neighbours cap them
+    for i, cm in enumerate((NO_ECHO, 40, 30, 150, 60)):
+        scanner.profile[i] = cm
+    assert scanner.side_distances() == (60, 40)
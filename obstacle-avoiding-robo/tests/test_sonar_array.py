@@ -0,0 +1,77 @@
+"""SonarArray: staggered firing from one Timer and rejection of crosstalk."""
+
+from machine import Pin, drive_pin, on_write
+
+from ranging import EchoRanger, SonarArray
+
+NAMES = ("left", "centre", "right")
+PINS = ((2, 3), (16, 17), (4, 5))  # (trigger, echo) per sensor
+SLOT_MS = 40
+ECHO_US = 2916  # 500 mm round trip at 20 C
+
+
+def make_array():
+    rangers = [EchoRanger(Pin(trig, Pin.OUT), Pin(echo, Pin.IN), SLOT_MS) for trig, echo in PINS]
+    return SonarArray(NAMES, rangers, SLOT_MS)
+
+
+def pulse(clock, pin, at_us, width_us):
+    clock.schedule_at(at_us, lambda: drive_pin(pin, 1))
+    clock.schedule_at(at_us + width_us, lambda: drive_pin(pin, 0))
+
+
+def test_sensors_fire_in_turn_one_per_slot(clock):
+    fired = []
+    for name, (trig, _) in zip(NAMES, PINS):
+        on_write(trig, lambda value, name=name: value and fired.append((name, clock.now_us() // 1000)))
+    array = make_array()
+    array.start()
+    clock.advance(7 * SLOT_MS * 1000 + 500)
+    array.stop()
+    assert [name for name, _ in fired] == ["left", "centre", "right", "left", "centre", "right", "left"]
+    assert [ms for _, ms in fired] == [SLOT_MS * (i + 1) for i in range(7)]
+    assert array.stale_ms == 3 * SLOT_MS * 3
+
+
+def test_each_sensor_reads_its_own_echo(clock):
+    for i, (trig, echo) in enumerate(PINS):
+        width = ECHO_US * (i + 1)  # 50, 100 and 150 cm
+
+        def answer(value, echo=echo, width=width):
+            if value:
+                pulse(clock, echo, clock.now_us() + 200, width)
+
+        on_write(trig, answer)
+    array = make_array()
+    array.start()
+    clock.advance(3 * SLOT_MS * 1000 + 20000)
+    assert [round(d) for d in array.vector()] == [50, 100, 150]
+    assert array.distance("centre") == array.read("centre")[0]
+
+
+def test_echo_in_a_neighbours_window_is_discarded(clock):
+    (left_trig, left_echo), (_, centre_echo), _ = PINS
+    left_fires = []
+
+    def left_fired(value):
+        if value:
+            left_fires.append(clock.now_us())
+
+    on_write(left_trig, left_fired)
+    array = make_array()
+    left, centre, right = array.rangers
+    array.start()
+    clock.advance(SLOT_MS * 1000 + 100)
+    assert len(left_fires) == 1  # Left's window is open
+    # The idle centre sensor hears left's burst
+    pulse(clock, centre_echo, clock.now_us() + 300, ECHO_US)
+    clock.advance(SLOT_MS * 1000)  # Left got nothing back; centre fires now
+    # Left is still listening when it hears centre's burst, inside centre's window
+    pulse(clock, left_echo, clock.now_us() + 300, ECHO_US)
+    clock.advance(SLOT_MS * 1000)  # Right fires and closes centre's window
+    array.stop()
+    assert left.mailbox.read() == (None, None)
+    assert centre.mailbox.read() == (None, None)
+    assert left.timeouts == 1  # Its own window closed empty
+    assert centre.timeouts == 1  # Its own window (second slot) closed empty too
+    assert right.pings == 1 and right.timeouts == 0
@@ -0,0 +1,138 @@
+"""Telemetry batches decoded by telemetry_recv.Receiver, with datagrams lost and reordered."""
+
+import pytest
+
+from telemetry import AVOID, CRUISE, FRAME_SIZE, HEADER_SIZE, NO_DISTANCE, Telemetry, decode
+from telemetry_recv import MISSING_WINDOW, Receiver
+
+ADDR = ("192.0.2.1", 5005)
+
+
+class Outbox:
+    """Non-blocking UDP socket stand-in; sends listed in fail raise like EAGAIN."""
+
+    def __init__(self, fail=()):
+        self.sent = []
+        self.fail = set(fail)
+        self.calls = 0
+
+    def sendto(self, data, addr):
+        assert addr == ADDR
+        self.calls += 1
+        if self.calls in self.fail:
+            raise OSError(11)
+        self.sent.append(bytes(data))
+
+
+class Inbox:
+    """recvfrom() hands out queued datagrams in order."""
+
+    def __init__(self, datagrams):
+        self.datagrams = list(datagrams)
+
+    def recvfrom(self, size):
+        data = self.datagrams.pop(0)
+        assert len(data) <= size
+        return data, ADDR
+
+
+def record(clock, count, frames=4, fail=()):
+    """Send count samples; returns (sock, telemetry, the frames as they should decode)."""
+    sock = Outbox(fail)
+    tel = Telemetry(sock, ADDR, frames)
+    expected = []
+    for i in range(count):
+        clock.advance(50000)
+        dist = NO_DISTANCE if i == 3 else 100 + i * 7
+        frame = (clock.ticks_ms(), dist, 4000 + i, -2500 - i, AVOID if i % 5 == 4 else CRUISE, 900 + i)
+        tel.add(*frame[1:])
+        expected.append(frame)
+    tel.stop()
+    return sock, tel, expected
+
+
+def receive_all(datagrams):
+    receiver = Receiver(Inbox(datagrams))
+    frames = []
+    for _ in datagrams:
+        frames += receiver.receive()
+    return receiver, frames
+
+
+def test_batches_round_trip(clock):
+    sock, tel, expected = record(clock, 10)
+    assert [len(d) for d in sock.sent] == [HEADER_SIZE + n * FRAME_SIZE for n in (4, 4, 2)]
+    assert [decode(d)[0] for d in sock.sent] == [0, 1, 2]
+    receiver, frames = receive_all(sock.sent)
+    assert frames == expected
+    assert (receiver.datagrams, receiver.frames, receiver.lost, receiver.late) == (3, 10, 0, 0)
+
+
+def test_lost_datagram_is_counted_and_the_rest_decode(clock):
+    sock, tel, expected = record(clock, 16)
+    receiver, frames = receive_all(sock.sent[:1] + sock.sent[2:])  # Lost on the network
+    assert frames == expected[:4] + expected[8:]
+    assert receiver.lost == 1
+    assert receiver.robot_dropped == 0
+
+
+def test_robot_drop_shows_in_the_next_header(clock):
+    sock, tel, expected = record(clock, 12, fail=(2,))  # Second send fails
+    assert tel.dropped == 1
+    receiver, frames = receive_all(sock.sent)
+    assert frames == expected[:4] + expected[8:]
+    assert receiver.lost == 1
+    assert receiver.robot_dropped == 1
+
+
+def test_reordered_datagram_is_late_not_lost(clock):
+    sock, tel, expected = record(clock, 16)
+    d0, d1, d2, d3 = sock.sent
+    receiver, frames = receive_all([d0, d2, d1, d3])
+    assert sorted(frames) == expected
+    assert receiver.lost == 0
+    assert receiver.late == 1
+    assert receiver.datagrams == 4
+
+
+def test_repeats_and_old_datagrams_do_not_cancel_losses(clock):
+    sock, tel, expected = record(clock, 20)
+    d0, d1, d2, d3, d4 = sock.sent
+    receiver, frames = receive_all([d0, d2, d2, d0, d4, d1, d1])  # d3 never arrives
+    assert receiver.lost == 1
+    assert receiver.late == 1
+    assert receiver.stale == 3
+    assert sorted(frames) == expected[:12] + expected[16:]
+
+
+def test_missing_seqs_are_forgotten_past_the_window(clock):
+    sock, tel, expected = record(clock, 8)
+    first, late = sock.sent
+    tel.seq = 1 + MISSING_WINDOW + 10
+    tel.add(100, 0, 0, CRUISE, 0)
+    tel.flush()
+    receiver, frames = receive_all([first, sock.sent[-1], late])
+    assert receiver.lost == MISSING_WINDOW + 10  # Seqs 1 to MISSING_WINDOW + 10
+    assert (receiver.late, receiver.stale) == (0, 1)
+    assert len(receiver._missing) == MISSING_WINDOW
+
+
+def test_sequence_wraps_without_loss(clock):
+    sock, tel, expected = record(clock, 8)
+    tel.seq = 0xFFFF
+    for i in range(8):
+        tel.add(100, 0, 0, CRUISE, 0)
+    tel.flush()
+    seqs = [decode(d)[0] for d in sock.sent]
+    assert seqs == [0, 1, 0xFFFF, 0]
+    receiver, frames = receive_all(sock.sent[2:])
+    assert receiver.lost == 0 and receiver.late == 0
+
+
+def test_junk_is_rejected():
+    with pytest.raises(ValueError):
+        decode(b"RT")
+    with pytest.raises(ValueError):
+        decode(b"XX" + bytes(HEADER_SIZE))
+    receiver, frames = receive_all([b"hello"])
+    assert frames == [] and receiver.bad == 1
@@ -0,0 +1,134 @@
+"""The control endpoint served by the asyncio runtime, talked to over real loopback sockets."""
+
+import asyncio
+import json
+import os
+import struct
+import sys
+from base64 import b64encode
+from hashlib import sha1
+
+import pytest
+
+import run
+from webctl import WS_GUID
+from world import make_world
+
+ROBOT = os.path.join(run.ROBOT_DIR, "dual_motor_main.py")
+NEW_CRUISE = 80
+
+
+@pytest.fixture
+def robot(clock, tmp_path, monkeypatch):
+    """
+    dual_motor_main with CONTROL on an ephemeral port, in a room, on a virtual event
+    loop; also yields the speeds its Drive was asked to ramp to.
+    """
+    monkeypatch.chdir(tmp_path)  # Stands in for the Pico filesystem
+    module = run.load(ROBOT, make_world("room"), {"CONTROL": True, "CONTROL_PORT": 0})
+    ramps = []
+
+    class RecordingDrive(module.Drive):
+        def start_ramp(self, speed, ramp_ms, profile=module.easing.SMOOTHSTEP):
+            ramps.append(speed)
+            super().start_ramp(speed, ramp_ms, profile)
+
+    monkeypatch.setattr(module, "Drive", RecordingDrive)
+    loop = run.VirtualEventLoop()
+    asyncio.set_event_loop(loop)
+    yield module, loop, ramps
+    if module.control is not None:
+        module.control.close()
+    module.sensor.stop_background()
+    module.localmap.stop()
+    loop.close()
+    asyncio.set_event_loop(None)
+    del sys.modules["dual_motor_main"]
+
+
+async def http_get(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(("GET %s HTTP/1.0\r\n\r\n" % path).encode())
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    return head.split(b"\r\n"), body
+
+
+async def ws_read(reader):
+    """One unmasked server frame: (opcode, payload)."""
+    head = await reader.readexactly(2)
+    length = head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", await reader.readexactly(2))[0]
+    return head[0] & 0x0F, await reader.readexactly(length)
+
+
+def ws_frame(opcode, payload, mask=b"\x11\x22\x33\x44"):
+    """Masked client frame (payloads under 126 bytes)."""
+    masked = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+    return bytes((0x80 | opcode, 0x80 | len(payload))) + mask + masked
+
+
+async def session(port, ramps):
+    """GET /status, then retune CRUISE_SPEED over the WebSocket; returns what was seen."""
+    seen = {}
+    head, body = await http_get(port, "/status")
+    seen["status_line"] = head[0]
+    seen["content_type"] = [h for h in head if h.lower().startswith(b"content-type")]
+    seen["status"] = json.loads(body)
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = b64encode(os.urandom(16))
+    writer.write(b"GET /ws HTTP/1.1\r\nHost: robot\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                 b"Sec-WebSocket-Key: " + key + b"\r\nSec-WebSocket-Version: 13\r\n\r\n")
+    handshake = (await reader.readuntil(b"\r\n\r\n")).split(b"\r\n")
+    seen["ws_status_line"] = handshake[0]
+    seen["ws_accept"] = [h.split(b":", 1)[1].strip() for h in handshake if h.lower().startswith(b"sec-websocket-accept")]
+    seen["ws_expected"] = b64encode(sha1(key + WS_GUID).digest())
+    opcode, payload = await ws_read(reader)
+    seen["push"] = (opcode, json.loads(payload))
+
+    before = len(ramps)
+    writer.write(ws_frame(0x1, json.dumps({"CRUISE_SPEED": NEW_CRUISE}).encode()))
+    while True:
+        opcode, payload = await ws_read(reader)
+        reply = json.loads(payload)
+        if "staged" in reply:  # Pushes keep arriving in between
+            seen["staged"] = reply["staged"]
+            break
+    for _ in range(100):
+        if NEW_CRUISE in ramps[before:]:
+            break
+        await asyncio.sleep(0.05)
+    seen["ramps_after"] = ramps[before:]
+    writer.write(ws_frame(0x8, b""))
+    writer.close()
+    return seen
+
+
+def test_status_json_and_websocket_retune_reach_drive(robot):
+    module, loop, ramps = robot
+
+    async def main():
+        drive_task = asyncio.create_task(module.run_async(20000))
+        while module.control is None or module.control._server is None:
+            await asyncio.sleep(0.01)
+        port = module.control._server.sockets[0].getsockname()[1]
+        seen = await session(port, ramps)
+        await drive_task
+        return seen
+
+    seen = loop.run_until_complete(main())
+    assert seen["status_line"].startswith(b"HTTP/1.0 200")
+    assert seen["content_type"] == [b"Content-Type: application/json"]
+    status = seen["status"]
+    assert set(status) >= {"state", "dist_cm", "left", "right", "loop_us", "ticks_ms", "paused"}
+    assert status["paused"] is False
+    assert seen["ws_status_line"] == b"HTTP/1.1 101 Switching Protocols"
+    assert seen["ws_accept"] == [seen["ws_expected"]]
+    assert seen["push"][0] == 0x1 and "state" in seen["push"][1]
+    assert seen["staged"] == {"CRUISE_SPEED": NEW_CRUISE}
+    assert module.CRUISE_SPEED == NEW_CRUISE  # apply() wrote it between ticks
+    assert NEW_CRUISE in seen["ramps_after"]  # and the decision task drove at it
+    assert module.control.applied == 1
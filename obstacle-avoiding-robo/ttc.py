@@ -0,0 +1,106 @@
+"""
+Time-to-collision braking.
+ClosingRate fits a straight line through the last few (time, distance) readings and
+reports how fast the gap is closing. BrakeModel knows how long a stop takes, in
+seconds of closing speed: a stop begun with the gap closing at v cm/s uses up about
+v * brake_s cm. It starts from the decel ramp's nominal value and learns from each
+measured stop, so sensing lag and motor coast are included.
+
+The robot brakes once the time to collision with the stopping gap drops below
+brake_s plus a margin, instead of at a fixed distance: slow approaches get close,
+fast ones brake early.
+"""
+
+import utime
+from array import array
+
+
+class ClosingRate:
+    """Least-squares closing speed over the last n readings; add() skips repeated readings."""
+
+    def __init__(self, n=6, min_span_ms=100):
+        self.n = n
+        self.min_span_ms = min_span_ms
+        self.t_ms = array('i', [0] * n)
+        self.d_mm = array('i', [0] * n)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.index = 0
+        self._last_stamp = None
+
+    def add(self, dist_cm, stamp_ms):
+        """Record dist_cm measured at stamp_ms (ticks_ms); a stamp seen last time is ignored."""
+        if stamp_ms == self._last_stamp:
+            return
+        self._last_stamp = stamp_ms
+        self.t_ms[self.index] = stamp_ms
+        self.d_mm[self.index] = int(dist_cm * 10)
+        self.index = (self.index + 1) % self.n
+        if self.count < self.n:
+            self.count += 1
+
+    def rate(self):
+        """Closing speed in cm/s (positive while approaching), or None without enough history."""
+        n = self.count
+        if n < 3:
+            return None
+        newest = self.t_ms[(self.index - 1) % self.n]
+        st = sd = stt = std = 0
+        oldest = 0
+        for k in range(n):
+            i = (self.index - 1 - k) % self.n
+            t = utime.ticks_diff(self.t_ms[i], newest)  # <= 0, wrap-safe
+            d = self.d_mm[i]
+            st += t
+            sd += d
+            stt += t * t
+            std += t * d
+            oldest = t
+        if -oldest < self.min_span_ms:
+            return None
+        den = n * stt - st * st
+        if den <= 0:
+            return None
+        # Slope is mm/ms (= m/s); closing is its negative, in cm/s
+        return -100 * (n * std - st * sd) / den
+
+
+class BrakeModel:
+    """
+    Learned stop time. lag_ms covers sensing and reaction before the ramp starts;
+    a ramp of ramp_ms from speed v covers about v * ramp_ms / 2.
+    """
+
+    def __init__(self, ramp_ms, lag_ms, gain=0.25, min_speed=10):
+        self.brake_s = (ramp_ms / 2 + lag_ms) / 1000
+        self.gain = gain  # EWMA weight of each new stop
+        self.min_speed = min_speed  # cm/s; slower stops are too short to learn from
+        self.stops = 0
+        self._start_cm = None
+        self._speed = 0
+
+    def ttc(self, gap_cm, closing):
+        """Seconds until gap_cm closes at closing cm/s; None when not closing."""
+        if closing is None or closing <= 0:
+            return None
+        return gap_cm / closing
+
+    def begin(self, dist_cm, closing):
+        """Call when braking starts; end() with the distance once stopped."""
+        self._start_cm = dist_cm
+        self._speed = closing or 0
+
+    def end(self, dist_cm):
+        """Learn from the stop begun by begin(); returns the measured stop time or None."""
+        start = self._start_cm
+        self._start_cm = None
+        if start is None or dist_cm is None or self._speed < self.min_speed:
+            return None
+        measured = (start - dist_cm) / self._speed
+        if measured <= 0:
+            return None
+        self.brake_s += self.gain * (min(measured, 2 * self.brake_s) - self.brake_s)
+        self.stops += 1
+        return measured
@@ -0,0 +1,264 @@
+"""
+HTTP/WebSocket control and status endpoint for the asyncio runtime.
+
+    GET  /status   robot state as JSON
+    GET  /params   tunable constants, their limits and any staged values
+    POST /params   JSON object of new values, staged whole or rejected whole
+    POST /stop     pause driving; POST /start resumes
+    GET  /ws       WebSocket: pushes the status JSON every push_ms; text frames sent
+                   to it are treated like a POST /params body
+
+Staged values reach the script's globals only when the control loop calls apply()
+between ticks, so a maneuver never sees half an update. The endpoint runs in the
+same event loop as the control tasks and only gets the CPU at their awaits. Every step
+between its own awaits is bounded (request size, client count, timeouts) and timed,
+so summary() reports the longest it has ever held the loop.
+"""
+
+import json
+import utime
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+try:
+    from hashlib import sha1
+    from binascii import b2a_base64
+except ImportError:
+    from uhashlib import sha1
+    from ubinascii import b2a_base64
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_REQUEST = 1024  # Header plus body bytes; also the largest WebSocket frame accepted
+MAX_CLIENTS = 3
+READ_TIMEOUT_S = 2  # A client that stalls mid-request is dropped
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+            503: "Service Unavailable"}
+
+
+class ControlServer:
+    def __init__(self, status, limits, namespace, port=80, push_ms=250):
+        """
+        status(): dict for /status and WebSocket pushes. limits: {name: (lo, hi)} of the
+        constants /params may set. namespace: the dict they live in (the script's globals()).
+        """
+        self.status = status
+        self.limits = limits
+        self.namespace = namespace
+        self.port = port
+        self.push_ms = push_ms
+        self.paused = False
+        self._pending = {}
+        self._server = None
+        self.clients = 0
+        self.requests = 0
+        self.pushes = 0
+        self.rejected = 0
+        self.applied = 0
+        self.slices = 0
+        self.slice_total_us = 0
+        self.slice_max_us = 0
+
+    async def start(self, host="0.0.0.0"):
+        self._server = await asyncio.start_server(self._client, host, self.port)
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+    def apply(self):
+        """
+        Call between control ticks: write every staged value into namespace at once.
+        Returns the applied {name: value}, or None if nothing was staged.
+        """
+        if not self._pending:
+            return None
+        updates = self._pending
+        self._pending = {}
+        self.namespace.update(updates)
+        self.applied += 1
+        return updates
+
+    def stage(self, updates):
+        """Validate a {name: value} update against limits; stage it whole or raise ValueError."""
+        if not isinstance(updates, dict) or not updates:
+            raise ValueError("expected a JSON object of parameters")
+        for name, value in updates.items():
+            if name not in self.limits:
+                raise ValueError("%s is not tunable" % name)
+            lo, hi = self.limits[name]
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or not lo <= value <= hi:
+                raise ValueError("%s must be a number in %s..%s" % (name, lo, hi))
+        for name, value in updates.items():
+            self._pending[name] = type(self.namespace[name])(value)
+
+    def summary(self):
+        mean = self.slice_total_us // self.slices if self.slices else 0
+        return "requests=%d pushes=%d rejected=%d applied=%d; loop held max=%dus mean=%dus over %d steps" % (
+            self.requests, self.pushes, self.rejected, self.applied, self.slice_max_us, mean, self.slices)
+
+    def _timed(self, t0):
+        took = utime.ticks_diff(utime.ticks_us(), t0)
+        self.slices += 1
+        self.slice_total_us += took
+        if took > self.slice_max_us:
+            self.slice_max_us = took
+
+    def _state(self):
+        state = self.status()
+        state["paused"] = self.paused
+        return state
+
+    def _params(self):
+        return {"values": dict((name, self.namespace[name]) for name in self.limits),
+                "limits": self.limits, "staged": self._pending}
+
+    async def _client(self, reader, writer):
+        if self.clients >= MAX_CLIENTS:
+            writer.write(_response(503, {"error": "busy"}))
+            await _finish(writer)
+            return
+        self.clients += 1
+        try:
+            request = await asyncio.wait_for(self._read_request(reader), READ_TIMEOUT_S)
+            t0 = utime.ticks_us()
+            if request is None:
+                self.rejected += 1
+                reply = _response(413, {"error": "request over %d bytes" % MAX_REQUEST})
+            else:
+                self.requests += 1
+                method, path, headers, body = request
+                if method == "GET" and path == "/ws" and "sec-websocket-key" in headers:
+                    self._timed(t0)
+                    await self._websocket(reader, writer, headers["sec-websocket-key"])
+                    return
+                reply = self._route(method, path, body)
+            self._timed(t0)
+            writer.write(reply)
+            await writer.drain()
+        except (OSError, asyncio.TimeoutError, ValueError):
+            pass
+        finally:
+            self.clients -= 1
+            await _finish(writer)
+
+    async def _read_request(self, reader):
+        """(method, path, headers, body), or None once it runs past MAX_REQUEST."""
+        line = await reader.readline()
+        size = len(line)
+        parts = line.decode().split()
+        if len(parts) < 2:
+            raise ValueError("bad request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            size += len(line)
+            if size > MAX_REQUEST:
+                return None
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if size + length > MAX_REQUEST:
+            return None
+        body = await reader.readexactly(length) if length else b""
+        return parts[0], parts[1], headers, body
+
+    def _route(self, method, path, body):
+        if path == "/status" and method == "GET":
+            return _response(200, self._state())
+        if path == "/params" and method == "GET":
+            return _response(200, self._params())
+        if path == "/params" and method == "POST":
+            try:
+                self.stage(json.loads(str(body, "utf-8")))
+            except ValueError as e:
+                self.rejected += 1
+                return _response(400, {"error": str(e)})
+            return _response(202, {"staged": self._pending})
+        if path in ("/stop", "/start") and method == "POST":
+            self.paused = path == "/stop"
+            return _response(200, {"paused": self.paused})
+        return _response(404, {"error": "no route %s %s" % (method, path)})
+
+    async def _websocket(self, reader, writer, key):
+        t0 = utime.ticks_us()
+        accept = b2a_base64(sha1(key.encode() + WS_GUID).digest()).strip()
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        self._timed(t0)
+        await writer.drain()
+        listener = asyncio.create_task(self._ws_listen(reader, writer))
+        try:
+            while not listener.done():
+                t0 = utime.ticks_us()
+                frame = _ws_frame(0x1, json.dumps(self._state()).encode())
+                self._timed(t0)
+                writer.write(frame)
+                await writer.drain()
+                self.pushes += 1
+                await asyncio.sleep(self.push_ms / 1000)
+        finally:
+            listener.cancel()
+
+    async def _ws_listen(self, reader, writer):
+        """Read client frames until a close: text frames are parameter updates."""
+        try:
+            await self._ws_read(reader, writer)
+        except (EOFError, OSError):
+            pass
+
+    async def _ws_read(self, reader, writer):
+        while True:
+            head = await reader.readexactly(2)
+            opcode = head[0] & 0x0F
+            length = head[1] & 0x7F
+            if length == 126:
+                ext = await reader.readexactly(2)
+                length = ext[0] << 8 | ext[1]
+            elif length == 127 or length > MAX_REQUEST:
+                return
+            mask = await reader.readexactly(4) if head[1] & 0x80 else b"\0\0\0\0"
+            data = bytearray(await reader.readexactly(length))
+            t0 = utime.ticks_us()
+            for i in range(length):
+                data[i] ^= mask[i & 3]
+            if opcode == 0x8:
+                self._timed(t0)
+                return
+            if opcode == 0x1:
+                try:
+                    self.stage(json.loads(str(data, "utf-8")))
+                    reply = {"staged": self._pending}
+                except ValueError as e:
+                    self.rejected += 1
+                    reply = {"error": str(e)}
+                writer.write(_ws_frame(0x1, json.dumps(reply).encode()))
+            self._timed(t0)
+
+
+def _response(code, obj):
+    body = json.dumps(obj).encode()
+    return ("HTTP/1.0 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n"
+            "Connection: close\r\n\r\n" % (code, _REASONS[code], len(body))).encode() + body
+
+
+def _ws_frame(opcode, payload):
+    """Unmasked server frame."""
+    n = len(payload)
+    if n < 126:
+        return bytes((0x80 | opcode, n)) + payload
+    return bytes((0x80 | opcode, 126, n >> 8, n & 0xFF)) + payload
+
+
+async def _finish(writer):
+    try:
+        writer.close()
+        await writer.wait_closed()
+    except OSError:
+        pass
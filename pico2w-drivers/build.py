@@ -0,0 +1,63 @@
+"""
+Precompile the drivers package to .mpy bytecode (runs on the host).
+
+    pip install mpy-cross        # same .mpy version as the board's firmware
+    python3 build.py             # -> build/drivers/*.mpy
+    python3 build.py ../obstacle-avoiding-robo/ramp.py ../obstacle-avoiding-robo/easing.py
+
+Extra paths are compiled into build/ as well, so a project's helper modules can be
+shipped the same way. Copy build/drivers to the Pico as /drivers (or /lib/drivers).
+The board then imports bytecode instead of compiling source at every boot, which
+saves the compile time and the compiler's heap.
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = "drivers"
+
+
+def mpy_cross():
+    """Command for mpy-cross: the binary on PATH, else the pip package."""
+    path = shutil.which("mpy-cross")
+    return [path] if path else [sys.executable, "-m", "mpy_cross"]
+
+
+def compile_file(command, src, out_dir, name, opt):
+    """Compile src to out_dir/name (.py -> .mpy); returns (source bytes, mpy bytes)."""
+    dst = os.path.join(out_dir, os.path.splitext(name)[0] + ".mpy")
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    # -s keeps tracebacks pointing at the path as seen on the board
+    subprocess.check_call(command + ["-O%d" % opt, "-s", name, "-o", dst, src])
+    return os.path.getsize(src), os.path.getsize(dst)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", help="extra .py files to compile into the output folder")
+    parser.add_argument("--out", default=os.path.join(HERE, "build"), help="output folder")
+    parser.add_argument("-O", dest="opt", type=int, default=0,
+                        help="mpy-cross optimisation level (1 drops asserts and __debug__ code)")
+    args = parser.parse_args(argv)
+
+    command = mpy_cross()
+    jobs = [(path, os.path.join(PACKAGE, os.path.basename(path)))
+            for path in sorted(glob.glob(os.path.join(HERE, PACKAGE, "*.py")))]
+    jobs += [(path, os.path.basename(path)) for path in args.modules]
+    total_src = total_mpy = 0
+    for src, name in jobs:
+        src_size, mpy_size = compile_file(command, src, args.out, name, args.opt)
+        total_src += src_size
+        total_mpy += mpy_size
+        print("%-28s %6d -> %6d bytes" % (name, src_size, mpy_size))
+    print("%-28s %6d -> %6d bytes in %s" % ("total", total_src, total_mpy, args.out))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
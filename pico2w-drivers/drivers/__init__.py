@@ -0,0 +1,31 @@
+"""
+Shared drivers for the Pico 2 W projects: TB6612FNG motor channel and standby pin,
+HC-SR04/HC-SR05 ranging with temperature-compensated echo conversion, the log
+line format, Wi-Fi join, a batched MQTT publisher and a lightsleep scheduler.
+
+Submodules are imported on first use: `from drivers import Motor` loads
+drivers/motor.py only, so a script that never ranges never pays for hcsr04.py.
+Importing a submodule directly (`from drivers.hcsr04 import HCSR04`) works too.
+Nothing here touches hardware at import time; on CPython the machine/utime
+stand-ins in obstacle-avoiding-robo/sim must come first on sys.path.
+"""
+
+# Public name -> submodule that defines it
+_LAZY = {
+    "Motor": "motor",
+    "HBridge": "motor",
+    "HCSR04": "hcsr04",
+    "EchoScale": "tof",
+    "log": "console",
+    "Publisher": "mqtt",
+    "Scheduler": "power",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(name)
+    value = getattr(__import__("drivers." + module, None, None, (name,)), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
@@ -0,0 +1,15 @@
+"""
+The `[<ticks_ms>ms] tag: message` line every script prints, and the binary log
+decoder reproduces.
+"""
+
+import utime
+
+
+def log(tag, msg=""):
+    """Print one timestamped line; cold paths only (it formats and allocates)."""
+    try:
+        ts = utime.ticks_ms()
+    except Exception:
+        ts = int(utime.time() * 1000)
+    print("[{}ms] {}: {}".format(ts, tag, msg))
@@ -0,0 +1,67 @@
+"""
+HC-SR04/HC-SR05 ultrasonic ranging by busy-waiting on the echo pin.
+Each wait is bounded with ticks_diff(), so a ping that starts just before the
+microsecond counter wraps still times out instead of hanging or ending at once.
+The echo width is converted to millimetres by a cached EchoScale (tof.py).
+"""
+
+from machine import Pin
+import utime
+from drivers.tof import EchoScale
+
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+
+ECHO_TIMEOUT_US = const(30000)  # Per edge; ~5m of round trip, past the module's range
+MAX_RANGE_MM = const(3000)  # Longer readings are treated as no echo
+
+
+class HCSR04:
+    """
+    trigger_pin/echo_pin: GPIO numbers. tof: an EchoScale, e.g. one refreshed from
+    temp_sensor.read_temperature; fixed at 20 C by default.
+    """
+
+    def __init__(self, trigger_pin, echo_pin, tof=None):
+        self.trigger = Pin(trigger_pin, Pin.OUT)
+        self.echo = Pin(echo_pin, Pin.IN)
+        self.trigger.value(0)
+        self.tof = EchoScale() if tof is None else tof
+
+    def ping_us(self):
+        """One blocking ping: echo pulse width in us, or None if an edge never came."""
+        self.trigger.value(0)
+        utime.sleep_us(200)
+        self.trigger.value(1)
+        utime.sleep_us(10)
+        self.trigger.value(0)
+
+        start = utime.ticks_us()
+        while self.echo.value() == 0:
+            if utime.ticks_diff(utime.ticks_us(), start) > ECHO_TIMEOUT_US:
+                return None
+        start = utime.ticks_us()
+        while self.echo.value() == 1:
+            if utime.ticks_diff(utime.ticks_us(), start) > ECHO_TIMEOUT_US:
+                return None
+        return utime.ticks_diff(utime.ticks_us(), start)
+
+    def distance_mm(self):
+        """Whole millimetres, or None without an echo in range."""
+        self.tof.maybe_refresh()
+        echo_us = self.ping_us()
+        if echo_us is None:
+            return None
+        mm = self.tof.mm(echo_us)
+        return mm if mm <= MAX_RANGE_MM else None
+
+    def distance_cm(self):
+        mm = self.distance_mm()
+        return None if mm is None else mm / 10
+
+    def distance_inches(self):
+        mm = self.distance_mm()
+        return None if mm is None else mm / 25.4
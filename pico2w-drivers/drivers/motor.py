@@ -0,0 +1,79 @@
+"""
+TB6612FNG H-bridge: one Motor per channel (PWM speed plus IN1/IN2 direction) and
+the shared standby pin. Speeds are 0-100 %; duty maths is integer only.
+The ramp engine in obstacle-avoiding-robo/ramp.py drives a Motor through its .pwm
+and .current_duty.
+"""
+
+from machine import Pin, PWM
+
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+
+MAX_DUTY = const(65535)
+PWM_FREQ = const(10000)  # TB6612FNG accepts up to 100 kHz
+
+
+def duty_for(speed):
+    """16-bit duty for a 0-100 % speed (clamped)."""
+    speed = 0 if speed < 0 else (100 if speed > 100 else int(speed))
+    return speed * MAX_DUTY // 100
+
+
+class Motor:
+    def __init__(self, pwm_pin, in1, in2, freq=PWM_FREQ):
+        self.pwm = PWM(Pin(pwm_pin))
+        self.pwm.freq(freq)
+        self.pwm.duty_u16(0)
+        self.current_duty = 0
+        self.in1 = Pin(in1, Pin.OUT)
+        self.in2 = Pin(in2, Pin.OUT)
+        self.in1.off()
+        self.in2.off()
+
+    def forward(self, speed=100):
+        self.in1.on()
+        self.in2.off()
+        self.set_speed(speed)
+
+    def reverse(self, speed=100):
+        self.in1.off()
+        self.in2.on()
+        self.set_speed(speed)
+
+    def set_speed(self, speed):
+        """Change speed, keeping the direction."""
+        duty = duty_for(speed)
+        self.pwm.duty_u16(duty)
+        self.current_duty = duty
+
+    def stop(self):
+        """Coast: no drive, both direction pins low."""
+        self.pwm.duty_u16(0)
+        self.current_duty = 0
+        self.in1.off()
+        self.in2.off()
+
+    def brake(self):
+        """Short brake: both direction pins high hold the motor."""
+        self.pwm.duty_u16(0)
+        self.current_duty = 0
+        self.in1.on()
+        self.in2.on()
+
+
+class HBridge:
+    """Standby pin shared by both channels; enabled on creation."""
+
+    def __init__(self, stby_pin):
+        self.stby = Pin(stby_pin, Pin.OUT)
+        self.enable()
+
+    def enable(self):
+        self.stby.on()
+
+    def disable(self):
+        self.stby.off()
@@ -0,0 +1,249 @@
+"""
+Batched MQTT publishing over one persistent connection, with an offline queue.
+Samples go into a bounded RAM ring (two preallocated arrays; when it is full the
+oldest sample is overwritten and counted). service() publishes once a batch is
+ready: each PUBLISH carries up to `batch` samples, so the radio sends one message
+where a per-sample publisher would send many. While Wi-Fi or the broker is down the
+ring keeps filling; on reconnect the whole backlog goes out back to back, and the
+broker's acknowledgements are collected once at the end.
+
+Only the part of MQTT 3.1.1 a sensor needs: CONNECT (clean session), PUBLISH at
+QoS 1, PINGREQ to hold the connection open, DISCONNECT. Samples leave the queue only
+once the broker has acknowledged them, so a connection that dies mid-flush loses
+nothing (the receiver may see a batch twice). Payloads are JSON:
+[[age_ms, value], ...], oldest first, ages relative to the moment of publishing, so
+the receiver can timestamp samples that waited in the queue.
+"""
+
+import socket
+import struct
+import utime
+from array import array
+from drivers.wifi import connected
+
+CONNECT_TIMEOUT_S = 3
+RETRY_MIN_MS = 2000  # First reconnect delay; doubles per failure up to RETRY_MAX_MS
+RETRY_MAX_MS = 60000
+
+
+def _packet(kind, body):
+    """Fixed header (type byte, variable-length remaining length) plus body."""
+    n = len(body)
+    head = bytearray((kind,))
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        head.append(byte | 0x80 if n else byte)
+        if not n:
+            return bytes(head) + body
+
+
+def _string(s):
+    return struct.pack("!H", len(s)) + s
+
+
+def _recv_exactly(sock, n):
+    """n bytes from sock, however TCP splits them; OSError if the connection closes first."""
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise OSError("connection closed")
+        data += chunk
+    return data
+
+
+class Publisher:
+    def __init__(self, broker, topic, client_id, port=1883, capacity=64, batch=8,
+                 max_age_ms=60000, keepalive_s=60, wlan=None):
+        """
+        broker: IP or host name, resolved when connecting. topic/client_id: str.
+        capacity: samples the queue holds. A batch goes out once `batch` samples are
+        queued or the oldest is max_age_ms old. wlan: the WLAN from drivers.wifi.up(),
+        checked before each connection attempt.
+        """
+        self.broker = broker
+        self.port = port
+        self.topic = topic.encode()
+        self.client_id = client_id.encode()
+        self.batch = batch
+        self.max_age_ms = max_age_ms
+        self.keepalive_s = keepalive_s
+        self.wlan = wlan
+        self.capacity = capacity
+        self._ticks = array("i", [0] * capacity)
+        self._values = array("f", [0] * capacity)
+        self.head = 0  # Samples queued (next slot = head % capacity)
+        self.tail = 0  # Samples published
+        self.dropped = 0  # Overwritten while the queue was full
+        self.published = 0  # PUBLISH packets acknowledged
+        self.connects = 0
+        self._sock = None
+        self._pid = 0  # Last packet identifier used
+        self._last_send = 0
+        self._retry_at = utime.ticks_ms()
+        self._retry_ms = RETRY_MIN_MS
+
+    def pending(self):
+        return self.head - self.tail
+
+    def add(self, value, ticks=None):
+        """Queue one sample (stamped now unless ticks is given); never touches the network."""
+        if self.head - self.tail >= self.capacity:
+            self.tail += 1
+            self.dropped += 1
+        i = self.head % self.capacity
+        self._ticks[i] = utime.ticks_ms() if ticks is None else ticks
+        self._values[i] = value
+        self.head += 1
+
+    def due(self):
+        """True when a batch should go out."""
+        n = self.head - self.tail
+        if n >= self.batch:
+            return True
+        return n > 0 and utime.ticks_diff(utime.ticks_ms(), self._ticks[self.tail % self.capacity]) >= self.max_age_ms
+
+    def wait_ms(self):
+        """
+        ms until service() has work (a batch, a reconnect attempt, a keepalive ping), 0
+        if it has work now, None if it has none coming. For a drivers.power.Scheduler.
+        """
+        now = utime.ticks_ms()
+        n = self.head - self.tail
+        wait = None
+        if n:
+            age = utime.ticks_diff(now, self._ticks[self.tail % self.capacity])
+            wait = 0 if n >= self.batch else max(0, self.max_age_ms - age)
+            if self._sock is None:
+                wait = max(wait, utime.ticks_diff(self._retry_at, now))
+        if self._sock is not None:
+            ping = max(0, self.keepalive_s * 500 - utime.ticks_diff(now, self._last_send))
+            wait = ping if wait is None else min(wait, ping)
+        return wait
+
+    def service(self):
+        """
+        Call from the main loop. Publishes everything queued once a batch is due,
+        keeps an idle connection alive, and reconnects (with backoff) after a drop.
+        Returns the number of samples published.
+        """
+        now = utime.ticks_ms()
+        if not self.due():
+            if self._sock is not None and utime.ticks_diff(now, self._last_send) >= self.keepalive_s * 500:
+                self._send(_packet(0xC0, b""), True)
+            return 0
+        if self._sock is None and not self._connect(now):
+            return 0
+        return self._flush()
+
+    def close(self):
+        """Publish what is queued if connected, then disconnect."""
+        if self._sock is not None:
+            self._flush()
+        if self._sock is not None:
+            self._send(_packet(0xE0, b""), False)
+            self._drop()
+
+    def summary(self):
+        return "published=%d messages, queued=%d, dropped=%d samples, connects=%d" % (
+            self.published, self.pending(), self.dropped, self.connects)
+
+    def _flush(self):
+        """
+        Publish the whole queue in batch-sized messages, then take the samples out as
+        their PUBACKs come in. If the broker goes away mid-flush the messages already
+        sent are still acknowledged, as far as their PUBACKs arrived. Returns the
+        samples acknowledged.
+        """
+        queued = self.head - self.tail
+        in_flight = []
+        offset = 0
+        cut = False
+        while offset < queued:
+            n = min(queued - offset, self.batch)
+            self._pid = self._pid % 0xFFFF + 1
+            body = _string(self.topic) + struct.pack("!H", self._pid) + self._payload(offset, n)
+            try:
+                self._sock.sendall(_packet(0x32, body))
+            except OSError:
+                cut = True
+                break
+            in_flight.append((self._pid, n))
+            offset += n
+        if in_flight:
+            self._last_send = utime.ticks_ms()
+        acked = 0
+        try:
+            for pid, n in in_flight:
+                ack = _recv_exactly(self._sock, 4)
+                if ack[0] != 0x40 or ack[1] != 2 or (ack[2] << 8 | ack[3]) != pid:
+                    raise OSError("PUBACK %r, expected packet id %d" % (ack, pid))
+                self.tail += n
+                self.published += 1
+                acked += n
+        except OSError:
+            cut = True
+        if cut:
+            self._drop()
+            self._retry_at = utime.ticks_ms()  # First retry straight away
+        return acked
+
+    def _payload(self, offset, n):
+        now = utime.ticks_ms()
+        parts = []
+        for k in range(n):
+            i = (self.tail + offset + k) % self.capacity
+            parts.append("[%d,%s]" % (utime.ticks_diff(now, self._ticks[i]), _number(self._values[i])))
+        return ("[" + ",".join(parts) + "]").encode()
+
+    def _connect(self, now):
+        if utime.ticks_diff(now, self._retry_at) < 0:
+            return False
+        if not connected(self.wlan):
+            self._retry_at = utime.ticks_add(now, RETRY_MIN_MS)  # Look again later
+            return False
+        sock = socket.socket()
+        try:
+            sock.settimeout(CONNECT_TIMEOUT_S)
+            sock.connect(socket.getaddrinfo(self.broker, self.port)[0][-1])
+            sock.sendall(_packet(0x10, _string(b"MQTT") + struct.pack("!BBH", 4, 0x02, self.keepalive_s)
+                                 + _string(self.client_id)))
+            ack = _recv_exactly(sock, 4)
+            if ack[0] != 0x20 or ack[3] != 0:
+                raise OSError("CONNACK %r" % ack)
+        except OSError:
+            sock.close()
+            self._retry_at = utime.ticks_add(now, self._retry_ms)
+            self._retry_ms = min(self._retry_ms * 2, RETRY_MAX_MS)
+            return False
+        self._sock = sock
+        self._last_send = now
+        self._retry_ms = RETRY_MIN_MS
+        self.connects += 1
+        return True
+
+    def _send(self, packet, ping):
+        """Write one packet; on any error drop the connection (samples stay queued)."""
+        try:
+            self._sock.sendall(packet)
+            if ping and _recv_exactly(self._sock, 2) != b"\xd0\x00":
+                raise OSError("no PINGRESP")
+        except OSError:
+            self._drop()
+            self._retry_at = utime.ticks_ms()  # First retry straight away
+            return False
+        self._last_send = utime.ticks_ms()
+        return True
+
+    def _drop(self):
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        self._sock = None
+
+
+def _number(value):
+    """Whole numbers (motion events, counts) without a decimal point; others to 2 places."""
+    return "%d" % value if value == int(value) else "%.2f" % value
@@ -0,0 +1,163 @@
+"""
+Low-power main loop for sensor nodes: run each task at its deadline and lightsleep
+in between. A lightsleep ends only at its own timeout or on a pin interrupt, so
+every deadline the node has (a sample period, a motion timeout, a batch to publish)
+is handed to the Scheduler, which sleeps until the nearest one. Time awake and
+asleep is tallied for a duty cycle and an estimated average current.
+
+Only machine.lightsleep and utime are used: with the stand-ins from
+obstacle-avoiding-robo/sim first on sys.path the same loop runs on a PC against the
+virtual clock (see node_sim.py).
+"""
+
+import utime
+from machine import lightsleep
+
+# Rough supply currents for the estimate; measure your own board and pass them in
+RUN_MA = 25.0  # Awake at the default clock, Wi-Fi off
+IDLE_MA = 20.0  # In utime.sleep_ms: the CPU waits but every clock keeps running
+LIGHTSLEEP_MA = 1.5
+SLICE_MS = 20  # Without low_power: sleep_ms in slices this long, so a moved deadline is seen
+
+
+class OneShot:
+    """A one-shot deadline kept by a Scheduler, armed and cancelled like machine.Timer."""
+
+    def __init__(self, scheduler):
+        self._scheduler = scheduler
+        self.due = None  # ticks_ms, None when not armed
+        self.callback = None
+
+    def init(self, period, callback):
+        """Call callback(self) period ms from now (replacing any earlier deadline)."""
+        self.due = utime.ticks_add(utime.ticks_ms(), period)
+        self.callback = callback
+        self._scheduler.changed = True
+
+    def deinit(self):
+        self.due = None
+
+
+class Scheduler:
+    def __init__(self, low_power=True, max_sleep_ms=60000, run_ma=RUN_MA, sleep_ma=None, slice_ms=SLICE_MS):
+        """
+        low_power: sleep with machine.lightsleep (USB serial drops out while asleep);
+        False uses utime.sleep_ms, slice_ms at a time. max_sleep_ms caps a single
+        sleep. run_ma/sleep_ma: supply current awake and asleep, for summary().
+        """
+        self.low_power = low_power
+        self.max_sleep_ms = max_sleep_ms
+        self.slice_ms = slice_ms
+        self.run_ma = run_ma
+        if sleep_ma is None:
+            sleep_ma = LIGHTSLEEP_MA if low_power else IDLE_MA
+        self.sleep_ma = sleep_ma
+        self.changed = False  # Set when a deadline moves; the next sleep is skipped
+        self._periodic = []  # [due ticks_ms, period_ms, fn]
+        self._oneshots = []
+        self._pollers = []  # (wait_ms, fn)
+        self.sleeps = 0
+        self.awake_us = 0
+        self.asleep_us = 0
+        self._woke_us = utime.ticks_us()
+
+    def every(self, period_ms, fn):
+        """Call fn() now and then every period_ms; calls missed while busy are skipped."""
+        self._periodic.append([utime.ticks_ms(), period_ms, fn])
+
+    def oneshot(self):
+        """A new OneShot; use it where a script would arm a one-shot machine.Timer."""
+        timer = OneShot(self)
+        self._oneshots.append(timer)
+        return timer
+
+    def when(self, wait_ms, fn):
+        """Call fn() whenever wait_ms() returns 0; it returns the ms left, or None to wait for nothing."""
+        self._pollers.append((wait_ms, fn))
+
+    def run(self, ms=None):
+        """Run tasks and sleep between them, for ms or forever."""
+        end = None if ms is None else utime.ticks_add(utime.ticks_ms(), ms)
+        while True:
+            wait = self.step()
+            if end is not None:
+                left = utime.ticks_diff(end, utime.ticks_ms())
+                if left <= 0:
+                    return
+                wait = min(wait, left)
+            self.sleep(wait)
+
+    def step(self):
+        """Run whatever is due; returns ms until the nearest deadline (at most max_sleep_ms)."""
+        self.changed = False
+        now = utime.ticks_ms()
+        nearest = utime.ticks_add(now, self.max_sleep_ms)
+        for task in self._periodic:
+            if utime.ticks_diff(task[0], now) <= 0:
+                task[2]()
+                task[0] = utime.ticks_add(task[0], task[1])
+                if utime.ticks_diff(task[0], now) <= 0:
+                    task[0] = utime.ticks_add(now, task[1])
+            if utime.ticks_diff(task[0], nearest) < 0:
+                nearest = task[0]
+        for timer in self._oneshots:
+            if timer.due is not None and utime.ticks_diff(timer.due, utime.ticks_ms()) <= 0:
+                timer.due = None
+                timer.callback(timer)
+            if timer.due is not None and utime.ticks_diff(timer.due, nearest) < 0:
+                nearest = timer.due
+        for wait_ms, fn in self._pollers:
+            left = wait_ms()
+            if left == 0:
+                fn()
+                left = wait_ms()
+            if left is not None:
+                due = utime.ticks_add(utime.ticks_ms(), left)
+                if utime.ticks_diff(due, nearest) < 0:
+                    nearest = due
+        return max(0, utime.ticks_diff(nearest, utime.ticks_ms()))
+
+    def sleep(self, ms):
+        """
+        Sleep up to ms, ending early once a deadline moves (an interrupt handler armed
+        a OneShot): a pin interrupt ends a lightsleep, and utime.sleep_ms, which runs
+        scheduled handlers but does not return early, is taken in slices with changed
+        checked between them. Skipped if a deadline already moved since step().
+        """
+        if ms <= 0 or self.changed:
+            return
+        t0 = utime.ticks_us()
+        if self.low_power:
+            lightsleep(ms)
+        else:
+            end = utime.ticks_add(utime.ticks_ms(), ms)
+            while not self.changed:
+                left = utime.ticks_diff(end, utime.ticks_ms())
+                if left <= 0:
+                    break
+                utime.sleep_ms(min(left, self.slice_ms))
+        t1 = utime.ticks_us()
+        self.awake_us += utime.ticks_diff(t0, self._woke_us)
+        self.asleep_us += utime.ticks_diff(t1, t0)
+        self._woke_us = t1
+        self.sleeps += 1
+
+    def duty(self):
+        """Fraction of the time spent awake so far."""
+        awake = self.awake_us + utime.ticks_diff(utime.ticks_us(), self._woke_us)
+        total = awake + self.asleep_us
+        return awake / total if total else 1.0
+
+    def current_ma(self):
+        """Estimated average supply current."""
+        duty = self.duty()
+        return duty * self.run_ma + (1 - duty) * self.sleep_ma
+
+    def summary(self, battery_mah=None):
+        duty = self.duty()
+        ma = self.current_ma()
+        text = "awake %.2f%% over %d sleeps; est. %.2fmA average, %.1fx the battery life of staying awake" % (
+            duty * 100, self.sleeps, ma, self.run_ma / ma)
+        if battery_mah:
+            text += ", %.0fh on %dmAh" % (battery_mah / ma, battery_mah)
+        return text
@@ -0,0 +1,61 @@
+"""
+Temperature-compensated echo time-of-flight conversion.
+The speed of sound goes from ~331 m/s at 0 C to ~349 m/s at 30 C, so a fixed
+0.0343 cm/us is several percent off away from 20 C. EchoScale caches a fixed-point
+factor for the current air temperature and converts echo pulse widths to
+millimetres with one integer multiply and shift per ping. refresh() recomputes the
+factor from a temperature reader (e.g. temp_sensor.read_temperature).
+"""
+
+import utime
+
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
+
+SHIFT = const(16)  # Scale is mm per us of round trip, in 1/65536ths
+DEFAULT_TEMP_C = 20
+
+
+def speed_of_sound(temp_c):
+    """Speed of sound in dry air, m/s."""
+    return 331.3 + 0.606 * temp_c
+
+
+def scale_for(temp_c):
+    """Fixed-point mm-per-us factor for a round-trip echo at temp_c (11254 at 20 C)."""
+    return int(speed_of_sound(temp_c) / 2000 * (1 << SHIFT) + 0.5)
+
+
+class EchoScale:
+    """
+    Cached conversion factor. read_temperature() returns degrees C; it is called from
+    refresh() and maybe_refresh() only, never from the per-ping conversion.
+    """
+
+    def __init__(self, read_temperature=None, refresh_ms=30000, temp_c=DEFAULT_TEMP_C):
+        self.read_temperature = read_temperature
+        self.refresh_ms = refresh_ms
+        self.temp_c = temp_c
+        self.scale = scale_for(temp_c)
+        self._refreshed_ms = utime.ticks_ms()
+        if read_temperature is not None:
+            self.refresh()
+
+    def refresh(self):
+        if self.read_temperature is not None:
+            self.temp_c = self.read_temperature()
+            self.scale = scale_for(self.temp_c)
+        self._refreshed_ms = utime.ticks_ms()
+
+    def maybe_refresh(self):
+        """Refresh if refresh_ms has passed since the last reading; cheap otherwise."""
+        if (self.read_temperature is not None
+                and utime.ticks_diff(utime.ticks_ms(), self._refreshed_ms) >= self.refresh_ms):
+            self.refresh()
+
+    def mm(self, echo_us):
+        """Distance in whole millimetres for an echo pulse of echo_us; integers only."""
+        return (echo_us * self.scale) >> SHIFT
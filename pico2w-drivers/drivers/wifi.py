@@ -0,0 +1,25 @@
+"""
+Joining the Wi-Fi network without waiting for it.
+"""
+
+
+def up(ssid, password):
+    """
+    Start joining ssid and return the WLAN at once; check isconnected() before relying
+    on it. Returns None off the board, where the host's own network (or loopback)
+    carries the traffic.
+    """
+    try:
+        import network
+    except ImportError:
+        return None
+    wlan = network.WLAN(network.STA_IF)
+    wlan.active(True)
+    if not wlan.isconnected():
+        wlan.connect(ssid, password)
+    return wlan
+
+
+def connected(wlan):
+    """True if wlan has joined; always True off the board (wlan None)."""
+    return wlan is None or wlan.isconnected()
@@ -0,0 +1,6 @@
+# Freeze the drivers package into a custom firmware image, so its bytecode runs
+# straight from flash and costs no RAM to load:
+#   cd micropython/ports/rp2
+#   make BOARD=RPI_PICO2_W FROZEN_MANIFEST=/path/to/pico2w-drivers/manifest.py
+include("$(BOARD_DIR)/manifest.py")  # The board's own frozen modules (network, asyncio, ...)
+package("drivers")  # Relative to this file
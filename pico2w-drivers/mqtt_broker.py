@@ -0,0 +1,115 @@
+"""
+Stand-in MQTT broker for testing drivers.mqtt on a PC (runs on the host).
+
+    python3 mqtt_broker.py                    # listen on localhost:1883, print every PUBLISH
+    python3 mqtt_broker.py --port 1884 --drop-every 3
+
+Accepts CONNECT, PUBLISH (QoS 0 or 1, acknowledged), PINGREQ and DISCONNECT, which
+is all a drivers.mqtt.Publisher sends; subscribers are not supported. --drop-every
+closes a client's connection on every Nth message, before acknowledging it, to
+exercise reconnects, redelivery and the offline queue. Point a Publisher at 127.0.0.1, or set MQTT_BROKER in a sensor script
+to this machine's IP to receive from the board.
+"""
+
+import argparse
+import socketserver
+import sys
+import time
+
+
+def read_packet(rfile):
+    """(type byte, body) of the next packet, or None at end of stream."""
+    head = rfile.read(1)
+    if not head:
+        return None
+    length = shift = 0
+    while True:
+        byte = rfile.read(1)
+        if not byte:
+            return None
+        length |= (byte[0] & 0x7F) << shift
+        shift += 7
+        if not byte[0] & 0x80:
+            break
+    body = rfile.read(length)
+    return (head[0], body) if len(body) == length else None
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        peer = "%s:%d" % self.client_address
+        messages = 0
+        while True:
+            packet = read_packet(self.rfile)
+            if packet is None:
+                print("%s gone" % peer)
+                return
+            kind, body = packet
+            if kind >> 4 == 1:  # CONNECT
+                client_id = body[12:12 + int.from_bytes(body[10:12], "big")].decode()
+                print("%s CONNECT client_id=%s keepalive=%ds" % (peer, client_id, int.from_bytes(body[8:10], "big")))
+                self.wfile.write(b"\x20\x02\x00\x00")
+            elif kind >> 4 == 3:  # PUBLISH
+                n = int.from_bytes(body[:2], "big")
+                topic = body[2:2 + n].decode()
+                qos = (kind >> 1) & 3
+                pid = body[2 + n:4 + n] if qos else b""
+                payload = body[2 + n + len(pid):].decode()
+                messages += 1
+                if server.drop_every and messages % server.drop_every == 0:
+                    # Before the PUBACK, so the publisher has to send it again
+                    print("%s dropped by --drop-every before PUBLISH %s %s" % (peer, topic, payload))
+                    return
+                server.messages += 1
+                server.payloads.append(payload)
+                print("%s PUBLISH %s %s" % (peer, topic, payload))
+                if qos:
+                    self.wfile.write(b"\x40\x02" + pid)
+            elif kind >> 4 == 12:  # PINGREQ
+                print("%s PINGREQ" % peer)
+                self.wfile.write(b"\xd0\x00")
+            elif kind >> 4 == 14:  # DISCONNECT
+                print("%s DISCONNECT" % peer)
+                return
+            else:
+                print("%s unsupported packet type %d" % (peer, kind >> 4))
+                return
+
+
+class Broker(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, drop_every=0):
+        super().__init__(address, Handler)
+        self.drop_every = drop_every
+        self.messages = 0
+        self.payloads = []  # Each acknowledged PUBLISH payload, in arrival order
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bind", default="127.0.0.1", help="address to listen on (0.0.0.0 for the board)")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--drop-every", type=int, default=0, metavar="N",
+                        help="close each connection after N messages")
+    parser.add_argument("--seconds", type=float, help="stop after this long")
+    args = parser.parse_args(argv)
+
+    broker = Broker((args.bind, args.port), args.drop_every)
+    start = time.time()
+    broker.timeout = 0.2
+    try:
+        while args.seconds is None or time.time() - start < args.seconds:
+            broker.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broker.server_close()
+    print("%d messages" % broker.messages)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Run a sensor script on the simulator's virtual clock and see its power budget (host).
+
+    python3 node_sim.py ../pico2w_temp_sensor/temp_sensor.py --hours 1 --quiet
+    python3 node_sim.py ../pico2w-motion-sensor/motion-sensor.py --hours 8 --motion 600 --set LOW_POWER=True
+
+The machine/utime stand-ins from obstacle-avoiding-robo/sim shadow the real ones, so
+drivers.power.Scheduler sleeps on the virtual clock and hours pass in seconds. The
+script is imported as a module, --set overrides its constants, and its main() runs
+until the run time is up. The run then ends the way Ctrl-C would, so the script
+prints its own summary, including the duty cycle and current estimate. --motion
+drives the script's PIR_SENSOR_PIN with random presses: one every that many
+seconds on average, held high for --hold seconds.
+"""
+
+import argparse
+import ast
+import importlib.util
+import io
+import os
+import random
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SIM_DIR = os.path.join(os.path.dirname(HERE), "obstacle-avoiding-robo", "sim")
+
+
+def install():
+    """Put the stand-in modules and the drivers package ahead of everything else on sys.path."""
+    for path in (HERE, SIM_DIR):
+        if path in sys.path:
+            sys.path.remove(path)
+        sys.path.insert(0, path)
+
+
+def load(script):
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(script))[0], script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def motion_pattern(pin, seconds, mean_s, hold_s, rng):
+    """Schedule random presses of pin on the virtual clock; returns how many."""
+    import machine
+    import utime
+    count = 0
+    t = rng.expovariate(1 / mean_s)
+    while t + hold_s < seconds:
+        utime.schedule_at(int(t * 1000000), lambda: machine.drive_pin(pin, 1))
+        utime.schedule_at(int((t + hold_s) * 1000000), lambda: machine.drive_pin(pin, 0))
+        count += 1
+        t += hold_s + rng.expovariate(1 / mean_s)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("script", help="sensor script, e.g. ../pico2w_temp_sensor/temp_sensor.py")
+    parser.add_argument("--hours", type=float, default=1, help="virtual run time")
+    parser.add_argument("--motion", type=float, metavar="S", help="mean seconds between PIR presses")
+    parser.add_argument("--hold", type=float, default=3, help="seconds the PIR output stays high per press")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--quiet", action="store_true", help="show only what the script prints on exit")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a script constant (Python literal), e.g. LOW_POWER=True")
+    args = parser.parse_args(argv)
+
+    install()
+    import utime
+    module = load(os.path.abspath(args.script))
+    for item in args.set:
+        name, _, value = item.partition("=")
+        if not hasattr(module, name):
+            parser.error("%s has no constant %s" % (args.script, name))
+        setattr(module, name, ast.literal_eval(value))
+
+    seconds = args.hours * 3600
+    if args.motion:
+        presses = motion_pattern(module.PIR_SENSOR_PIN, seconds, args.motion, args.hold, random.Random(args.seed))
+        print("%d PIR presses scheduled" % presses)
+
+    def stop():
+        sys.stdout = sys.__stdout__  # The script's shutdown lines are always shown
+        raise KeyboardInterrupt
+
+    utime.schedule_at(int(seconds * 1000000), stop)
+    if args.quiet:
+        sys.stdout = io.StringIO()
+    try:
+        module.main()
+    finally:
+        sys.stdout = sys.__stdout__
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
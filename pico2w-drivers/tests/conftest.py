@@ -0,0 +1,24 @@
+"""
+Host tests for the drivers package, on the stand-in machine/utime modules from
+obstacle-avoiding-robo/sim (see node_sim.py). Every test starts from time zero.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from node_sim import install  # noqa: E402
+
+install()
+
+import machine  # noqa: E402
+import utime  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clock():
+    utime.reset()
+    machine.reset_state()
+    yield utime
@@ -0,0 +1,113 @@
+"""drivers.mqtt.Publisher against mqtt_broker.py, and against a socket that splits its reads."""
+
+import json
+import threading
+
+import pytest
+
+from drivers import mqtt
+from mqtt_broker import Broker
+
+
+@pytest.fixture
+def broker():
+    """A stand-in broker on a free loopback port, closing every 3rd connection's 3rd message unacknowledged."""
+    server = Broker(("127.0.0.1", 0), drop_every=3)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def samples(payloads):
+    return [value for payload in payloads for _, value in json.loads(payload)]
+
+
+def test_drop_every_3_redelivers_without_losing_samples(broker, capsys):
+    pub = mqtt.Publisher("127.0.0.1", "test/temp", "node", port=broker.server_address[1],
+                         capacity=64, batch=4, max_age_ms=0)
+    for i in range(1, 43):
+        pub.add(i)
+    for _ in range(20):
+        pub.service()
+        if not pub.pending():
+            break
+    pub.close()
+    assert pub.pending() == 0
+    assert pub.dropped == 0
+    assert pub.connects > 1  # The broker really did cut connections
+    assert samples(broker.payloads) == list(range(1, 43))  # Each once, in order
+    assert pub.published == len(broker.payloads) == 11
+
+
+class Trickle:
+    """Connected-socket stand-in: sendall() is recorded, recv() hands back the script one byte per call."""
+
+    def __init__(self, script):
+        self.script = script
+        self.sent = []
+        self.closed = False
+
+    def sendall(self, data):
+        self.sent.append(data)
+
+    def recv(self, n):
+        data, self.script = self.script[:1], self.script[1:]
+        return data
+
+    def close(self):
+        self.closed = True
+
+
+def publisher_on(sock, count, batch=4):
+    pub = mqtt.Publisher("192.0.2.1", "t", "c", batch=batch, max_age_ms=0)
+    pub._sock = sock
+    for i in range(count):
+        pub.add(i)
+    return pub
+
+
+def test_pubacks_split_across_reads_are_reassembled():
+    sock = Trickle(b"\x40\x02\x00\x01" b"\x40\x02\x00\x02")
+    pub = publisher_on(sock, 8)
+    assert pub.service() == 8
+    assert pub.pending() == 0 and pub.published == 2
+    assert not sock.closed
+
+
+def test_puback_for_the_wrong_packet_keeps_the_samples():
+    sock = Trickle(b"\x40\x02\x00\x01" b"\x40\x02\x00\x07")
+    pub = publisher_on(sock, 8)
+    assert pub.service() == 4  # The first batch is acknowledged, the second is not
+    assert pub.pending() == 4
+    assert sock.closed and pub._sock is None  # Reconnects and sends the rest again
+
+
+def test_connection_closed_mid_puback_keeps_the_samples():
+    sock = Trickle(b"\x40\x02")
+    pub = publisher_on(sock, 3)
+    assert pub.service() == 0
+    assert pub.pending() == 3
+    assert sock.closed
+
+
+class CutAfter(Trickle):
+    """Accepts `sends` packets, then fails every sendall like a reset connection."""
+
+    def __init__(self, script, sends):
+        super().__init__(script)
+        self.sends = sends
+
+    def sendall(self, data):
+        if len(self.sent) >= self.sends:
+            raise OSError(104)
+        super().sendall(data)
+
+
+def test_send_failing_mid_flush_still_collects_earlier_pubacks():
+    sock = CutAfter(b"\x40\x02\x00\x01" b"\x40\x02\x00\x02", sends=2)
+    pub = publisher_on(sock, 16)
+    assert pub.service() == 8  # Two of four batches went out and were acknowledged
+    assert pub.pending() == 8 and pub.published == 2
+    assert sock.closed and pub._sock is None
@@ -0,0 +1,42 @@
+"""drivers.power.Scheduler on the virtual clock, woken by pin interrupts."""
+
+import pytest
+from machine import Pin, drive_pin
+
+from drivers.power import SLICE_MS, Scheduler
+
+PIN = 28
+
+
+@pytest.mark.parametrize("low_power", [False, True])
+def test_oneshot_armed_by_an_interrupt_mid_sleep_fires_on_time(clock, low_power):
+    scheduler = Scheduler(low_power=low_power, max_sleep_ms=60000)
+    timer = scheduler.oneshot()
+    fired = []
+
+    def edge(pin):  # What the motion sensor's handler does on a falling edge
+        timer.init(period=5000, callback=lambda t: fired.append(clock.ticks_ms()))
+
+    Pin(PIN, Pin.IN).irq(handler=edge, trigger=Pin.IRQ_FALLING)
+    clock.schedule_at(3000000, lambda: drive_pin(PIN, 1))
+    clock.schedule_at(11000000, lambda: drive_pin(PIN, 0))
+    scheduler.run(30000)
+    assert len(fired) == 1
+    assert 16000 <= fired[0] <= 16000 + SLICE_MS
+
+
+def test_periodic_tasks_run_on_schedule_and_sleep_between(clock):
+    scheduler = Scheduler(low_power=True, max_sleep_ms=60000)
+    runs = []
+    scheduler.every(1000, lambda: runs.append(clock.ticks_ms()))
+    scheduler.run(10000)
+    assert len(runs) == 11  # 0 s through 10 s inclusive
+    assert all(0 <= t - 1000 * i < 5 for i, t in enumerate(runs))
+    assert scheduler.duty() < 0.01
+
+
+def test_idle_sleep_is_capped_and_counted(clock):
+    scheduler = Scheduler(low_power=False, max_sleep_ms=5000)
+    scheduler.run(20000)
+    assert scheduler.sleeps == 4
+    assert scheduler.duty() < 0.01
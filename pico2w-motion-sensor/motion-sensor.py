@@ -1,29 +1,77 @@
 """
 PIR Motion Sensor Integration for Raspberry Pi Pico 2w
 Detects motion using a PIR sensor and controls an LED accordingly.
+
+Event driven: a pin IRQ stamps each edge of the PIR output into a preallocated
+queue and schedules drain(), which updates the motion state within a fraction of a
+millisecond. A one-shot deadline ends the motion MOTION_TIMEOUT after the output
+falls. Nothing polls the sensor: a drivers.power.Scheduler sleeps until the next
+deadline (the motion timeout, an MQTT batch) or the next edge, whichever is first.
 """
 
 from machine import Pin
-from utime import sleep, ticks_ms
+from utime import sleep, ticks_ms, ticks_us, ticks_diff
+from array import array
+from drivers.power import Scheduler
+
+try:
+    from micropython import schedule
+except ImportError:  # CPython host: run deferred work inline
+    def schedule(func, arg):
+        func(arg)
 
 # GPIO Pin Configuration
 PIR_SENSOR_PIN = 28  # GPIO pin connected to PIR sensor (adjust as needed)
 LED_PIN = "LED"      # Built-in LED on Pico 2w
 
 # Timing Configuration (in milliseconds)
-DEBOUNCE_TIME = 100      # Debounce time to filter false positives
+DEBOUNCE_TIME = 100      # A first pulse shorter than this is a glitch, not motion
 MOTION_TIMEOUT = 5000    # LED stays on for 5 seconds after last motion detected
 PIR_WARMUP_TIME = 2      # PIR sensor warmup time in seconds (30-60 seconds recommended)
+IDLE_TIME = 60000        # Longest single sleep
+EVENT_QUEUE = 16         # Edges held between the IRQ and drain()
+
+# Power
+LOW_POWER = False        # True: lightsleep between events (USB serial drops out while asleep)
+BATTERY_MAH = 2000       # Capacity for the battery-life estimate printed at exit
+
+# MQTT publishing (needs the drivers package from pico2w-drivers); None: serial only
+MQTT_BROKER = None       # Broker address, e.g. "192.168.1.100"
+MQTT_TOPIC = "pico2w/motion"  # Payload values: 1 motion started, 0 motion stopped
+MQTT_BATCH = 8           # Events per message
+MQTT_MAX_AGE = 10000     # ...or sooner, once the oldest queued event is this old (ms)
+MQTT_QUEUE = 256         # Events held while Wi-Fi or the broker is down
+WIFI_SSID = ""
+WIFI_PASSWORD = ""
 
 # Initialize GPIO pins
 pir_sensor = Pin(PIR_SENSOR_PIN, Pin.IN)
 led = Pin(LED_PIN, Pin.OUT)
 
+scheduler = None  # drivers.power.Scheduler, created by main()
+stop_timer = None  # Its OneShot, armed when the PIR output falls
+
 # State variables
 motion_detected = False
 last_motion_time = 0
-last_state = 0
-last_debounce_time = 0
+publisher = None  # drivers.mqtt.Publisher when MQTT_BROKER is set
+
+# Edge queue, written by the IRQ and emptied by drain(): ticks_us stamp and pin level
+edge_ticks = array("i", [0] * EVENT_QUEUE)
+edge_levels = bytearray(EVENT_QUEUE)
+edge_head = 0  # Edges queued
+edge_tail = 0  # Edges handled
+drain_queued = False
+stop_armed = 0  # Period stop_timer is armed with (ms), 0 when idle
+onset_us = 0  # Stamp of the edge that started the current motion
+onset_pending = False  # No fall seen yet since onset_us
+
+# Statistics
+edges_lost = 0
+glitches = 0
+onsets = 0
+latency_total_us = 0
+latency_max_us = 0
 
 
 def initialize_sensor():
@@ -36,27 +84,98 @@ def initialize_sensor():
     print("PIR sensor ready. Starting motion detection...")
 
 
-def is_motion_detected():
+def pir_edge(pin):
+    """Hard IRQ on both edges: stamp the edge and defer the rest (no allocation)."""
+    global edge_head, edges_lost, drain_queued
+    now = ticks_us()
+    if edge_head - edge_tail >= EVENT_QUEUE:
+        edges_lost += 1  # drain() re-reads the pin, so the state still catches up
+    else:
+        i = edge_head % EVENT_QUEUE
+        edge_ticks[i] = now
+        edge_levels[i] = pin.value()
+        edge_head += 1
+    if not drain_queued:
+        drain_queued = True
+        try:
+            schedule(drain, 0)
+        except RuntimeError:  # Scheduler queue full; the next edge retries
+            drain_queued = False
+
+
+def drain(_):
     """
-    Read PIR sensor with debouncing to filter false positives.
-    Returns True if motion is detected, False otherwise.
+    Scheduled after edges arrive: debounce them and update the motion state.
+    A rise starts the motion (or cancels a pending stop), a fall arms stop_timer.
+    A first pulse that falls within DEBOUNCE_TIME arms it for DEBOUNCE_TIME only: if
+    the output stays low that long the pulse was a glitch and the motion ends early;
+    if it rises again first it was chatter on a real onset.
     """
-    global last_state, last_debounce_time
-    
-    current_time = ticks_ms()
-    current_state = pir_sensor.value()
-    
-    # Debounce: only register state change if time has passed
-    if current_state != last_state:
-        last_debounce_time = current_time
-        last_state = current_state
-        return False
-    
-    # If state is stable and debounce time has passed, return the state
-    if current_time - last_debounce_time >= DEBOUNCE_TIME:
-        return current_state == 1
-    
-    return False
+    global edge_tail, drain_queued, onset_us, onset_pending
+    drain_queued = False
+    while edge_tail != edge_head:
+        i = edge_tail % EVENT_QUEUE
+        stamp = edge_ticks[i]
+        level = edge_levels[i]
+        edge_tail += 1
+        if level:
+            disarm_stop()
+            if not motion_detected:
+                onset_us = stamp
+                onset_pending = True
+                record_latency(stamp)
+            handle_motion_event(True)
+        elif motion_detected:
+            if onset_pending and ticks_diff(stamp, onset_us) < DEBOUNCE_TIME * 1000:
+                arm_stop(DEBOUNCE_TIME)
+            else:
+                arm_stop(MOTION_TIMEOUT)
+            onset_pending = False
+    settle()
+
+
+def settle():
+    """Match the state to the pin in case edges were lost or arrived before the IRQ was armed."""
+    if pir_sensor.value():
+        if not motion_detected:
+            record_latency(ticks_us())
+            handle_motion_event(True)
+        disarm_stop()
+    elif motion_detected and not stop_armed:
+        arm_stop(MOTION_TIMEOUT)
+
+
+def record_latency(stamp):
+    global onsets, latency_total_us, latency_max_us
+    latency = ticks_diff(ticks_us(), stamp)
+    onsets += 1
+    latency_total_us += latency
+    if latency > latency_max_us:
+        latency_max_us = latency
+
+
+def arm_stop(period):
+    global stop_armed
+    stop_timer.init(period=period, callback=motion_timeout)
+    stop_armed = period
+
+
+def disarm_stop():
+    global stop_armed
+    if stop_armed:
+        stop_timer.deinit()
+        stop_armed = 0
+
+
+def motion_timeout(t):
+    """stop_timer expired: the PIR output has been low for the period it was armed with."""
+    global stop_armed, glitches
+    period = stop_armed
+    stop_armed = 0
+    if not pir_sensor.value():
+        if period == DEBOUNCE_TIME:
+            glitches += 1
+        handle_motion_event(False)
 
 
 def handle_motion_event(motion_state):
@@ -72,6 +191,8 @@ def handle_motion_event(motion_state):
         last_motion_time = ticks_ms()
         led.on()
         print("[MOTION DETECTED] - LED ON")
+        if publisher is not None:
+            publisher.add(1)
     
     elif motion_state:
         # Motion still happening, update timestamp
@@ -82,34 +203,46 @@ def handle_motion_event(motion_state):
         motion_detected = False
         led.off()
         print("[MOTION STOPPED] - LED OFF")
+        if publisher is not None:
+            publisher.add(0)
+
+
+def summary():
+    mean = latency_total_us // onsets if onsets else 0
+    return f"{onsets} motions, {glitches} glitches, {edges_lost} edges lost; latency mean={mean}us max={latency_max_us}us"
 
 
 def main():
-    """Main loop for motion sensor monitoring."""
-    global motion_detected, last_motion_time
+    """Arm the PIR interrupt and sleep; motion is handled as it happens."""
+    global publisher, scheduler, stop_timer
     
+    scheduler = Scheduler(low_power=LOW_POWER, max_sleep_ms=IDLE_TIME)
+    stop_timer = scheduler.oneshot()
+    if MQTT_BROKER:
+        from drivers.wifi import up
+        from drivers.mqtt import Publisher
+        publisher = Publisher(MQTT_BROKER, MQTT_TOPIC, "pico2w-motion", capacity=MQTT_QUEUE,
+                              batch=MQTT_BATCH, max_age_ms=MQTT_MAX_AGE, wlan=up(WIFI_SSID, WIFI_PASSWORD))
     initialize_sensor()
     
     print("LED starts monitoring motion...")
+    pir_sensor.irq(handler=pir_edge, trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING, hard=True)
+    settle()  # The output may already be high
+    if publisher is not None:
+        scheduler.when(publisher.wait_ms, publisher.service)
     try:
-        while True:
-            # Check for motion
-            pir_value = pir_sensor.value()
-            
-            # Motion currently detected (sensor reading high)
-            if pir_value == 1:
-                handle_motion_event(True)
-            else:
-                # Check if motion timeout has elapsed
-                current_time = ticks_ms()
-                if motion_detected and current_time - last_motion_time >= MOTION_TIMEOUT:
-                    handle_motion_event(False)
-            
-            sleep(0.1)  # Check sensor every 100ms
+        scheduler.run()  # An edge wakes it early; drain() runs as soon as it does
     
     except KeyboardInterrupt:
         print("\nShutting down...")
+        pir_sensor.irq(handler=None)
+        disarm_stop()
         led.off()
+        print(f"Events: {summary()}")
+        print(f"Power: {scheduler.summary(BATTERY_MAH)}")
+        if publisher is not None:
+            publisher.close()
+            print(f"MQTT: {publisher.summary()}")
         print("Finished.")
 
 
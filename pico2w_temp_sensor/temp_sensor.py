@@ -1,9 +1,22 @@
 import machine
-import time
 
 # Initialize the ADC for the internal temperature sensor
 temp_sensor = machine.ADC(4)  # Channel 4 is the internal temperature sensor
 
+SAMPLE_PERIOD_S = 2
+
+# Power (needs the drivers package from pico2w-drivers)
+LOW_POWER = False  # True: lightsleep between readings (USB serial drops out while asleep)
+BATTERY_MAH = 2000  # Capacity for the battery-life estimate printed at exit
+
+# MQTT publishing (needs the drivers package from pico2w-drivers); None: serial only
+MQTT_BROKER = None  # Broker address, e.g. "192.168.1.100"
+MQTT_TOPIC = "pico2w/temperature"
+MQTT_BATCH = 15  # Readings per message: one publish every 30 s
+MQTT_QUEUE = 900  # Readings held while Wi-Fi or the broker is down: 30 minutes
+WIFI_SSID = ""
+WIFI_PASSWORD = ""
+
 def read_temperature():
     """
     Read temperature from Raspberry Pico 2W internal temperature sensor.
@@ -22,22 +35,42 @@ def read_temperature():
     return temperature_celsius
 
 def main():
-    """Main loop to continuously read and print temperature."""
+    """Read, print (and publish with MQTT_BROKER) every SAMPLE_PERIOD_S, sleeping in between."""
+    # Imported here so the robot, which only needs read_temperature(), does not load them
+    from drivers.power import Scheduler
+    
     print("Raspberry Pico 2W Temperature Sensor")
     print("=" * 40)
+    publisher = None
+    if MQTT_BROKER:
+        from drivers.wifi import up
+        from drivers.mqtt import Publisher
+        publisher = Publisher(MQTT_BROKER, MQTT_TOPIC, "pico2w-temp", capacity=MQTT_QUEUE,
+                              batch=MQTT_BATCH, wlan=up(WIFI_SSID, WIFI_PASSWORD))
+    
+    def sample():
+        temp = read_temperature()
+        temp_fahrenheit = (temp * 9/5) + 32
+        
+        print(f"Temperature: {temp:.2f} C / {temp_fahrenheit:.2f} F")
+        if publisher is not None:
+            publisher.add(temp)
+    
+    scheduler = Scheduler(low_power=LOW_POWER)
+    scheduler.every(SAMPLE_PERIOD_S * 1000, sample)
+    if publisher is not None:
+        scheduler.when(publisher.wait_ms, publisher.service)
     
     try:
-        while True:
-            temp = read_temperature()
-            temp_fahrenheit = (temp * 9/5) + 32
-            
-            print(f"Temperature: {temp:.2f} C / {temp_fahrenheit:.2f} F")
-            
-            # Wait 1 second before next reading
-            time.sleep(2)
+        scheduler.run()
     
     except KeyboardInterrupt:
         print("\nProgram stopped by user")
+    finally:
+        if publisher is not None:
+            publisher.close()
+            print(f"MQTT: {publisher.summary()}")
+        print(f"Power: {scheduler.summary(BATTERY_MAH)}")
 
 if __name__ == "__main__":
     main()